@@ -1,10 +1,32 @@
 import streamlit as st
-from datetime import time
+from datetime import date, datetime, time
+import json
 import os
+import re
 
+import auditoria
 import database
+import horarios_livres
+import importacao
+import integridade
+import metricas
+import triagem
 import validators
 import viz
+from intervalos import DIAS_SEMANA, dias_da_mascara, mascara_dias, normalizar_intervalo
+from limites import BaldeDeTokens
+from modelos import colunas_integrantes, texto_integrantes
+
+# Respawns por página na visualização, linhas máximas no editor de admin, problemas listados
+# na verificação de integridade e eventos mostrados da auditoria
+RESPAWNS_POR_PAGINA = 20
+LIMITE_EDITOR = 500
+LIMITE_PROBLEMAS_INTEGRIDADE = 200
+LIMITE_AUDITORIA = 200
+
+# Submissões de requisição por sessão: até 3 seguidas, depois 1 a cada 20 segundos
+LIMITE_REQUISICOES_CAPACIDADE = 3
+LIMITE_REQUISICOES_RECARGA = 1 / 20
 
 # Configuração da página
 st.set_page_config(
@@ -14,16 +36,74 @@ st.set_page_config(
 )
 
 
+def obter_tenants() -> dict:
+    """
+    Guildas configuradas nos secrets, uma seção [tenants.<id>] com nome e senha cada.
+    Sem nenhuma, o app atende só a guilda padrão com SENHA_ADMIN (como antes).
+    """
+    try:
+        tenants = st.secrets.get("tenants", None)
+        if tenants:
+            return {str(tenant): dict(config) for tenant, config in tenants.items()}
+    except Exception:
+        pass
+    return {}
+
+
+def iniciar_metricas() -> None:
+    """Sobe o endpoint /metrics (Prometheus) se METRICAS_PORTA estiver nos secrets ou no ambiente."""
+    try:
+        porta = st.secrets.get("METRICAS_PORTA", None)
+    except Exception:
+        porta = None
+    porta = porta or os.environ.get("METRICAS_PORTA")
+    if not porta:
+        return
+    try:
+        metricas.servir(int(porta))
+    except (OSError, ValueError):
+        pass  # porta ocupada ou inválida: o app segue sem métricas
+
+
+def selecionar_tenant(tenants: dict) -> str:
+    """Guilda da sessão: ?guilda=<id> na URL (ou seletor na sidebar); a primeira configurada por padrão."""
+    if not tenants:
+        return database.TENANT_PADRAO
+    ids = list(tenants)
+    atual = st.query_params.get("guilda")
+    if len(ids) > 1:
+        with st.sidebar:
+            atual = st.selectbox(
+                "🏰 Guilda", ids, index=ids.index(atual) if atual in ids else 0,
+                format_func=lambda t: tenants[t].get("nome", t), key="guilda",
+            )
+    elif atual not in ids:
+        atual = ids[0]
+    if st.query_params.get("guilda") != atual:
+        st.query_params["guilda"] = atual
+    return atual
+
+
 def verificar_autenticacao():
-    """Verifica se o usuário está autenticado. Retorna True se autenticado."""
+    """Verifica se o usuário está autenticado na guilda atual. Retorna True se autenticado."""
     if 'autenticado' not in st.session_state:
         st.session_state.autenticado = False
+    # A senha vale só para a guilda em que foi digitada
+    if st.session_state.get('tenant_autenticado', database.get_tenant()) != database.get_tenant():
+        st.session_state.autenticado = False
     
     return st.session_state.autenticado
 
 
 def obter_senha():
-    """Obtém a senha de autenticação dos secrets ou variável de ambiente."""
+    """Obtém a senha de administrador da guilda atual (secrets ou variável de ambiente)."""
+    tenant = database.get_tenant()
+    config = obter_tenants().get(tenant)
+    if config is not None:
+        senha = config.get("senha") or os.environ.get(f"SENHA_ADMIN_{tenant.upper()}")
+        # Guildas configuradas não herdam SENHA_ADMIN nem a senha padrão
+        return str(senha).strip() if senha else None
+    
     # Prioridade 1: Secrets do Streamlit (Cloud ou arquivo local .streamlit/secrets.toml)
     try:
         # No Streamlit, st.secrets funciona como objeto com atributos
@@ -64,6 +144,7 @@ def autenticar(senha_digitada: str) -> bool:
     # Comparar senhas
     if senha_digitada_normalizada == senha_correta_normalizada:
         st.session_state.autenticado = True
+        st.session_state.tenant_autenticado = database.get_tenant()
         return True
     return False
 
@@ -120,9 +201,26 @@ def mostrar_requisicao_interface():
     integrante3 = st.text_input("Integrante 3", key="req_int3")
     integrante4 = st.text_input("Integrante 4", key="req_int4")
     integrante5 = st.text_input("Integrante 5", key="req_int5")
+    entrar_espera = st.checkbox(
+        "⏳ Se o horário estiver ocupado, entrar na lista de espera", value=True, key="req_espera",
+        help="Quando o horário liberar, a requisição é criada automaticamente, na ordem de chegada."
+    )
     
     # Botão Submeter
     if st.button("🔥💀 Submeter Requisição 💀🔥", type="primary", use_container_width=True):
+        # Limite por sessão antes de qualquer consulta ao banco
+        if 'limite_requisicoes' not in st.session_state:
+            st.session_state['limite_requisicoes'] = BaldeDeTokens(
+                LIMITE_REQUISICOES_CAPACIDADE, LIMITE_REQUISICOES_RECARGA
+            )
+        balde = st.session_state['limite_requisicoes']
+        if not balde.consumir():
+            st.error(
+                f"💀⏳ Muitas requisições seguidas. Tente novamente em "
+                f"{balde.segundos_para_proximo():.0f} segundos. ⏳💀"
+            )
+            return
+        
         # Validar campos obrigatórios
         if not respawn or not respawn.strip():
             st.error("💀⚠️ Por favor, preencha o campo Respawn. ⚠️💀")
@@ -143,8 +241,30 @@ def mostrar_requisicao_interface():
         # Verificar overlaps (incluindo requisições pendentes)
         tem_overlap, mensagem_overlap = validators.verificar_overlap(
             respawn.strip(), horario_inicio_str, horario_fim_str,
-            verificar_requisicoes=True
+            verificar_requisicoes=True,
+            data=st.session_state.get('dia_planilhado')
         )
+        if tem_overlap and entrar_espera:
+            try:
+                database.insert_espera(
+                    respawn=respawn.strip(),
+                    horario_inicio=horario_inicio_str,
+                    horario_fim=horario_fim_str,
+                    integrante1=integrante1.strip() if integrante1 else None,
+                    integrante2=integrante2.strip() if integrante2 else None,
+                    integrante3=integrante3.strip() if integrante3 else None,
+                    integrante4=integrante4.strip() if integrante4 else None,
+                    integrante5=integrante5.strip() if integrante5 else None
+                )
+                st.info(
+                    f"💀⏳ {mensagem_overlap} Você entrou na lista de espera de {respawn.strip()}: "
+                    "a requisição é criada automaticamente quando o horário liberar. ⏳💀"
+                )
+            except database.RequisicaoDuplicadaError:
+                st.warning("💀⚠️ Esse pedido já está na lista de espera. ⚠️💀")
+            except Exception as e:
+                st.error(f"💀❌ Erro ao entrar na lista de espera: {str(e)} ❌💀")
+            return
         if tem_overlap:
             st.error(f"💀🔥⚠️ {mensagem_overlap} ⚠️🔥💀")
             return
@@ -164,6 +284,8 @@ def mostrar_requisicao_interface():
             st.success("💀🔥✅ Requisição enviada com sucesso! Aguarde aprovação do administrador. ✅🔥💀")
             st.session_state['mostrar_requisicao'] = False
             st.rerun()
+        except database.RequisicaoDuplicadaError:
+            st.warning("💀⚠️ Essa requisição já foi enviada e está aguardando aprovação. ⚠️💀")
         except Exception as e:
             st.error(f"💀❌ Erro ao enviar requisição: {str(e)} ❌💀")
 
@@ -187,19 +309,15 @@ def mostrar_aprovacao_requisicoes():
         return
     
     st.markdown("### 💀⚖️ Requisições Pendentes ⚖️💀")
+    if len(requisicoes) > 1:
+        mostrar_triagem_automatica(requisicoes)
     
     for req in requisicoes:
-        # req = (id, respawn, horario_inicio, horario_fim, integrante1, ..., integrante5, data_requisicao)
-        req_id = req[0]
-        respawn = req[1]
-        horario_inicio = req[2]
-        horario_fim = req[3]
-        
-        integrantes = []
-        for i in range(4, 9):
-            if req[i] and req[i].strip():
-                integrantes.append(req[i].strip())
-        integrantes_str = ", ".join(integrantes) if integrantes else "Sem integrantes"
+        req_id = req.id
+        respawn = req.respawn
+        horario_inicio = req.horario_inicio
+        horario_fim = req.horario_fim
+        integrantes_str = texto_integrantes(req.integrantes, "Sem integrantes")
         
         with st.expander(f"💀 {respawn} - {horario_inicio} às {horario_fim} ({integrantes_str})", expanded=True):
             col1, col2 = st.columns(2)
@@ -207,7 +325,7 @@ def mostrar_aprovacao_requisicoes():
             st.write(f"**Respawn:** {respawn}")
             st.write(f"**Horário:** {horario_inicio} - {horario_fim}")
             st.write(f"**Integrantes:** {integrantes_str}")
-            st.write(f"**Data da Requisição:** {req[9]}")
+            st.write(f"**Data da Requisição:** {req.data_requisicao}")
             
             col1, col2, col3 = st.columns([1, 1, 2])
             
@@ -216,7 +334,8 @@ def mostrar_aprovacao_requisicoes():
                     # Verificar overlap antes de aceitar
                     tem_overlap, mensagem_overlap = validators.verificar_overlap(
                         respawn, horario_inicio, horario_fim,
-                        verificar_requisicoes=False  # Não verificar outras requisições
+                        verificar_requisicoes=False,  # Não verificar outras requisições
+                        data=st.session_state.get('dia_planilhado')
                     )
                     
                     if tem_overlap:
@@ -227,20 +346,16 @@ def mostrar_aprovacao_requisicoes():
                             respawn=respawn,
                             horario_inicio=horario_inicio,
                             horario_fim=horario_fim,
-                            integrante1=req[4] if len(req) > 4 else None,
-                            integrante2=req[5] if len(req) > 5 else None,
-                            integrante3=req[6] if len(req) > 6 else None,
-                            integrante4=req[7] if len(req) > 7 else None,
-                            integrante5=req[8] if len(req) > 8 else None
+                            **colunas_integrantes(req.integrantes)
                         )
                         # Deletar requisição
-                        database.delete_requisicao(req_id)
+                        database.delete_requisicao(req_id, st.session_state.get('dia_planilhado'))
                         st.success(f"💀🔥✅ Requisição ID {req_id} aceita e adicionada ao planilhado! ✅🔥💀")
                         st.rerun()
             
             with col2:
                 if st.button(f"❌ Rejeitar", key=f"reject_{req_id}", type="secondary", use_container_width=True):
-                    database.delete_requisicao(req_id)
+                    database.delete_requisicao(req_id, st.session_state.get('dia_planilhado'))
                     st.success(f"💀❌ Requisição ID {req_id} rejeitada e removida. ❌💀")
                     st.rerun()
             
@@ -250,19 +365,488 @@ def mostrar_aprovacao_requisicoes():
         st.markdown("---")
 
 
-def main():
-    # Inicializar banco de dados (dentro do contexto Streamlit para garantir que secrets estejam disponíveis)
+def mostrar_triagem_automatica(requisicoes):
+    """Propõe o melhor conjunto de requisições sem overlap por respawn para o admin aplicar em lote."""
+    with st.expander("💀🤖 Triagem Automática 🤖💀", expanded=False):
+        st.caption(
+            "Por respawn, escolhe as requisições sem conflito entre si e com as hunts cadastradas "
+            "que somam o maior peso. Peso = base + integrantes × peso por integrante + horas de espera × peso por hora."
+        )
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            base = st.number_input("Peso base", min_value=0.0, value=1.0, step=0.5, key="triagem_base")
+        with col2:
+            por_integrante = st.number_input("Por integrante", min_value=0.0, value=1.0, step=0.5,
+                                             key="triagem_integrante")
+        with col3:
+            por_hora = st.number_input("Por hora de espera", min_value=0.0, value=0.1, step=0.1,
+                                       key="triagem_hora")
+        pesos = triagem.PesosTriagem(base, por_integrante, por_hora)
+        dia = st.session_state.get('dia_planilhado') or date.today()
+        
+        if st.button("🤖 Calcular proposta", key="triagem_calcular", use_container_width=True):
+            st.session_state['triagem_proposta'] = triagem.propor_triagem(requisicoes, dia, pesos)
+        decisoes = st.session_state.get('triagem_proposta')
+        if not decisoes:
+            return
+        
+        st.dataframe(
+            [
+                {
+                    "Decisão": "✅ Aceitar" if d.aceitar else "❌ Recusar",
+                    "Respawn": d.requisicao.respawn,
+                    "Horário": f"{d.requisicao.horario_inicio} - {d.requisicao.horario_fim}",
+                    "Integrantes": texto_integrantes(d.requisicao.integrantes),
+                    "Peso": round(d.peso, 2),
+                    "Motivo": d.motivo,
+                }
+                for d in decisoes
+            ],
+            hide_index=True,
+            use_container_width=True,
+        )
+        aceitar = [d.requisicao.id for d in decisoes if d.aceitar]
+        recusar = [d.requisicao.id for d in decisoes if not d.aceitar]
+        rejeitar_demais = st.checkbox(f"Remover também as {len(recusar)} requisição(ões) recusada(s)",
+                                      key="triagem_rejeitar")
+        para_espera = rejeitar_demais and st.checkbox(
+            "⏳ Mover as recusadas para a lista de espera (voltam sozinhas se o horário liberar)",
+            value=True, key="triagem_espera"
+        )
+        
+        if st.button(f"✅ Aplicar proposta ({len(aceitar)} aceita(s))", key="triagem_aplicar",
+                     type="primary", disabled=not aceitar and not rejeitar_demais, use_container_width=True):
+            # Recalcula com os dados atuais: se algo mudou desde a proposta, mostra a nova antes de aplicar
+            atual = triagem.propor_triagem(database.get_all_requisicoes(), dia, pesos)
+            if sorted(d.requisicao.id for d in atual if d.aceitar) != sorted(aceitar):
+                st.session_state['triagem_proposta'] = atual
+                st.warning("💀⚠️ As requisições ou hunts mudaram; revise a proposta atualizada. ⚠️💀")
+                st.rerun()
+            aceitas, rejeitadas = database.aprovar_requisicoes(
+                aceitar, recusar if rejeitar_demais else [], rejeitadas_para_espera=para_espera, dia=dia
+            )
+            st.session_state.pop('triagem_proposta', None)
+            st.success(f"💀🔥✅ {aceitas} requisição(ões) aceita(s) e {rejeitadas} removida(s)! ✅🔥💀")
+            st.rerun()
+
+
+def mostrar_lista_espera():
+    """Fila de espera por respawn, na ordem de chegada, para o admin acompanhar ou remover pedidos."""
+    espera = database.get_lista_espera()
+    if not espera:
+        return
+    
+    with st.expander(f"💀⏳ Lista de Espera ({len(espera)}) ⏳💀", expanded=False):
+        st.caption("Quando um horário libera, o pedido mais antigo que couber vira requisição pendente.")
+        por_respawn = {}
+        for pedido in espera:
+            por_respawn.setdefault(pedido.respawn, []).append(pedido)
+        for respawn, pedidos in por_respawn.items():
+            st.markdown(f"**{respawn}**")
+            for posicao, pedido in enumerate(pedidos, start=1):
+                col1, col2 = st.columns([4, 1])
+                with col1:
+                    st.write(
+                        f"{posicao}º · {pedido.horario_inicio} às {pedido.horario_fim} "
+                        f"({texto_integrantes(pedido.integrantes, 'Sem integrantes')}) · desde {pedido.data_requisicao}"
+                    )
+                with col2:
+                    if st.button("🗑️ Remover", key=f"remove_espera_{pedido.id}", use_container_width=True):
+                        database.delete_espera(pedido.id)
+                        st.rerun()
+        st.markdown("---")
+
+
+def mostrar_hunts_recorrentes(dia: date):
+    """Lista os modelos de hunt recorrente para admin pular uma data ou excluir."""
+    recorrentes = database.get_hunts_recorrentes()
+    if not recorrentes:
+        return
+    
+    with st.expander(f"💀🔁 Hunts Recorrentes ({len(recorrentes)}) 🔁💀", expanded=False):
+        for rec in recorrentes:
+            rec_id = rec.id
+            integrantes_str = texto_integrantes(rec.integrantes, "Sem integrantes")
+            dias_str = ", ".join(DIAS_SEMANA[d] for d in dias_da_mascara(rec.dias_semana))
+            st.write(f"**{rec.respawn}** - {rec.horario_inicio} às {rec.horario_fim} ({integrantes_str}) - {dias_str}")
+            
+            col1, col2, col3 = st.columns([1, 1, 2])
+            with col1:
+                if st.button(f"⏭️ Pular {dia.strftime('%d/%m')}", key=f"skip_rec_{rec_id}", use_container_width=True):
+                    database.add_excecao_recorrente(rec_id, dia)
+                    st.success(f"💀✅ Ocorrência de {dia.strftime('%d/%m')} pulada. ✅💀")
+                    st.rerun()
+            with col2:
+                if st.button("🗑️ Excluir", key=f"delete_rec_{rec_id}", use_container_width=True):
+                    database.delete_hunt_recorrente(rec_id, dia)
+                    st.success(f"💀🔥✅ Hunt recorrente ID {rec_id} excluída! ✅🔥💀")
+                    st.rerun()
+            st.markdown("---")
+
+
+def mostrar_importacao():
+    """Importação em lote de hunts a partir de planilha CSV/XLSX (admin)."""
+    with st.expander("💀📥 Importar Planilha 📥💀", expanded=False):
+        st.caption(
+            "Colunas: Respawn, Início, Fim e Integrantes (separados por vírgula) "
+            "ou Integrante 1 a Integrante 5. Horários no formato HH:MM."
+        )
+        versao = st.session_state.get('importacao_versao', 0)
+        arquivo = st.file_uploader(
+            "Planilha (CSV ou XLSX)",
+            type=["csv", "xlsx"],
+            key=f"importacao_arquivo_{versao}"
+        )
+        if arquivo is None:
+            return
+        
+        try:
+            df = importacao.ler_planilha(arquivo, arquivo.name)
+            validas, relatorio = importacao.validar_planilha(df, st.session_state.get('dia_planilhado'))
+        except Exception as e:
+            st.error(f"💀❌ Erro ao ler a planilha: {str(e)} ❌💀")
+            return
+        
+        erros = len(relatorio) - len(validas)
+        st.write(f"**{len(validas)}** linha(s) válida(s), **{erros}** com erro.")
+        st.dataframe(relatorio, use_container_width=True, hide_index=True)
+        
+        if len(validas) and st.button(
+            f"🔥💀 Importar {len(validas)} hunt(s) 💀🔥", type="primary", key="importar_planilha"
+        ):
+            try:
+                total = importacao.importar(validas)
+                st.session_state['importacao_versao'] = versao + 1
+                st.success(f"💀🔥✅ {total} hunt(s) importada(s)! ✅🔥💀")
+                st.rerun()
+            except Exception as e:
+                st.error(f"💀❌ Erro ao importar: {str(e)} ❌💀")
+
+
+@st.cache_data(ttl=60, max_entries=32, show_spinner=False)
+def linha_do_tempo_spec(tenant: str, versao: int, dia: date, busca=None, jogador=None, janela=None) -> dict:
+    """
+    Spec do gráfico de linha do tempo, em cache por guilda + versão do planilhado da guilda +
+    filtros. O ttl cobre escritas feitas fora deste processo (que não mudam a versão).
+    """
+    metricas.FALHAS_CACHE.inc(cache="linha_do_tempo")  # só executa quando o cache não tem a entrada
+    database.usar_tenant(tenant)
+    # Geradores: cada respawn vira barras ao chegar do banco, sem a lista inteira na memória
+    hunts = database.iterar_hunts_por_respawn(dia=dia, busca=busca, jogador=jogador, janela=janela)
+    requisicoes = database.iterar_requisicoes_por_respawn(busca=busca, jogador=jogador, janela=janela)
+    return viz.gerar_grafico_linha_do_tempo(viz.gerar_linha_do_tempo(hunts, requisicoes))
+
+
+def mostrar_busca_horario_livre(dia: date):
+    """Procura respawn e horário em que toda a party (até 5 jogadores) está livre."""
+    with st.expander("💀🔎 Procurar Horário Livre para a Party 🔎💀", expanded=False):
+        colunas = st.columns(horarios_livres.MAX_JOGADORES)
+        jogadores = []
+        for i, col in enumerate(colunas):
+            with col:
+                jogadores.append(st.text_input(f"Jogador {i + 1}", key=f"livre_j{i + 1}"))
+        col1, col2 = st.columns(2)
+        with col1:
+            duracao = st.number_input("Duração (minutos)", min_value=15, max_value=24 * 60, value=120,
+                                      step=15, key="livre_duracao")
+        with col2:
+            a_partir = st.time_input("A partir de", value=time(18, 0), key="livre_a_partir")
+        
+        if st.button("🔎 Procurar", key="livre_buscar", use_container_width=True):
+            if not any(j.strip() for j in jogadores):
+                st.warning("🔥⚠️ Informe pelo menos um jogador. ⚠️🔥")
+                return
+            st.session_state['livre_resultado'] = horarios_livres.buscar_horarios_livres(
+                jogadores, int(duracao), dia, a_partir.hour * 60 + a_partir.minute
+            )
+        resultado = st.session_state.get('livre_resultado')
+        if resultado is None:
+            return
+        if not resultado:
+            st.info("💀 Nenhum respawn com horário livre para toda a party nessa duração. 💀")
+            return
+        st.dataframe(
+            [
+                {"Respawn": h.respawn, "Início": h.horario_inicio, "Fim": h.horario_fim,
+                 "Folga (min)": h.folga}
+                for h in resultado
+            ],
+            hide_index=True,
+            use_container_width=True,
+        )
+
+
+def mostrar_filtros() -> dict:
+    """Barra de filtros da visualização. Retorna kwargs para as consultas filtradas do database."""
+    col1, col2, col3 = st.columns([2, 2, 3])
+    with col1:
+        busca = st.text_input("🔍 Respawn", key="filtro_respawn", placeholder="Buscar respawn")
+    with col2:
+        jogador = st.text_input("👤 Jogador", key="filtro_jogador", placeholder="Nome do integrante")
+    with col3:
+        janela = None
+        if st.toggle("⏰ Filtrar por horário", key="filtro_horario_ativo"):
+            col_ini, col_fim = st.columns(2)
+            with col_ini:
+                inicio = st.time_input("De", value=time(18, 0), key="filtro_inicio")
+            with col_fim:
+                fim = st.time_input("Até", value=time(23, 0), key="filtro_fim")
+            if inicio != fim:
+                janela = normalizar_intervalo(inicio.hour * 60 + inicio.minute, fim.hour * 60 + fim.minute)
+    return {"busca": busca.strip() or None, "jogador": jogador.strip() or None, "janela": janela}
+
+
+def mostrar_editor_hunts(hunts, dia: date):
+    """Editor único de hunts para admin: edição inline e deleção em lote (respeita os filtros)."""
+    with st.expander("💀🔪✏️ Editar / Deletar Hunts ✏️🔪💀", expanded=False):
+        original = viz.gerar_tabela_edicao(hunts)
+        if original.empty:
+            st.info("💀📝 Nenhuma hunt encontrada. 📝💀")
+            return
+        if len(original) >= LIMITE_EDITOR:
+            st.caption(f"Mostrando as primeiras {LIMITE_EDITOR} hunts; use os filtros para achar as demais.")
+        
+        editado = st.data_editor(
+            original,
+            key="editor_hunts",
+            hide_index=True,
+            use_container_width=True,
+            num_rows="fixed",
+            disabled=["ID"],
+            column_config={
+                "Deletar": st.column_config.CheckboxColumn("🗑️", help="Marque para deletar"),
+                "Início": st.column_config.TextColumn(validate=r"^\d{1,2}:\d{2}$"),
+                "Fim": st.column_config.TextColumn(validate=r"^\d{1,2}:\d{2}$"),
+            },
+        )
+        
+        ids_deletar = editado.loc[editado["Deletar"], "ID"].astype(int).tolist()
+        # Linhas alteradas: compara tudo menos a coluna de seleção
+        colunas = viz.COLUNAS_EDICAO[1:]
+        mudou = ~(editado[colunas].fillna("") == original[colunas].fillna("")).all(axis=1)
+        alteradas = editado[mudou & ~editado["Deletar"]]
+        
+        col1, col2, col3 = st.columns([1, 1, 2])
+        with col1:
+            if st.button(f"💾 Salvar alterações ({len(alteradas)})", key="salvar_edicoes",
+                         type="primary", disabled=alteradas.empty, use_container_width=True):
+                alteracoes = [
+                    {
+                        "id": int(linha["ID"]),
+                        "respawn": (linha["Respawn"] or "").strip(),
+                        "horario_inicio": (linha["Início"] or "").strip(),
+                        "horario_fim": (linha["Fim"] or "").strip(),
+                        **{
+                            f"integrante{i}": (linha[f"Integrante {i}"] or "").strip() or None
+                            for i in range(1, 6)
+                        },
+                    }
+                    for linha in alteradas.to_dict("records")
+                ]
+                erros = validators.validar_edicoes(alteracoes, data=dia)
+                if erros:
+                    for hunt_id, mensagem in erros.items():
+                        st.error(f"💀⚠️ ID {hunt_id}: {mensagem} ⚠️💀")
+                else:
+                    total = database.update_hunts(alteracoes)
+                    st.success(f"💀🔥✅ {total} hunt(s) atualizada(s)! ✅🔥💀")
+                    st.rerun()
+        with col2:
+            if st.button(f"💀🗑️ Deletar ({len(ids_deletar)})", key="deletar_selecionadas",
+                         disabled=not ids_deletar, use_container_width=True):
+                total = database.delete_hunts(ids_deletar, st.session_state.get('dia_planilhado'))
+                st.success(f"💀🔥✅ {total} hunt(s) deletada(s)! ✅🔥💀")
+                st.rerun()
+        with col3:
+            st.caption("🔥⚠️ Deleções não podem ser desfeitas! ⚠️🔥")
+
+
+def mostrar_estatisticas():
+    """Painel de utilização para admin (lê apenas as tabelas de resumo)."""
+    with st.expander("💀📊 Estatísticas de Utilização 📊💀", expanded=False):
+        st.markdown("#### 🔥 Ocupação por respawn e hora (%) 🔥")
+        st.dataframe(
+            viz.gerar_quadro_saturacao(database.get_estatisticas_respawn_hora()),
+            use_container_width=True,
+            hide_index=True
+        )
+        
+        st.markdown("#### 💀 Jogadores que mais caçam 💀")
+        st.dataframe(
+            viz.gerar_quadro_jogadores(database.get_estatisticas_jogadores()),
+            use_container_width=True,
+            hide_index=True
+        )
+        
+        if st.button("🔄 Reconstruir estatísticas", key="rebuild_estatisticas"):
+            database.rebuild_estatisticas()
+            st.success("💀✅ Estatísticas reconstruídas a partir das hunts. ✅💀")
+            st.rerun()
+        st.caption("Use após cadastros feitos direto no banco (ex: editor do Supabase).")
+
+
+def mostrar_integridade():
+    """Varredura de integridade das hunts e requisições (overlaps, duplicatas, horários) para admin."""
+    with st.expander("💀🩺 Integridade do Banco 🩺💀", expanded=False):
+        st.caption("Procura double-bookings, duplicatas e horários malformados, inclusive de linhas cadastradas direto no banco.")
+        if st.button("🔍 Verificar", key="integridade_verificar"):
+            st.session_state['integridade_problemas'] = list(integridade.verificar())
+        
+        problemas = st.session_state.get('integridade_problemas')
+        if problemas is None:
+            return
+        if not problemas:
+            st.success("💀✅ Nenhum problema encontrado. ✅💀")
+            return
+        
+        resumo = integridade.resumir(problemas)
+        st.warning("💀⚠️ " + " · ".join(f"{tipo}: {n}" for tipo, n in resumo.items() if n) + " ⚠️💀")
+        for p in problemas[:LIMITE_PROBLEMAS_INTEGRIDADE]:
+            st.write(f"`{p.tipo}` · {p.tabela} {p.id} · **{p.respawn}** · {p.detalhe}")
+        if len(problemas) > LIMITE_PROBLEMAS_INTEGRIDADE:
+            st.caption(f"... e mais {len(problemas) - LIMITE_PROBLEMAS_INTEGRIDADE}. Lista completa: python integridade.py verificar --limite 0")
+        
+        remover_overlaps = st.checkbox(
+            "Resolver overlaps (remove a hunt mais nova do par; requisição em conflito vai para a espera)",
+            value=False, key="integridade_overlaps",
+        )
+        if st.button("🛠️ Corrigir", key="integridade_corrigir", type="primary"):
+            resultado = integridade.corrigir(problemas, remover_overlaps)
+            st.session_state.pop('integridade_problemas', None)
+            st.success(
+                f"💀✅ {resultado['horarios']} horário(s) corrigido(s), {resultado['hunts_removidas']} hunt(s) e "
+                f"{resultado['requisicoes_removidas']} requisição(ões) removida(s), "
+                f"{resultado['para_espera']} para a lista de espera. Verifique de novo. ✅💀"
+            )
+
+
+def mostrar_auditoria():
+    """Últimas mudanças da guilda (quem criou, aprovou, rejeitou ou removeu o quê) para admin."""
+    with st.expander("💀📜 Auditoria 📜💀", expanded=False):
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            respawn = st.selectbox("Respawn", ["Todos"] + database.get_respawns(), key="auditoria_respawn")
+        with col2:
+            st.write("")
+            carregar = st.button("🔍 Carregar", key="auditoria_carregar", use_container_width=True)
+        if carregar:
+            st.session_state['auditoria_eventos'] = database.get_auditoria(
+                respawn=None if respawn == "Todos" else respawn, limite=LIMITE_AUDITORIA
+            )
+        
+        eventos = st.session_state.get('auditoria_eventos')
+        if eventos is None:
+            return
+        if not eventos:
+            st.info("💀 Nenhuma mudança registrada. 💀")
+            return
+        st.dataframe(
+            [
+                {
+                    "Quando (UTC)": e.momento, "Ação": e.acao, "Autor": e.autor, "ID": e.registro_id,
+                    "Respawn": e.respawn, "Horário": f"{e.horario_inicio} às {e.horario_fim}" if e.horario_inicio else "",
+                    "Integrantes": e.integrantes or "", "Detalhe": e.detalhe or "",
+                }
+                for e in eventos
+            ],
+            use_container_width=True,
+            hide_index=True
+        )
+
+
+@st.cache_resource(show_spinner=False)
+def aquecimento_banco() -> database.Aquecimento:
+    """
+    Engine, configuração resolvida e init_db() uma vez por processo (não a cada rerun), rodando
+    numa thread desde a primeira sessão depois que o app acorda.
+    """
+    return database.Aquecimento()
+
+
+def _arquivo_primeira_vista() -> str:
+    tenant = re.sub(r"[^\w-]", "_", database.get_tenant())
+    return os.path.join(os.path.dirname(database.DB_PATH), f"primeira_vista_{tenant}.json")
+
+
+_primeira_vista_salva: dict = {}  # guilda -> último conteúdo gravado (evita regravar a cada rerun)
+
+
+def salvar_primeira_vista(total_respawns: int, resumo) -> None:
+    """Guarda em disco o resumo da 1ª página de hoje, para a tela inicial do próximo início a frio."""
+    conteudo = {"dia": date.today().isoformat(), "total": total_respawns, "resumo": [list(r) for r in resumo]}
+    tenant = database.get_tenant()
+    if _primeira_vista_salva.get(tenant) == conteudo:
+        return
     try:
-        database.init_db()
-        status = database.get_connection_status()
-    except Exception as e:
-        st.error(f"💀 Erro ao conectar no banco de dados: {str(e)}")
+        with open(_arquivo_primeira_vista(), "w", encoding="utf-8") as f:
+            json.dump(dict(conteudo, salvo_em=datetime.now().strftime("%H:%M")), f, ensure_ascii=False)
+        _primeira_vista_salva[tenant] = conteudo
+    except OSError:
+        pass
+
+
+def mostrar_primeira_vista() -> None:
+    """Tela enquanto o banco acorda: o último resumo salvo de hoje, sem consultar o banco."""
+    st.info("💀⏳ Acordando o banco de dados... ⏳💀")
+    try:
+        with open(_arquivo_primeira_vista(), encoding="utf-8") as f:
+            vista = json.load(f)
+    except (OSError, ValueError):
+        return
+    if vista.get("dia") != date.today().isoformat():
+        return
+    st.caption(f"💀 {vista['total']} respawn(s) · resumo salvo às {vista.get('salvo_em', '?')} 💀")
+    for respawn, quantidade in vista["resumo"]:
+        st.markdown(f"💀🔥 **{respawn}** 🔥💀 ({quantidade} hunt{'s' if quantidade > 1 else ''})")
+
+
+def mostrar_titulo(nome_guilda: str) -> None:
+    # Título com ícones malvadões
+    st.markdown(f"""
+    <div style='text-align: center; margin-bottom: 20px;'>
+        <h1 style='color: #FF4B4B; font-size: 2.5em; margin-bottom: 10px; white-space: nowrap;'>
+            💀💀💀 Planilhado de Hunts - {nome_guilda} 💀💀💀
+        </h1>
+    </div>
+    """, unsafe_allow_html=True)
+    st.markdown("---")
+
+
+def main():
+    # Banco acordando numa thread (uma vez por processo); a guilda vem só dos secrets/URL
+    aquecimento = aquecimento_banco()
+
+    # Guilda da sessão: todas as consultas daqui em diante ficam restritas a ela
+    tenants = obter_tenants()
+    database.usar_tenant(selecionar_tenant(tenants))
+    nome_guilda = tenants.get(database.get_tenant(), {}).get("nome", "Carreta Encore")
+
+    # Início a frio: desenha o último resumo salvo enquanto o banco termina de acordar
+    if not aquecimento.pronto.is_set():
+        espera = st.empty()
+        with espera.container():
+            mostrar_titulo(nome_guilda)
+            mostrar_primeira_vista()
+        aquecimento.esperar()
+        espera.empty()
+
+    # Sem resposta no prazo conta como erro de conexão; o aquecimento segue na thread e o
+    # próximo rerun espera por ele (só um que falhou é descartado)
+    erro = aquecimento.erro if aquecimento.pronto.is_set() else f"sem resposta em {database.TIMEOUT_POOL_SEGUNDOS} s"
+    if erro is not None:
+        if aquecimento.pronto.is_set():
+            aquecimento_banco.clear()  # tenta de novo no próximo rerun
+        st.error(f"💀 Erro ao conectar no banco de dados: {str(erro)}")
         st.info("Verifique se DATABASE_URL está configurada nos Secrets (Streamlit Cloud) ou use SQLite local.")
         st.stop()
+    status = aquecimento.status
+
+    iniciar_metricas()
 
     # Indicador de banco (confirma que a conexão foi executada)
     with st.sidebar:
         st.caption(f"🗄️ Banco: {status}")
+        dia = st.date_input("📅 Dia do planilhado", value=date.today(), key="dia_planilhado")
         if database.postgres_failed():
             st.warning(
                 "PostgreSQL falhou; usando SQLite (dados podem sumir quando o app dormir)."
@@ -273,18 +857,11 @@ def main():
                     st.code(err, language=None)
                 st.caption("Confira: senha no Secrets = senha do banco no Supabase; uso do pooler (porta 6543).")
 
-    # Título com ícones malvadões
-    st.markdown("""
-    <div style='text-align: center; margin-bottom: 20px;'>
-        <h1 style='color: #FF4B4B; font-size: 2.5em; margin-bottom: 10px; white-space: nowrap;'>
-            💀💀💀 Planilhado de Hunts - Carreta Encore 💀💀💀
-        </h1>
-    </div>
-    """, unsafe_allow_html=True)
-    st.markdown("---")
+    mostrar_titulo(nome_guilda)
     
     # Verificar autenticação
     autenticado = verificar_autenticacao()
+    auditoria.usar_autor("admin" if autenticado else "visitante")
     
     # Sidebar
     with st.sidebar:
@@ -388,6 +965,18 @@ def main():
             integrante4 = st.text_input("Integrante 4", key="int4")
             integrante5 = st.text_input("Integrante 5", key="int5")
             
+            # Recorrência semanal (modelo expandido sob demanda, sem gravar uma linha por dia)
+            recorrente = st.checkbox("🔁 Repetir toda semana", key="recorrente")
+            dias_recorrencia = []
+            if recorrente:
+                dias_recorrencia = st.multiselect(
+                    "Dias da semana",
+                    options=list(range(7)),
+                    default=list(range(7)),
+                    format_func=lambda d: DIAS_SEMANA[d],
+                    key="dias_recorrencia"
+                )
+            
             # Botão Salvar
             if st.button("🔥💀 Salvar Hunt 💀🔥", type="primary", use_container_width=True):
                 # Validar campos obrigatórios
@@ -407,9 +996,38 @@ def main():
                     st.error(f"💀⚠️ {mensagem_erro} ⚠️💀")
                     return
                 
+                if recorrente:
+                    if not dias_recorrencia:
+                        st.error("💀⚠️ Selecione pelo menos um dia da semana. ⚠️💀")
+                        return
+                    dias_semana = mascara_dias(dias_recorrencia)
+                    tem_overlap, mensagem_overlap = validators.verificar_overlap_recorrente(
+                        respawn.strip(), horario_inicio_str, horario_fim_str, dias_semana
+                    )
+                    if tem_overlap:
+                        st.error(f"💀🔥⚠️ {mensagem_overlap} ⚠️🔥💀")
+                        return
+                    try:
+                        database.insert_hunt_recorrente(
+                            respawn=respawn.strip(),
+                            horario_inicio=horario_inicio_str,
+                            horario_fim=horario_fim_str,
+                            dias_semana=dias_semana,
+                            integrante1=integrante1.strip() if integrante1 else None,
+                            integrante2=integrante2.strip() if integrante2 else None,
+                            integrante3=integrante3.strip() if integrante3 else None,
+                            integrante4=integrante4.strip() if integrante4 else None,
+                            integrante5=integrante5.strip() if integrante5 else None
+                        )
+                        st.success("💀🔥✅ Hunt recorrente salva com sucesso! ✅🔥💀")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"💀❌ Erro ao salvar: {str(e)} ❌💀")
+                    return
+                
                 # Verificar overlaps
                 tem_overlap, mensagem_overlap = validators.verificar_overlap(
-                    respawn.strip(), horario_inicio_str, horario_fim_str
+                    respawn.strip(), horario_inicio_str, horario_fim_str, data=dia
                 )
                 if tem_overlap:
                     st.error(f"💀🔥⚠️ {mensagem_overlap} ⚠️🔥💀")
@@ -440,6 +1058,12 @@ def main():
     # Se autenticado, mostrar tela de aprovação de requisições
     if autenticado:
         mostrar_aprovacao_requisicoes()
+        mostrar_lista_espera()
+        mostrar_hunts_recorrentes(dia)
+        mostrar_importacao()
+        mostrar_estatisticas()
+        mostrar_integridade()
+        mostrar_auditoria()
     
     # Área principal - Visualização
     st.markdown("""
@@ -448,71 +1072,60 @@ def main():
     </div>
     """, unsafe_allow_html=True)
     
-    # Buscar todas as hunts
-    todas_hunts = database.get_all_hunts()
+    mostrar_busca_horario_livre(dia)
     
-    if not todas_hunts:
-        st.info("💀📝 Nenhuma hunt cadastrada ainda. Use o formulário na barra lateral para adicionar uma nova hunt. 📝💀")
-    else:
-        # Agrupar por respawn
-        hunts_por_respawn = viz.agrupar_hunts_por_respawn(todas_hunts)
-        
-        # Ordenar respawns alfabeticamente
-        respawns_ordenados = sorted(hunts_por_respawn.keys())
-        
-        # Exibir quadro para cada respawn
-        for respawn in respawns_ordenados:
-            hunts = hunts_por_respawn[respawn]
-            df = viz.gerar_quadro_respawn(respawn, hunts)
-            
-            # Usar expander para cada respawn
-            with st.expander(f"💀🔥 **{respawn}** 🔥💀 ({len(hunts)} hunt{'s' if len(hunts) > 1 else ''})", expanded=True):
-                st.dataframe(
-                    df,
-                    use_container_width=True,
-                    hide_index=True
-                )
-                
-                # Se autenticado, mostrar opções de deletar
-                if autenticado:
-                    st.markdown("---")
-                    st.markdown("### 🔪🗑️ Deletar Hunts 🗑️🔪")
-                    
-                    # Criar um selectbox com as hunts para deletar
-                    opcoes_hunts = []
-                    for hunt in hunts:
-                        # hunt = (id, respawn, horario_inicio, horario_fim, integrante1, ..., integrante5, data_cadastro)
-                        hunt_id = hunt[0]
-                        horario_inicio = hunt[2]
-                        horario_fim = hunt[3]
-                        integrantes = []
-                        for i in range(4, 9):
-                            if hunt[i] and hunt[i].strip():
-                                integrantes.append(hunt[i].strip())
-                        integrantes_str = ", ".join(integrantes) if integrantes else "Sem integrantes"
-                        label = f"ID {hunt_id}: {horario_inicio} - {horario_fim} ({integrantes_str})"
-                        opcoes_hunts.append((hunt_id, label))
-                    
-                    if opcoes_hunts:
-                        hunt_selecionada = st.selectbox(
-                            "Selecione a hunt para deletar:",
-                            options=opcoes_hunts,
-                            format_func=lambda x: x[1],
-                            key=f"delete_select_{respawn}"
-                        )
-                        
-                        col1, col2 = st.columns([1, 4])
-                        with col1:
-                            if st.button("💀🗑️ Deletar 🗑️💀", type="secondary", key=f"delete_btn_{respawn}"):
-                                hunt_id_para_deletar = hunt_selecionada[0]
-                                if database.delete_hunt(hunt_id_para_deletar):
-                                    st.success(f"💀🔥✅ Hunt ID {hunt_id_para_deletar} deletada com sucesso! ✅🔥💀")
-                                    st.rerun()
-                                else:
-                                    st.error(f"💀❌ Erro ao deletar hunt ID {hunt_id_para_deletar} ❌💀")
-                        with col2:
-                            st.caption("🔥⚠️ Esta ação não pode ser desfeita! ⚠️🔥")
-
+    # Filtros e paginação: a página lista só um bloco de respawns; cada seção carrega ao abrir
+    filtros = mostrar_filtros()
+    
+    if autenticado:
+        mostrar_editor_hunts(database.buscar_hunts(limite=LIMITE_EDITOR, **filtros), dia)
+    
+    total_respawns = database.contar_respawns(dia, **filtros)
+    if total_respawns == 0:
+        if any(filtros.values()):
+            st.info("💀🔍 Nenhum respawn encontrado com esses filtros. 🔍💀")
+        else:
+            st.info("💀📝 Nenhuma hunt cadastrada ainda. Use o formulário na barra lateral para adicionar uma nova hunt. 📝💀")
+        return
+    
+    modo = st.radio(
+        "Visualização", ["📋 Tabelas", "📊 Linha do tempo"], horizontal=True, key="modo_visualizacao"
+    )
+    if modo == "📊 Linha do tempo":
+        metricas.CONSULTAS_CACHE.inc(cache="linha_do_tempo")
+        st.vega_lite_chart(
+            linha_do_tempo_spec(database.get_tenant(), database.get_versao_planilhado(), dia, **filtros),
+            use_container_width=True
+        )
+        return
+    
+    paginas = -(-total_respawns // RESPAWNS_POR_PAGINA)
+    if st.session_state.get('pagina', 1) > paginas:
+        st.session_state['pagina'] = paginas
+    pagina = 1
+    if paginas > 1:
+        pagina = st.number_input(
+            f"Página (de {paginas})", min_value=1, max_value=paginas, step=1, key="pagina"
+        )
+    st.caption(f"💀 {total_respawns} respawn(s) · abra uma seção para carregar as hunts 💀")
+    
+    resumo = database.get_resumo_respawns(
+        dia, RESPAWNS_POR_PAGINA, (pagina - 1) * RESPAWNS_POR_PAGINA, **filtros
+    )
+    if pagina == 1 and dia == date.today() and not any(filtros.values()):
+        salvar_primeira_vista(total_respawns, resumo)
+    for respawn, quantidade in resumo:
+        aberto = st.toggle(
+            f"💀🔥 **{respawn}** 🔥💀 ({quantidade} hunt{'s' if quantidade > 1 else ''})",
+            key=f"abrir_{respawn}"
+        )
+        if aberto:
+            hunts = database.buscar_hunts(dia=dia, respawn=respawn, **filtros)
+            st.dataframe(
+                viz.gerar_quadro_respawn(respawn, hunts),
+                use_container_width=True,
+                hide_index=True
+            )
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,141 @@
+"""
+Log de auditoria das mudanças no planilhado (quem aprovou, rejeitou ou removeu o quê), gravado
+fora do caminho da requisição.
+
+As funções de escrita de database.py chamam registrar() depois do commit: o evento só entra numa
+fila em memória, sem ir ao banco. Uma thread daemon junta os eventos e grava no audit_log em lote,
+um INSERT com várias linhas por vez (database.gravar_auditoria). A fila é limitada a CAPACIDADE:
+se lotar (banco fora do ar, por exemplo), o evento novo é descartado e contado em
+planilhado_auditoria_descartados_total em vez de segurar a escrita do usuário. Na saída do
+processo (atexit) a fila é esvaziada. Consultas: database.get_auditoria().
+
+O autor vem de usar_autor(), chamado pelo app a cada execução (como database.usar_tenant).
+"""
+import atexit
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from queue import Empty, Full, Queue
+from typing import Iterable, List, NamedTuple, Optional
+
+import metricas
+
+CAPACIDADE = 10_000
+LOTE = 200  # linhas por INSERT
+INTERVALO_SEGUNDOS = 1.0  # quanto o gravador espera para juntar eventos antes de gravar
+TENTATIVAS = 3
+AUTOR_PADRAO = "sistema"
+
+_autor_atual: ContextVar[str] = ContextVar("autor_atual", default=AUTOR_PADRAO)
+_fila: "Queue" = Queue(maxsize=CAPACIDADE)
+_lock = threading.Lock()
+_gravador: Optional[threading.Thread] = None
+
+EVENTOS_GRAVADOS = metricas.contador("planilhado_auditoria_eventos_total", "Eventos de auditoria gravados no banco.")
+EVENTOS_DESCARTADOS = metricas.contador(
+    "planilhado_auditoria_descartados_total", "Eventos de auditoria perdidos (fila cheia ou banco falhando)."
+)
+metricas.medidor("planilhado_auditoria_fila", "Eventos de auditoria esperando gravação.", _fila.qsize)
+
+
+class Evento(NamedTuple):
+    """Uma mudança, com o momento (UTC) em que aconteceu, não o da gravação."""
+    momento: str
+    tenant: str
+    acao: str
+    autor: str
+    registro_id: Optional[int]
+    respawn: Optional[str]
+    horario_inicio: Optional[str]
+    horario_fim: Optional[str]
+    integrantes: Optional[str]
+    detalhe: Optional[str]
+
+
+def usar_autor(autor: str) -> None:
+    """Define quem faz as mudanças do contexto atual (sessão do Streamlit, CLI)."""
+    _autor_atual.set(autor)
+
+
+def get_autor() -> str:
+    return _autor_atual.get()
+
+
+def registrar(acao: str, tenant: str, registro_id: Optional[int] = None, respawn: Optional[str] = None,
+              horario_inicio: Optional[str] = None, horario_fim: Optional[str] = None,
+              integrantes: Iterable[Optional[str]] = (), detalhe: Optional[str] = None) -> None:
+    """Enfileira um evento sem bloquear; com a fila cheia, ele é descartado (e contado)."""
+    nomes = ", ".join(n.strip() for n in integrantes if n and n.strip())
+    evento = Evento(
+        datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"), tenant, acao, get_autor(),
+        registro_id, respawn, horario_inicio, horario_fim, nomes or None, detalhe,
+    )
+    _iniciar()
+    try:
+        _fila.put_nowait(evento)
+    except Full:
+        EVENTOS_DESCARTADOS.inc(motivo="fila_cheia")
+
+
+def descarregar(timeout: float = 5.0) -> bool:
+    """
+    Espera o gravador gravar tudo o que foi enfileirado até agora. Retorna False se não deu
+    tempo (ou a fila está cheia demais até para o pedido de descarga).
+    """
+    if _gravador is None:
+        return True
+    feito = threading.Event()
+    try:
+        _fila.put(feito, timeout=timeout)
+    except Full:
+        return False
+    return feito.wait(timeout)
+
+
+def _iniciar() -> None:
+    """Sobe o gravador (uma vez por processo) e registra a descarga na saída."""
+    global _gravador
+    if _gravador is not None:
+        return
+    with _lock:
+        if _gravador is None:
+            _gravador = threading.Thread(target=_gravar_continuamente, name="auditoria", daemon=True)
+            _gravador.start()
+            atexit.register(descarregar)
+
+
+def _gravar(eventos: List[Evento]) -> None:
+    import database  # database importa este módulo
+
+    for i in range(0, len(eventos), LOTE):
+        lote = eventos[i:i + LOTE]
+        for tentativa in range(1, TENTATIVAS + 1):
+            try:
+                database.gravar_auditoria(lote)
+            except Exception:
+                if tentativa == TENTATIVAS:
+                    EVENTOS_DESCARTADOS.inc(len(lote), motivo="erro_banco")
+                else:
+                    time.sleep(INTERVALO_SEGUNDOS * tentativa)
+            else:
+                EVENTOS_GRAVADOS.inc(len(lote))
+                break
+
+
+def _gravar_continuamente() -> None:
+    while True:
+        item = _fila.get()
+        if not isinstance(item, threading.Event):
+            time.sleep(INTERVALO_SEGUNDOS)  # junta o que chegar nesse meio tempo num lote só
+        eventos, descargas = [], []
+        while True:
+            (descargas if isinstance(item, threading.Event) else eventos).append(item)
+            try:
+                item = _fila.get_nowait()
+            except Empty:
+                break
+        if eventos:
+            _gravar(eventos)
+        for feito in descargas:
+            feito.set()
@@ -0,0 +1,266 @@
+"""
+Backup e restauração das tabelas do planilhado, em streaming (memória constante).
+
+    python backup.py exportar pasta_backup [--guilda minha] [--formato jsonl|csv]
+    python backup.py restaurar pasta_backup [--guilda minha] [--substituir] [--lote 1000]
+    python backup.py planilhado planilhado.csv [--guilda minha] [--dia 2026-10-19]
+
+Cada tabela vira um arquivo comprimido (hunts.jsonl.gz, requisicoes.csv.gz, ...). A exportação
+lê com cursor do lado do servidor (stream_results / yield_per); a restauração grava em lotes com
+executemany, ou COPY no PostgreSQL. Serve para migrar entre SQLite e Supabase (ex: recuperar o que
+foi gravado no SQLite de fallback quando o PostgreSQL estava fora).
+
+Exportação e restauração valem para uma guilda (--guilda): restaurar com --substituir apaga só as
+linhas dessa guilda, e linhas de outras guildas presentes no arquivo são ignoradas.
+
+`planilhado` grava as hunts de uma guilda num CSV legível, com as colunas da importação de
+planilha, respawn a respawn conforme chegam do banco (database.iterar_hunts_por_respawn).
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+from datetime import date
+from itertools import islice
+from typing import Callable, Iterator, List, Optional
+
+from sqlalchemy import inspect, text
+
+import database
+from importacao import COLUNAS
+from modelos import colunas_integrantes
+
+# Tabelas com dados próprios; estatísticas são derivadas (rebuild_estatisticas após restaurar)
+TABELAS = ("hunts", "requisicoes", "hunts_recorrentes", "hunts_recorrentes_excecoes", "lista_espera", "audit_log")
+TABELAS_COM_SEQUENCE = ("hunts", "requisicoes", "hunts_recorrentes", "lista_espera", "audit_log")
+LOTE_PADRAO = 1000
+
+# Condição das linhas de uma guilda em cada tabela; as exceções não têm tenant_id e seguem a recorrente
+_FILTRO_GUILDA = {tabela: "tenant_id = :tenant" for tabela in TABELAS}
+_FILTRO_GUILDA["hunts_recorrentes_excecoes"] = (
+    "recorrente_id IN (SELECT id FROM hunts_recorrentes WHERE tenant_id = :tenant)"
+)
+
+
+def _caminho(pasta: str, tabela: str, formato: str) -> str:
+    return os.path.join(pasta, f"{tabela}.{formato}.gz")
+
+
+def _valor_serializavel(valor):
+    """datetime/date viram string ISO; o resto já é compatível com JSON/CSV."""
+    if valor is None or isinstance(valor, (int, float, str)):
+        return valor
+    return str(valor)
+
+
+def exportar_tabela(conn, tabela: str, caminho: str, formato: str, lote: int = LOTE_PADRAO) -> int:
+    """Grava as linhas da guilda atual de `tabela` em `caminho`. Retorna a quantidade exportada."""
+    colunas = [c["name"] for c in inspect(conn).get_columns(tabela)]
+    resultado = conn.execution_options(stream_results=True, yield_per=lote).execute(
+        text(f"SELECT {', '.join(colunas)} FROM {tabela} WHERE {_FILTRO_GUILDA[tabela]} ORDER BY {colunas[0]}"),
+        {"tenant": database.get_tenant()},
+    )
+    total = 0
+    with gzip.open(caminho, "wt", encoding="utf-8", newline="") as f:
+        if formato == "csv":
+            escritor = csv.writer(f)
+            escritor.writerow(colunas)
+            for row in resultado:
+                escritor.writerow(["" if v is None else _valor_serializavel(v) for v in row])
+                total += 1
+        else:
+            f.write(json.dumps({"colunas": colunas}, ensure_ascii=False) + "\n")
+            for row in resultado:
+                f.write(json.dumps([_valor_serializavel(v) for v in row], ensure_ascii=False) + "\n")
+                total += 1
+    return total
+
+
+def exportar(pasta: str, formato: str = "jsonl") -> dict:
+    """Exporta as TABELAS da guilda atual para `pasta`. Retorna {tabela: linhas}."""
+    os.makedirs(pasta, exist_ok=True)
+    engine = database.get_engine()
+    totais = {}
+    with engine.connect() as conn:
+        existentes = set(inspect(conn).get_table_names())
+        for tabela in TABELAS:
+            if tabela in existentes:
+                totais[tabela] = exportar_tabela(conn, tabela, _caminho(pasta, tabela, formato), formato)
+    return totais
+
+
+def _ler_arquivo(caminho: str, formato: str):
+    """Retorna (colunas, iterador de linhas) lendo o arquivo de forma incremental."""
+    f = gzip.open(caminho, "rt", encoding="utf-8", newline="")
+    if formato == "csv":
+        leitor = csv.reader(f)
+        colunas = next(leitor)
+
+        def linhas() -> Iterator[list]:
+            with f:
+                for row in leitor:
+                    yield [None if v == "" else v for v in row]
+    else:
+        colunas = json.loads(f.readline())["colunas"]
+
+        def linhas() -> Iterator[list]:
+            with f:
+                for linha in f:
+                    if linha.strip():
+                        yield json.loads(linha)
+    return colunas, linhas()
+
+
+def _lotes(linhas: Iterator[list], tamanho: int) -> Iterator[List[list]]:
+    while True:
+        lote = list(islice(linhas, tamanho))
+        if not lote:
+            return
+        yield lote
+
+
+def _copy_postgres(conn, tabela: str, colunas: List[str], lote: List[list]) -> None:
+    """Envia um lote via COPY ... FROM STDIN (CSV), usando o cursor psycopg2 da conexão."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    for row in lote:
+        escritor.writerow(["\\N" if v is None else v for v in row])
+    buffer.seek(0)
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {tabela} ({', '.join(colunas)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer
+        )
+    finally:
+        cursor.close()
+
+
+def _da_guilda(conn, tabela: str, colunas_arquivo: List[str], tenant: str) -> Callable[[list], bool]:
+    """
+    Predicado das linhas do arquivo que pertencem a `tenant` (backups antigos trazem todas as
+    guildas). Sem a coluna tenant_id, a linha é da guilda padrão, como no banco.
+    """
+    if tabela == "hunts_recorrentes_excecoes":
+        ids = {row[0] for row in conn.execute(
+            text("SELECT id FROM hunts_recorrentes WHERE tenant_id = :tenant"), {"tenant": tenant}
+        )}
+        i = colunas_arquivo.index("recorrente_id")
+        return lambda row: int(row[i]) in ids
+    if "tenant_id" not in colunas_arquivo:
+        return lambda row: tenant == database.TENANT_PADRAO
+    i = colunas_arquivo.index("tenant_id")
+    return lambda row: (row[i] or database.TENANT_PADRAO) == tenant
+
+
+def restaurar_tabela(conn, tabela: str, caminho: str, formato: str, lote: int = LOTE_PADRAO) -> int:
+    """Insere em `tabela`, em lotes, as linhas do arquivo da guilda atual. Retorna a quantidade."""
+    colunas_arquivo, linhas = _ler_arquivo(caminho, formato)
+    manter = _da_guilda(conn, tabela, colunas_arquivo, database.get_tenant())
+    linhas = (row for row in linhas if manter(row))
+    colunas_tabela = {c["name"] for c in inspect(conn).get_columns(tabela)}
+    # Colunas do backup que não existem mais na tabela são descartadas
+    indices = [i for i, c in enumerate(colunas_arquivo) if c in colunas_tabela]
+    colunas = [colunas_arquivo[i] for i in indices]
+    is_pg = conn.dialect.name == "postgresql"
+    insert = text(
+        f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join(':' + c for c in colunas)})"
+    )
+    total = 0
+    for bloco in _lotes(linhas, lote):
+        bloco = [[row[i] for i in indices] for row in bloco]
+        if is_pg:
+            _copy_postgres(conn, tabela, colunas, bloco)
+        else:
+            conn.execute(insert, [dict(zip(colunas, row)) for row in bloco])
+        total += len(bloco)
+    return total
+
+
+def restaurar(pasta: str, substituir: bool = False, lote: int = LOTE_PADRAO) -> dict:
+    """
+    Restaura os arquivos de `pasta` na guilda atual, numa única transação. Com substituir=True
+    apaga antes as linhas da guilda (as das outras ficam intactas). Ressincroniza as sequences e
+    reconstrói estatísticas e bitmaps ao final.
+    """
+    database.init_db()
+    engine = database.get_engine()
+    totais = {}
+    arquivos = {}
+    for tabela in TABELAS:
+        formato = next(
+            (f for f in ("jsonl", "csv") if os.path.exists(_caminho(pasta, tabela, f))), None
+        )
+        if formato is not None:
+            arquivos[tabela] = formato
+    with engine.connect() as conn:
+        if substituir:
+            # Em ordem inversa: o filtro das exceções consulta hunts_recorrentes
+            for tabela in reversed(TABELAS):
+                if tabela in arquivos:
+                    conn.execute(
+                        text(f"DELETE FROM {tabela} WHERE {_FILTRO_GUILDA[tabela]}"),
+                        {"tenant": database.get_tenant()},
+                    )
+        for tabela, formato in arquivos.items():
+            totais[tabela] = restaurar_tabela(conn, tabela, _caminho(pasta, tabela, formato), formato, lote)
+        database.sincronizar_sequencias(conn, TABELAS_COM_SEQUENCE)
+        conn.commit()
+    database.rebuild_estatisticas()
+    database.invalidar_ocupacao()
+    return totais
+
+
+def exportar_planilhado(caminho: str, dia: Optional[date] = None) -> int:
+    """
+    Grava as hunts da guilda atual em `caminho` (CSV com as colunas aceitas pela importação), um
+    respawn por vez. Com `dia`, inclui as ocorrências das hunts recorrentes daquele dia. Retorna
+    a quantidade de linhas.
+    """
+    total = 0
+    with open(caminho, "w", encoding="utf-8", newline="") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(COLUNAS)
+        for _, hunts in database.iterar_hunts_por_respawn(dia=dia):
+            for h in hunts:
+                escritor.writerow([h.respawn, h.horario_inicio, h.horario_fim,
+                                   *colunas_integrantes(h.integrantes).values()])
+            total += len(hunts)
+    return total
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Backup/restauração do planilhado (SQLite ou PostgreSQL).")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p_exp = sub.add_parser("exportar", help="Grava as tabelas em arquivos .gz")
+    p_exp.add_argument("pasta")
+    p_exp.add_argument("--guilda", default=database.TENANT_PADRAO, help="Guilda (tenant) a exportar")
+    p_exp.add_argument("--formato", choices=["jsonl", "csv"], default="jsonl")
+    p_res = sub.add_parser("restaurar", help="Carrega os arquivos .gz no banco configurado")
+    p_res.add_argument("pasta")
+    p_res.add_argument("--guilda", default=database.TENANT_PADRAO, help="Guilda (tenant) a restaurar")
+    p_res.add_argument("--substituir", action="store_true", help="Apaga antes as linhas atuais da guilda")
+    p_res.add_argument("--lote", type=int, default=LOTE_PADRAO, help="Linhas por lote de escrita")
+    p_pla = sub.add_parser("planilhado", help="Grava as hunts de uma guilda num CSV legível")
+    p_pla.add_argument("arquivo")
+    p_pla.add_argument("--guilda", default=database.TENANT_PADRAO, help="Guilda (tenant) a exportar")
+    p_pla.add_argument("--dia", type=date.fromisoformat, help="Inclui as hunts recorrentes desse dia (AAAA-MM-DD)")
+    args = parser.parse_args(argv)
+
+    print(f"Banco: {database.get_connection_status()}")
+    database.usar_tenant(args.guilda)
+    if args.comando == "planilhado":
+        print(f"  {args.arquivo}: {exportar_planilhado(args.arquivo, args.dia)} hunt(s)")
+        return 0
+    if args.comando == "exportar":
+        totais = exportar(args.pasta, args.formato)
+    else:
+        totais = restaurar(args.pasta, args.substituir, args.lote)
+    for tabela, total in totais.items():
+        print(f"  {tabela}: {total} linha(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,22 +4,76 @@ Aceita:
   - DATABASE_URL (string única) nos secrets ou variável de ambiente
   - [connections.postgresql] no formato nativo do Streamlit (host, port, database, username, password, sslmode)
 """
+import hashlib
 import os
 import re
-from typing import List, Optional, Tuple
+import threading
+import time
+from contextvars import ContextVar
+from datetime import date, timedelta
+from inspect import isgeneratorfunction
+from itertools import groupby
+from types import FunctionType
+from typing import Dict, Iterator, List, Optional, Tuple
 from urllib.parse import quote_plus, unquote
 
-from sqlalchemy import create_engine, text
+import numpy as np
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import IntegrityError
+
+import auditoria
+import metricas
+from intervalos import (
+    DIAS_SEMANA,
+    MINUTOS_DIA,
+    dias_da_mascara,
+    dividir_intervalo,
+    intervalo_em_minutos,
+    minutos_para_horario,
+    minutos_por_hora,
+)
+from modelos import (
+    SELECT_AUDITORIA,
+    SELECT_ESPERA,
+    SELECT_HUNT,
+    SELECT_RECORRENTE,
+    SELECT_REQUISICAO,
+    EventoAuditoria,
+    Hunt,
+    HuntRecorrente,
+    Requisicao,
+    chave_horario,
+    evento_de_linha,
+    hunt_de_linha,
+    recorrente_de_linha,
+    requisicao_de_linha,
+)
 
 # Caminho local do SQLite
 DB_PATH = os.path.join("data", "planilhado.db")
 SQLITE_URL = f"sqlite:///{DB_PATH}"
 
+# Guilda (tenant) padrão: bancos anteriores à multi-guilda ficam todos nela
+TENANT_PADRAO = "padrao"
+_TIPO_TENANT = f"VARCHAR(64) NOT NULL DEFAULT '{TENANT_PADRAO}'"
+_COLUNA_TENANT = f"tenant_id {_TIPO_TENANT}"
+
+# Espera máxima por uma conexão do pool; também o quanto o app espera o aquecimento do banco
+TIMEOUT_POOL_SEGUNDOS = 30
+
 _engine = None
+_engine_lock = threading.Lock()
+_tenant_atual: ContextVar[str] = ContextVar("tenant_atual", default=TENANT_PADRAO)
+_versao_planilhado = 0  # Incrementada em invalidações globais (ex: restauração de backup)
+_versoes_tenant: Dict[str, int] = {}  # Incrementada a cada escrita da guilda; chave de cache das visualizações
 _postgres_failed = False  # True quando PostgreSQL falhou e usamos SQLite
 _postgres_error_message = ""  # Mensagem do último erro (para exibir ao usuário)
 
 
+class RequisicaoDuplicadaError(Exception):
+    """Já existe uma requisição pendente com o mesmo conteúdo (respawn, horário e integrantes)."""
+
+
 def _normalize_postgres_url(url: str) -> str:
     """
     Corrige a URL do PostgreSQL quando a senha tem caracteres especiais (#, !, ^, etc).
@@ -126,40 +180,113 @@ def _get_database_url() -> Optional[str]:
 
 def get_engine():
     """Retorna o engine SQLAlchemy (SQLite ou PostgreSQL). Se PostgreSQL falhar, usa SQLite."""
-    global _engine, _postgres_failed, _postgres_error_message
+    global _engine
     if _engine is not None:
         return _engine
+    # O aquecimento cria o engine numa thread enquanto o app desenha; só um cria, e só publica
+    # em _engine depois do teste de conexão
+    with _engine_lock:
+        if _engine is None:
+            engine = _criar_engine()
+            metricas.instrumentar_engine(engine)
+            _engine = engine
+    return _engine
 
+
+def _criar_engine():
+    global _postgres_failed, _postgres_error_message
     url = _get_database_url()
     if url and (url.startswith("postgresql://") or url.startswith("postgres://")):
         url = _normalize_postgres_url(url)  # codifica senha com #, !, ^ etc.
 
     if url and (url.startswith("postgresql://") or url.startswith("postgres://")):
         try:
-            _engine = create_engine(
+            engine = create_engine(
                 url,
                 pool_pre_ping=True,
                 pool_size=1,
                 max_overflow=0,
+                pool_timeout=TIMEOUT_POOL_SEGUNDOS,
                 connect_args={"sslmode": "require"} if "sslmode" not in url else {},
             )
-            with _engine.connect() as test_conn:
+            with engine.connect() as test_conn:
                 test_conn.execute(text("SELECT 1"))
             _postgres_failed = False
             _postgres_error_message = ""
+            return engine
         except Exception as e:
             _postgres_error_message = str(e).strip() or type(e).__name__
-            _engine = None
             _postgres_failed = True
             os.makedirs("data", exist_ok=True)
-            _engine = create_engine(SQLITE_URL, connect_args={"check_same_thread": False})
+            return create_engine(SQLITE_URL, connect_args={"check_same_thread": False})
+    os.makedirs("data", exist_ok=True)
+    _postgres_failed = False
+    _postgres_error_message = ""
+    return create_engine(SQLITE_URL, connect_args={"check_same_thread": False})
+
+
+class Aquecimento:
+    """
+    Acorda o banco numa thread: resolve a configuração, cria o engine (com o teste de conexão do
+    PostgreSQL) e roda init_db(). `pronto` é sinalizado ao fim, com `status` preenchido ou `erro`.
+    O app guarda um por processo e desenha a primeira tela enquanto ele roda.
+    """
+
+    def __init__(self):
+        self.pronto = threading.Event()
+        self.status = ""
+        self.erro: Optional[Exception] = None
+        self.segundos = 0.0
+        threading.Thread(target=self._rodar, name="aquecimento-banco", daemon=True).start()
+
+    def esperar(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera o aquecimento terminar por até `timeout` segundos (padrão: TIMEOUT_POOL_SEGUNDOS).
+        Retorna False se ele ainda estiver rodando.
+        """
+        return self.pronto.wait(TIMEOUT_POOL_SEGUNDOS if timeout is None else timeout)
+
+    def _rodar(self) -> None:
+        inicio = time.perf_counter()
+        try:
+            init_db()
+            self.status = get_connection_status()
+        except Exception as e:
+            self.erro = e
+        finally:
+            self.segundos = time.perf_counter() - inicio
+            self.pronto.set()
+
+
+def usar_tenant(tenant: str) -> None:
+    """
+    Define a guilda das próximas consultas neste contexto (no app, no início de cada execução do
+    script). Todas as funções deste módulo leem e escrevem apenas as linhas dessa guilda.
+    """
+    _tenant_atual.set(tenant or TENANT_PADRAO)
+
+
+def get_tenant() -> str:
+    """Guilda em uso neste contexto."""
+    return _tenant_atual.get()
+
+
+def _nova_versao(todas: bool = False) -> None:
+    """Marca que o planilhado da guilda atual (ou de todas) mudou, invalidando os caches de visualização."""
+    global _versao_planilhado
+    if todas:
+        _versao_planilhado += 1
     else:
-        os.makedirs("data", exist_ok=True)
-        _engine = create_engine(SQLITE_URL, connect_args={"check_same_thread": False})
-        _postgres_failed = False
-        _postgres_error_message = ""
+        tenant = get_tenant()
+        _versoes_tenant[tenant] = _versoes_tenant.get(tenant, 0) + 1
 
-    return _engine
+
+def get_versao_planilhado() -> int:
+    """
+    Versão do planilhado da guilda atual neste processo; muda a cada insert/update/delete feito
+    pelo app nessa guilda, sem ser afetada pelas escritas das outras.
+    """
+    return _versao_planilhado + _versoes_tenant.get(get_tenant(), 0)
 
 
 def get_connection_status() -> str:
@@ -194,9 +321,10 @@ def init_db():
 
     with engine.connect() as conn:
         if is_postgres:
-            conn.execute(text("""
+            conn.execute(text(f"""
                 CREATE TABLE IF NOT EXISTS hunts (
                     id SERIAL PRIMARY KEY,
+                    {_COLUNA_TENANT},
                     respawn VARCHAR(255) NOT NULL,
                     horario_inicio VARCHAR(10) NOT NULL,
                     horario_fim VARCHAR(10) NOT NULL,
@@ -205,12 +333,15 @@ def init_db():
                     integrante3 VARCHAR(255),
                     integrante4 VARCHAR(255),
                     integrante5 VARCHAR(255),
-                    data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    minuto_inicio INTEGER,
+                    minuto_fim INTEGER
                 )
             """))
-            conn.execute(text("""
+            conn.execute(text(f"""
                 CREATE TABLE IF NOT EXISTS requisicoes (
                     id SERIAL PRIMARY KEY,
+                    {_COLUNA_TENANT},
                     respawn VARCHAR(255) NOT NULL,
                     horario_inicio VARCHAR(10) NOT NULL,
                     horario_fim VARCHAR(10) NOT NULL,
@@ -219,20 +350,19 @@ def init_db():
                     integrante3 VARCHAR(255),
                     integrante4 VARCHAR(255),
                     integrante5 VARCHAR(255),
-                    data_requisicao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    data_requisicao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    minuto_inicio INTEGER,
+                    minuto_fim INTEGER,
+                    hash_conteudo VARCHAR(64)
                 )
             """))
             # Sincroniza a sequence com o maior id existente (evita erro ao inserir após cadastros manuais)
-            conn.execute(text("""
-                SELECT setval(pg_get_serial_sequence('hunts', 'id'), COALESCE((SELECT MAX(id) FROM hunts), 1))
-            """))
-            conn.execute(text("""
-                SELECT setval(pg_get_serial_sequence('requisicoes', 'id'), COALESCE((SELECT MAX(id) FROM requisicoes), 1))
-            """))
+            sincronizar_sequencias(conn, ("hunts", "requisicoes"))
         else:
-            conn.execute(text("""
+            conn.execute(text(f"""
                 CREATE TABLE IF NOT EXISTS hunts (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    {_COLUNA_TENANT},
                     respawn TEXT NOT NULL,
                     horario_inicio TEXT NOT NULL,
                     horario_fim TEXT NOT NULL,
@@ -241,12 +371,15 @@ def init_db():
                     integrante3 TEXT,
                     integrante4 TEXT,
                     integrante5 TEXT,
-                    data_cadastro TEXT DEFAULT CURRENT_TIMESTAMP
+                    data_cadastro TEXT DEFAULT CURRENT_TIMESTAMP,
+                    minuto_inicio INTEGER,
+                    minuto_fim INTEGER
                 )
             """))
-            conn.execute(text("""
+            conn.execute(text(f"""
                 CREATE TABLE IF NOT EXISTS requisicoes (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    {_COLUNA_TENANT},
                     respawn TEXT NOT NULL,
                     horario_inicio TEXT NOT NULL,
                     horario_fim TEXT NOT NULL,
@@ -255,12 +388,131 @@ def init_db():
                     integrante3 TEXT,
                     integrante4 TEXT,
                     integrante5 TEXT,
-                    data_requisicao TEXT DEFAULT CURRENT_TIMESTAMP
+                    data_requisicao TEXT DEFAULT CURRENT_TIMESTAMP,
+                    minuto_inicio INTEGER,
+                    minuto_fim INTEGER,
+                    hash_conteudo VARCHAR(64)
                 )
             """))
+        for tabela in ("hunts", "requisicoes"):
+            _adicionar_coluna_se_faltar(conn, tabela, "tenant_id", _TIPO_TENANT)
+        _migrar_minutos(conn)
+        _migrar_hash_requisicoes(conn)
+        _criar_indices_integrantes(conn)
+        _criar_tabelas_estatisticas(conn)
+        _criar_tabelas_recorrentes(conn, is_postgres)
+        _criar_tabela_espera(conn, is_postgres)
+        _criar_tabela_auditoria(conn, is_postgres)
         conn.commit()
 
 
+def sincronizar_sequencias(conn, tabelas) -> None:
+    """Ajusta a sequence SERIAL de cada tabela para o maior id existente (apenas PostgreSQL)."""
+    if conn.dialect.name != "postgresql":
+        return
+    for tabela in tabelas:
+        conn.execute(text(f"""
+            SELECT setval(pg_get_serial_sequence('{tabela}', 'id'), COALESCE((SELECT MAX(id) FROM {tabela}), 1))
+        """))
+
+
+def _adicionar_coluna_se_faltar(conn, tabela: str, coluna: str, tipo: str) -> None:
+    """ALTER TABLE ADD COLUMN apenas se a coluna ainda não existir (bancos criados antes da coluna)."""
+    colunas = {c["name"] for c in inspect(conn).get_columns(tabela)}
+    if coluna not in colunas:
+        conn.execute(text(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {tipo}"))
+
+
+def _migrar_minutos(conn) -> None:
+    """
+    Garante as colunas minuto_inicio/minuto_fim e preenche as linhas antigas ou cadastradas
+    manualmente no Supabase. Horários malformados ficam NULL (ignorados pelo overlap).
+    """
+    for tabela in ("hunts", "requisicoes"):
+        _adicionar_coluna_se_faltar(conn, tabela, "minuto_inicio", "INTEGER")
+        _adicionar_coluna_se_faltar(conn, tabela, "minuto_fim", "INTEGER")
+        # Índices compostos começam pela guilda: toda consulta filtra tenant_id primeiro
+        conn.execute(text(f"DROP INDEX IF EXISTS idx_{tabela}_respawn_minuto"))
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS idx_{tabela}_tenant_respawn_minuto "
+            f"ON {tabela} (tenant_id, respawn, minuto_inicio)"
+        ))
+        r = conn.execute(text(
+            f"SELECT id, horario_inicio, horario_fim FROM {tabela} WHERE minuto_inicio IS NULL"
+        ))
+        updates = []
+        for row_id, h_inicio, h_fim in r.fetchall():
+            try:
+                ini, fim = intervalo_em_minutos(h_inicio, h_fim)
+            except (ValueError, AttributeError):
+                continue
+            updates.append({"id": row_id, "ini": ini, "fim": fim})
+        if updates:
+            conn.execute(
+                text(f"UPDATE {tabela} SET minuto_inicio = :ini, minuto_fim = :fim WHERE id = :id"),
+                updates,
+            )
+
+
+def _migrar_hash_requisicoes(conn) -> None:
+    """
+    Garante a coluna hash_conteudo e o índice único (por guilda) que recusa requisições pendentes
+    idênticas. Linhas antigas recebem o hash; duplicatas já existentes ficam com NULL (o índice
+    aceita NULLs).
+    """
+    _adicionar_coluna_se_faltar(conn, "requisicoes", "hash_conteudo", "VARCHAR(64)")
+    r = conn.execute(text("""
+        SELECT id, tenant_id, respawn, horario_inicio, horario_fim,
+            integrante1, integrante2, integrante3, integrante4, integrante5
+        FROM requisicoes WHERE hash_conteudo IS NULL ORDER BY id
+    """))
+    pendentes = r.fetchall()
+    if pendentes:
+        vistos = {(row[0], row[1]) for row in conn.execute(
+            text("SELECT tenant_id, hash_conteudo FROM requisicoes WHERE hash_conteudo IS NOT NULL")
+        )}
+        updates = []
+        for row in pendentes:
+            try:
+                h = hash_requisicao(row[2], row[3], row[4], row[5:10])
+            except (ValueError, AttributeError):
+                continue
+            if (row[1], h) not in vistos:
+                vistos.add((row[1], h))
+                updates.append({"id": row[0], "h": h})
+        if updates:
+            conn.execute(text("UPDATE requisicoes SET hash_conteudo = :h WHERE id = :id"), updates)
+    conn.execute(text("DROP INDEX IF EXISTS idx_requisicoes_hash_conteudo"))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_requisicoes_tenant_hash ON requisicoes (tenant_id, hash_conteudo)"
+    ))
+
+
+def _criar_indices_integrantes(conn) -> None:
+    """
+    Índices de expressão (tenant_id, LOWER(integranteN)) em hunts e requisições, só das linhas
+    com o integrante preenchido, para a busca por jogador de get_intervalos_jogadores: o OR
+    entre as cinco colunas vira uma busca por índice em cada uma (MULTI-INDEX OR no SQLite,
+    BitmapOr no PostgreSQL) em vez de ler a guilda toda.
+    """
+    for tabela in ("hunts", "requisicoes"):
+        for i in range(1, 6):
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS idx_{tabela}_tenant_integrante{i}_lower "
+                f"ON {tabela} (tenant_id, LOWER(integrante{i})) WHERE integrante{i} IS NOT NULL"
+            ))
+
+
+def _sql_integrante_em(marcadores: str) -> str:
+    """
+    Algum integrante (sem diferenciar maiúsculas) em IN (marcadores). O IS NOT NULL explícito
+    é o que deixa o banco usar os índices parciais de _criar_indices_integrantes.
+    """
+    return " OR ".join(
+        f"(integrante{i} IS NOT NULL AND LOWER(integrante{i}) IN ({marcadores}))" for i in range(1, 6)
+    )
+
+
 def _row_to_tuple(row) -> Tuple:
     """Converte uma Row do SQLAlchemy em tupla para compatibilidade com o resto do código."""
     try:
@@ -269,13 +521,20 @@ def _row_to_tuple(row) -> Tuple:
         return tuple(row._mapping.values()) if hasattr(row, "_mapping") else tuple(row)
 
 
+def _parametros_in(valores: List, prefixo: str = "id") -> Tuple[str, dict]:
+    """Monta ':id0, :id1, ...' e o dict de parâmetros para um IN (...)."""
+    params = {f"{prefixo}{i}": v for i, v in enumerate(valores)}
+    return ", ".join(":" + k for k in params), params
+
+
 def get_respawns() -> List[str]:
     """Retorna lista de todos os respawns únicos cadastrados (hunts + requisições)."""
     engine = get_engine()
     with engine.connect() as conn:
-        r1 = conn.execute(text("SELECT DISTINCT respawn FROM hunts"))
+        params = {"tenant": get_tenant()}
+        r1 = conn.execute(text("SELECT DISTINCT respawn FROM hunts WHERE tenant_id = :tenant"), params)
         respawns_hunts = {row[0] for row in r1}
-        r2 = conn.execute(text("SELECT DISTINCT respawn FROM requisicoes"))
+        r2 = conn.execute(text("SELECT DISTINCT respawn FROM requisicoes WHERE tenant_id = :tenant"), params)
         respawns_requisicoes = {row[0] for row in r2}
     return sorted(respawns_hunts.union(respawns_requisicoes))
 
@@ -291,19 +550,22 @@ def insert_hunt(
     integrante5: Optional[str] = None,
 ) -> int:
     """Insere uma nova hunt. Retorna o ID inserido."""
+    minuto_inicio, minuto_fim = intervalo_em_minutos(horario_inicio, horario_fim)
     engine = get_engine()
     is_pg = engine.dialect.name == "postgresql"
     with engine.connect() as conn:
         if is_pg:
             r = conn.execute(
                 text("""
-                    INSERT INTO hunts (respawn, horario_inicio, horario_fim,
-                        integrante1, integrante2, integrante3, integrante4, integrante5)
-                    VALUES (:respawn, :horario_inicio, :horario_fim,
-                        :i1, :i2, :i3, :i4, :i5)
+                    INSERT INTO hunts (tenant_id, respawn, horario_inicio, horario_fim,
+                        integrante1, integrante2, integrante3, integrante4, integrante5,
+                        minuto_inicio, minuto_fim)
+                    VALUES (:tenant, :respawn, :horario_inicio, :horario_fim,
+                        :i1, :i2, :i3, :i4, :i5, :minuto_inicio, :minuto_fim)
                     RETURNING id
                 """),
                 {
+                    "tenant": get_tenant(),
                     "respawn": respawn,
                     "horario_inicio": horario_inicio,
                     "horario_fim": horario_fim,
@@ -312,18 +574,22 @@ def insert_hunt(
                     "i3": integrante3,
                     "i4": integrante4,
                     "i5": integrante5,
+                    "minuto_inicio": minuto_inicio,
+                    "minuto_fim": minuto_fim,
                 },
             )
             last_id = r.scalar()
         else:
             r = conn.execute(
                 text("""
-                    INSERT INTO hunts (respawn, horario_inicio, horario_fim,
-                        integrante1, integrante2, integrante3, integrante4, integrante5)
-                    VALUES (:respawn, :horario_inicio, :horario_fim,
-                        :i1, :i2, :i3, :i4, :i5)
+                    INSERT INTO hunts (tenant_id, respawn, horario_inicio, horario_fim,
+                        integrante1, integrante2, integrante3, integrante4, integrante5,
+                        minuto_inicio, minuto_fim)
+                    VALUES (:tenant, :respawn, :horario_inicio, :horario_fim,
+                        :i1, :i2, :i3, :i4, :i5, :minuto_inicio, :minuto_fim)
                 """),
                 {
+                    "tenant": get_tenant(),
                     "respawn": respawn,
                     "horario_inicio": horario_inicio,
                     "horario_fim": horario_fim,
@@ -332,77 +598,543 @@ def insert_hunt(
                     "i3": integrante3,
                     "i4": integrante4,
                     "i5": integrante5,
+                    "minuto_inicio": minuto_inicio,
+                    "minuto_fim": minuto_fim,
                 },
             )
             last_id = r.lastrowid
+        _registrar_estatisticas(
+            conn, respawn, minuto_inicio, minuto_fim,
+            (integrante1, integrante2, integrante3, integrante4, integrante5), +1,
+        )
         conn.commit()
+    _atualizar_ocupacao("hunts", respawn, minuto_inicio, minuto_fim, +1)
+    _nova_versao()
+    _auditar("hunt_criada", [(
+        last_id, respawn, minuto_inicio, minuto_fim,
+        (integrante1, integrante2, integrante3, integrante4, integrante5),
+    )])
     return last_id
 
 
-def get_hunts_by_respawn(respawn: str) -> List[Tuple]:
-    """Retorna todas as hunts de um respawn."""
+def insert_hunts_lote(linhas: List[dict]) -> int:
+    """
+    Insere várias hunts numa única transação (um executemany). Cada dict tem respawn,
+    horario_inicio, horario_fim, integrante1..5 e, opcionalmente, minuto_inicio/minuto_fim.
+    As estatísticas entram na mesma transação. Retorna a quantidade inserida.
+    """
+    if not linhas:
+        return 0
+    tenant = get_tenant()
+    params = []
+    por_hora: Dict[Tuple[str, int], List[int]] = {}
+    por_jogador: Dict[str, List[int]] = {}
+    for linha in linhas:
+        if linha.get("minuto_inicio") is None:
+            minuto_inicio, minuto_fim = intervalo_em_minutos(linha["horario_inicio"], linha["horario_fim"])
+        else:
+            minuto_inicio, minuto_fim = linha["minuto_inicio"], linha["minuto_fim"]
+        integrantes = tuple(linha.get(f"integrante{i}") for i in range(1, 6))
+        params.append({
+            "tenant": tenant,
+            "respawn": linha["respawn"],
+            "horario_inicio": linha["horario_inicio"],
+            "horario_fim": linha["horario_fim"],
+            "i1": integrantes[0],
+            "i2": integrantes[1],
+            "i3": integrantes[2],
+            "i4": integrantes[3],
+            "i5": integrantes[4],
+            "minuto_inicio": minuto_inicio,
+            "minuto_fim": minuto_fim,
+        })
+        # Soma os deltas de estatística em memória: um upsert por chave, não por linha
+        _acumular_estatisticas(por_hora, por_jogador, linha["respawn"], minuto_inicio, minuto_fim, integrantes)
+
     engine = get_engine()
     with engine.connect() as conn:
-        r = conn.execute(
+        conn.execute(
             text("""
-                SELECT id, respawn, horario_inicio, horario_fim,
+                INSERT INTO hunts (tenant_id, respawn, horario_inicio, horario_fim,
                     integrante1, integrante2, integrante3, integrante4, integrante5,
-                    data_cadastro
-                FROM hunts WHERE respawn = :respawn ORDER BY horario_inicio
+                    minuto_inicio, minuto_fim)
+                VALUES (:tenant, :respawn, :horario_inicio, :horario_fim,
+                    :i1, :i2, :i3, :i4, :i5, :minuto_inicio, :minuto_fim)
             """),
-            {"respawn": respawn},
+            params,
         )
-        rows = r.fetchall()
-    return [_row_to_tuple(row) for row in rows]
+        _aplicar_estatisticas_acumuladas(conn, por_hora, por_jogador)
+        conn.commit()
+    for p in params:
+        _atualizar_ocupacao("hunts", p["respawn"], p["minuto_inicio"], p["minuto_fim"], +1)
+    _nova_versao()
+    _auditar("hunt_criada", (
+        (None, p["respawn"], p["minuto_inicio"], p["minuto_fim"], (p["i1"], p["i2"], p["i3"], p["i4"], p["i5"]))
+        for p in params
+    ), "em lote")
+    return len(params)
 
 
-def get_all_hunts() -> List[Tuple]:
-    """Retorna todas as hunts."""
+def _get_intervalos(tabela: str, respawns: List[str]) -> List[Tuple]:
+    """(id, respawn, horario_inicio, horario_fim, minuto_inicio, minuto_fim) de `tabela` nos respawns."""
+    if not respawns:
+        return []
     engine = get_engine()
+    marcadores, nomes = _parametros_in(respawns, "r")
+    nomes["tenant"] = get_tenant()
     with engine.connect() as conn:
-        r = conn.execute(text("""
-            SELECT id, respawn, horario_inicio, horario_fim,
-                integrante1, integrante2, integrante3, integrante4, integrante5,
-                data_cadastro
-            FROM hunts ORDER BY respawn, horario_inicio
-        """))
+        r = conn.execute(
+            text(f"""
+                SELECT id, respawn, horario_inicio, horario_fim, minuto_inicio, minuto_fim
+                FROM {tabela}
+                WHERE tenant_id = :tenant AND respawn IN ({marcadores}) AND minuto_inicio IS NOT NULL
+                ORDER BY respawn, minuto_inicio
+            """),
+            nomes,
+        )
         rows = r.fetchall()
     return [_row_to_tuple(row) for row in rows]
 
 
+def get_intervalos_hunts(respawns: List[str]) -> List[Tuple]:
+    """Retorna (id, respawn, horario_inicio, horario_fim, minuto_inicio, minuto_fim) das hunts dos respawns."""
+    return _get_intervalos("hunts", respawns)
+
+
+def get_intervalos_requisicoes(respawns: List[str]) -> List[Tuple]:
+    """Mesmo formato de get_intervalos_hunts, para as requisições pendentes dos respawns."""
+    return _get_intervalos("requisicoes", respawns)
+
+
+def get_hunts_by_respawn(respawn: str) -> List[Hunt]:
+    """Retorna todas as hunts de um respawn."""
+    engine = get_engine()
+    with engine.connect() as conn:
+        r = conn.execute(
+            text(f"""
+                SELECT {SELECT_HUNT} FROM hunts WHERE tenant_id = :tenant AND respawn = :respawn
+                ORDER BY horario_inicio
+            """),
+            {"tenant": get_tenant(), "respawn": respawn},
+        )
+        return [hunt_de_linha(row) for row in r]
+
+
+def get_all_hunts() -> List[Hunt]:
+    """Retorna todas as hunts (a lista inteira; para percorrer respawn a respawn, iterar_hunts_por_respawn)."""
+    engine = get_engine()
+    with engine.connect() as conn:
+        r = conn.execute(
+            text(f"SELECT {SELECT_HUNT} FROM hunts WHERE tenant_id = :tenant ORDER BY respawn, horario_inicio"),
+            {"tenant": get_tenant()},
+        )
+        return [hunt_de_linha(row) for row in r]
+
+
 def get_hunts_by_respawn_for_validation(
     respawn: str, exclude_id: Optional[int] = None
 ) -> List[Tuple]:
-    """Retorna hunts de um respawn para validação de overlap."""
+    """Retorna (id, horario_inicio, horario_fim, minuto_inicio, minuto_fim) de um respawn para validação de overlap."""
     engine = get_engine()
     with engine.connect() as conn:
         if exclude_id:
             r = conn.execute(
-                text("SELECT id, horario_inicio, horario_fim FROM hunts WHERE respawn = :respawn AND id != :eid"),
-                {"respawn": respawn, "eid": exclude_id},
+                text("SELECT id, horario_inicio, horario_fim, minuto_inicio, minuto_fim FROM hunts WHERE tenant_id = :tenant AND respawn = :respawn AND id != :eid"),
+                {"tenant": get_tenant(), "respawn": respawn, "eid": exclude_id},
             )
         else:
             r = conn.execute(
-                text("SELECT id, horario_inicio, horario_fim FROM hunts WHERE respawn = :respawn"),
-                {"respawn": respawn},
+                text("SELECT id, horario_inicio, horario_fim, minuto_inicio, minuto_fim FROM hunts WHERE tenant_id = :tenant AND respawn = :respawn"),
+                {"tenant": get_tenant(), "respawn": respawn},
             )
         rows = r.fetchall()
     return [_row_to_tuple(row) for row in rows]
 
 
-def delete_hunt(hunt_id: int) -> bool:
-    """Deleta uma hunt pelo ID."""
+# Condição de overlap em SQL para um dia circular: o intervalo candidato [:ini, :fim) é comparado
+# com cada linha deslocada de 0, -1 e +1 dia. Os deslocamentos ficam nos parâmetros, então a
+# coluna minuto_inicio aparece sem expressão e o índice (tenant_id, respawn, minuto_inicio) é usado.
+_SQL_OVERLAP = f"""
+    (minuto_inicio < :fim AND minuto_fim > :ini)
+    OR (minuto_inicio < :fim - {MINUTOS_DIA} AND minuto_fim > :ini - {MINUTOS_DIA})
+    OR (minuto_inicio < :fim + {MINUTOS_DIA} AND minuto_fim > :ini + {MINUTOS_DIA})
+"""
+
+
+def _buscar_conflito(
+    tabela: str, respawn: str, minuto_inicio: int, minuto_fim: int, exclude_id: Optional[int] = None
+) -> Optional[Tuple]:
+    """Retorna (id, horario_inicio, horario_fim) da primeira linha de `tabela` que sobrepõe o intervalo."""
+    engine = get_engine()
+    params = {"tenant": get_tenant(), "respawn": respawn, "ini": minuto_inicio, "fim": minuto_fim}
+    filtro_id = ""
+    if exclude_id:
+        filtro_id = "AND id != :eid"
+        params["eid"] = exclude_id
+    with engine.connect() as conn:
+        r = conn.execute(
+            text(f"""
+                SELECT id, horario_inicio, horario_fim FROM {tabela}
+                WHERE tenant_id = :tenant AND respawn = :respawn {filtro_id} AND ({_SQL_OVERLAP})
+                ORDER BY minuto_inicio LIMIT 1
+            """),
+            params,
+        )
+        row = r.fetchone()
+    return _row_to_tuple(row) if row else None
+
+
+def buscar_conflito_hunt(
+    respawn: str, minuto_inicio: int, minuto_fim: int, exclude_id: Optional[int] = None
+) -> Optional[Tuple]:
+    """Retorna a primeira hunt do respawn que sobrepõe o intervalo (em minutos), ou None."""
+    return _buscar_conflito("hunts", respawn, minuto_inicio, minuto_fim, exclude_id)
+
+
+def delete_hunt(hunt_id: int, dia: Optional[date] = None) -> bool:
+    """
+    Deleta uma hunt pelo ID (só da guilda atual). `dia` é o dia do planilhado para a promoção da
+    lista de espera (ver _promover_espera; padrão: hoje).
+    """
+    params = {"id": hunt_id, "tenant": get_tenant()}
     engine = get_engine()
     with engine.connect() as conn:
-        r = conn.execute(text("DELETE FROM hunts WHERE id = :id"), {"id": hunt_id})
+        alvo = conn.execute(
+            text("""
+                SELECT respawn, minuto_inicio, minuto_fim,
+                    integrante1, integrante2, integrante3, integrante4, integrante5
+                FROM hunts WHERE id = :id AND tenant_id = :tenant
+            """),
+            params,
+        ).fetchone()
+        r = conn.execute(text("DELETE FROM hunts WHERE id = :id AND tenant_id = :tenant"), params)
+        promovidos = []
+        if r.rowcount > 0 and alvo is not None:
+            _registrar_estatisticas(conn, alvo[0], alvo[1], alvo[2], tuple(alvo[3:8]), -1)
+            promovidos = _promover_espera(conn, [alvo[0]], dia)
         conn.commit()
         deleted = r.rowcount > 0
+    if deleted and alvo is not None:
+        _atualizar_ocupacao("hunts", alvo[0], alvo[1], alvo[2], -1)
+        _auditar("hunt_removida", [(hunt_id, alvo[0], alvo[1], alvo[2], alvo[3:8])])
+    _ocupar_promovidos(promovidos)
+    _nova_versao()
+    return deleted
+
+
+def delete_hunts(hunt_ids: List[int], dia: Optional[date] = None) -> int:
+    """
+    Deleta várias hunts com um único DELETE ... WHERE id IN (...). Retorna quantas foram removidas.
+    `dia` como em delete_hunt.
+    """
+    hunt_ids = list(dict.fromkeys(hunt_ids))
+    if not hunt_ids:
+        return 0
+    marcadores, params = _parametros_in(hunt_ids)
+    params["tenant"] = get_tenant()
+    por_hora: Dict[Tuple[str, int], List[int]] = {}
+    por_jogador: Dict[str, List[int]] = {}
+    engine = get_engine()
+    with engine.connect() as conn:
+        alvos = conn.execute(
+            text(f"""
+                SELECT respawn, minuto_inicio, minuto_fim,
+                    integrante1, integrante2, integrante3, integrante4, integrante5, id,
+                    horario_inicio, horario_fim
+                FROM hunts WHERE tenant_id = :tenant AND id IN ({marcadores})
+            """),
+            params,
+        ).fetchall()
+        r = conn.execute(text(f"DELETE FROM hunts WHERE tenant_id = :tenant AND id IN ({marcadores})"), params)
+        for alvo in alvos:
+            _acumular_estatisticas(por_hora, por_jogador, alvo[0], alvo[1], alvo[2], alvo[3:8], -1)
+        _aplicar_estatisticas_acumuladas(conn, por_hora, por_jogador)
+        promovidos = _promover_espera(conn, [alvo[0] for alvo in alvos], dia)
+        conn.commit()
+        deleted = r.rowcount
+    for alvo in alvos:
+        _atualizar_ocupacao("hunts", alvo[0], alvo[1], alvo[2], -1)
+    _ocupar_promovidos(promovidos)
+    _nova_versao()
+    _auditar("hunt_removida", ((alvo[8], alvo[0], alvo[1], alvo[2], alvo[3:8]) for alvo in alvos))
     return deleted
 
 
+def update_hunts(alteracoes: List[dict]) -> int:
+    """
+    Atualiza várias hunts numa única transação. Cada dict tem id, respawn, horario_inicio,
+    horario_fim e integrante1..5 (valores finais). Estatísticas e bitmaps acompanham a troca.
+    Retorna a quantidade de linhas atualizadas.
+    """
+    if not alteracoes:
+        return 0
+    tenant = get_tenant()
+    params = []
+    for a in alteracoes:
+        minuto_inicio, minuto_fim = intervalo_em_minutos(a["horario_inicio"], a["horario_fim"])
+        params.append({
+            "tenant": tenant,
+            "id": a["id"],
+            "respawn": a["respawn"],
+            "horario_inicio": a["horario_inicio"],
+            "horario_fim": a["horario_fim"],
+            "i1": a.get("integrante1"),
+            "i2": a.get("integrante2"),
+            "i3": a.get("integrante3"),
+            "i4": a.get("integrante4"),
+            "i5": a.get("integrante5"),
+            "minuto_inicio": minuto_inicio,
+            "minuto_fim": minuto_fim,
+        })
+    marcadores, ids = _parametros_in([p["id"] for p in params])
+    ids["tenant"] = tenant
+    por_hora: Dict[Tuple[str, int], List[int]] = {}
+    por_jogador: Dict[str, List[int]] = {}
+    engine = get_engine()
+    with engine.connect() as conn:
+        antigas = conn.execute(
+            text(f"""
+                SELECT respawn, minuto_inicio, minuto_fim,
+                    integrante1, integrante2, integrante3, integrante4, integrante5, id,
+                    horario_inicio, horario_fim
+                FROM hunts WHERE tenant_id = :tenant AND id IN ({marcadores})
+            """),
+            ids,
+        ).fetchall()
+        conn.execute(
+            text("""
+                UPDATE hunts SET respawn = :respawn, horario_inicio = :horario_inicio,
+                    horario_fim = :horario_fim, integrante1 = :i1, integrante2 = :i2,
+                    integrante3 = :i3, integrante4 = :i4, integrante5 = :i5,
+                    minuto_inicio = :minuto_inicio, minuto_fim = :minuto_fim
+                WHERE id = :id AND tenant_id = :tenant
+            """),
+            params,
+        )
+        for antiga in antigas:
+            _acumular_estatisticas(por_hora, por_jogador, antiga[0], antiga[1], antiga[2], antiga[3:8], -1)
+        for p in params:
+            _acumular_estatisticas(
+                por_hora, por_jogador, p["respawn"], p["minuto_inicio"], p["minuto_fim"],
+                (p["i1"], p["i2"], p["i3"], p["i4"], p["i5"]),
+            )
+        _aplicar_estatisticas_acumuladas(conn, por_hora, por_jogador)
+        conn.commit()
+    # rowcount de executemany não é confiável em todos os drivers; conta as linhas que existiam
+    atualizadas = len(antigas)
+    for antiga in antigas:
+        _atualizar_ocupacao("hunts", antiga[0], antiga[1], antiga[2], -1)
+    for p in params:
+        _atualizar_ocupacao("hunts", p["respawn"], p["minuto_inicio"], p["minuto_fim"], +1)
+    _nova_versao()
+    for antiga in antigas:
+        p = next(p for p in params if p["id"] == antiga[8])
+        # Linhas cadastradas à mão podem não ter minutos: aí vale o texto gravado
+        if antiga[1] is None or antiga[2] is None:
+            antes = f"{antiga[9]} às {antiga[10]}"
+        else:
+            antes = f"{minutos_para_horario(antiga[1])} às {minutos_para_horario(antiga[2])}"
+        _auditar("hunt_editada", [(
+            p["id"], p["respawn"], p["minuto_inicio"], p["minuto_fim"], (p["i1"], p["i2"], p["i3"], p["i4"], p["i5"]),
+        )], f"antes: {antiga[0]} {antes}")
+    return atualizadas
+
+
+# ========== CONSULTAS FILTRADAS / PAGINADAS ==========
+# Usadas pela visualização principal no lugar de get_all_hunts(): a página lista só um bloco de
+# respawns (LIMIT/OFFSET) e cada seção busca suas hunts apenas quando é aberta.
+
+
+def _sql_filtros(
+    respawn: Optional[str] = None, busca: Optional[str] = None, jogador: Optional[str] = None,
+    janela: Optional[Tuple[int, int]] = None,
+) -> Tuple[str, dict]:
+    """
+    Monta a cláusula WHERE (sem a palavra WHERE) e os parâmetros dos filtros. Serve para hunts,
+    requisicoes e hunts_recorrentes, que têm as mesmas colunas de respawn, integrantes e minutos.
+    janela é (minuto_inicio, minuto_fim) normalizado: hunts que sobrepõem a janela. Sempre
+    restringe à guilda atual.
+    """
+    condicoes = ["tenant_id = :tenant"]
+    params: dict = {"tenant": get_tenant()}
+    if respawn:
+        condicoes.append("respawn = :respawn")
+        params["respawn"] = respawn
+    if busca:
+        condicoes.append("LOWER(respawn) LIKE :busca")
+        params["busca"] = f"%{busca.strip().lower()}%"
+    if jogador:
+        condicoes.append("(" + " OR ".join(f"LOWER(integrante{i}) LIKE :jogador" for i in range(1, 6)) + ")")
+        params["jogador"] = f"%{jogador.strip().lower()}%"
+    if janela:
+        condicoes.append(f"({_SQL_OVERLAP})")
+        params["ini"], params["fim"] = janela
+    return " AND ".join(condicoes), params
+
+
+def _sql_respawns_do_dia(filtro: str) -> str:
+    """Subconsulta com um respawn por hunt e por ocorrência recorrente do dia (:bit, :data)."""
+    return f"""
+        SELECT respawn FROM hunts WHERE {filtro}
+        UNION ALL
+        SELECT respawn FROM hunts_recorrentes r
+        WHERE {filtro} AND (dias_semana & :bit) != 0
+            AND NOT EXISTS (SELECT 1 FROM hunts_recorrentes_excecoes e
+                WHERE e.recorrente_id = r.id AND e.data = :data)
+    """
+
+
+def contar_respawns(
+    dia: date, busca: Optional[str] = None, jogador: Optional[str] = None,
+    janela: Optional[Tuple[int, int]] = None,
+) -> int:
+    """Quantidade de respawns com alguma hunt (ou ocorrência no dia) que passa nos filtros."""
+    filtro, params = _sql_filtros(None, busca, jogador, janela)
+    params.update({"bit": 1 << dia.weekday(), "data": dia.isoformat()})
+    engine = get_engine()
+    with engine.connect() as conn:
+        r = conn.execute(
+            text(f"SELECT COUNT(DISTINCT respawn) FROM ({_sql_respawns_do_dia(filtro)}) t"), params
+        )
+        count = r.scalar() or 0
+    return count
+
+
+def get_resumo_respawns(
+    dia: date, limite: int, offset: int = 0, busca: Optional[str] = None,
+    jogador: Optional[str] = None, janela: Optional[Tuple[int, int]] = None,
+) -> List[Tuple]:
+    """Retorna uma página de (respawn, quantidade_de_hunts), em ordem alfabética."""
+    filtro, params = _sql_filtros(None, busca, jogador, janela)
+    params.update({"bit": 1 << dia.weekday(), "data": dia.isoformat(), "limite": limite, "offset": offset})
+    engine = get_engine()
+    with engine.connect() as conn:
+        r = conn.execute(
+            text(f"""
+                SELECT respawn, COUNT(*) FROM ({_sql_respawns_do_dia(filtro)}) t
+                GROUP BY respawn ORDER BY respawn LIMIT :limite OFFSET :offset
+            """),
+            params,
+        )
+        rows = r.fetchall()
+    return [_row_to_tuple(row) for row in rows]
+
+
+def buscar_hunts(
+    dia: Optional[date] = None, respawn: Optional[str] = None, busca: Optional[str] = None,
+    jogador: Optional[str] = None, janela: Optional[Tuple[int, int]] = None,
+    limite: Optional[int] = None,
+) -> List[Hunt]:
+    """
+    Retorna as hunts que passam nos filtros, ordenadas por respawn e horário. Com `dia`, inclui
+    as ocorrências das hunts recorrentes daquele dia (Hunt com id None).
+    """
+    filtro, params = _sql_filtros(respawn, busca, jogador, janela)
+    limite_sql = ""
+    if limite is not None:
+        limite_sql = "LIMIT :limite"
+        params["limite"] = limite
+    engine = get_engine()
+    with engine.connect() as conn:
+        r = conn.execute(
+            text(f"""
+                SELECT {SELECT_HUNT} FROM hunts WHERE {filtro}
+                ORDER BY respawn, minuto_inicio, horario_inicio {limite_sql}
+            """),
+            params,
+        )
+        hunts = [hunt_de_linha(row) for row in r]
+    if dia is not None:
+        hunts += list(expandir_recorrentes(dia, dia, respawn, busca, jogador, janela))
+    return hunts
+
+
+# ========== LEITURA EM STREAMING ==========
+# Para listas que crescem com o banco (linha do tempo, exportação): cursor do lado do servidor
+# (stream_results / yield_per) na ordem por respawn e horário, e cada respawn entregue como um
+# grupo assim que a última linha dele chega. A memória fica em um respawn por vez. A conexão
+# fica aberta enquanto o gerador é consumido: quem consome não deve ir ao banco no meio (o
+# PostgreSQL usa pool de uma conexão).
+
+LOTE_STREAMING = 500
+
+
+def _grupos_por_respawn(sql: str, params: dict, de_linha, lote: int) -> Iterator[Tuple[str, list]]:
+    """(respawn, registros) de uma consulta ordenada por respawn cuja 2ª coluna é o respawn."""
+    engine = get_engine()
+    with engine.connect() as conn:
+        resultado = conn.execution_options(stream_results=True, yield_per=lote).execute(text(sql), params)
+        for respawn, linhas in groupby(resultado, key=lambda row: row[1]):
+            yield respawn, [de_linha(row) for row in linhas]
+
+
+def iterar_hunts_por_respawn(
+    dia: Optional[date] = None, respawn: Optional[str] = None, busca: Optional[str] = None,
+    jogador: Optional[str] = None, janela: Optional[Tuple[int, int]] = None,
+    lote: int = LOTE_STREAMING,
+) -> Iterator[Tuple[str, List[Hunt]]]:
+    """
+    Mesmo conteúdo de buscar_hunts, em grupos (respawn, hunts do respawn por horário) gerados
+    conforme as linhas chegam. Com `dia`, as ocorrências recorrentes daquele dia entram no grupo
+    do seu respawn; respawns só com recorrentes viram grupos no fim, em ordem alfabética.
+    """
+    filtro, params = _sql_filtros(respawn, busca, jogador, janela)
+    recorrentes: Dict[str, List[Hunt]] = {}
+    if dia is not None:
+        # Antes de abrir o cursor: com pool de uma conexão, não dá para consultar durante o streaming
+        for h in expandir_recorrentes(dia, dia, respawn, busca, jogador, janela):
+            recorrentes.setdefault(h.respawn, []).append(h)
+    grupos = _grupos_por_respawn(
+        f"SELECT {SELECT_HUNT} FROM hunts WHERE {filtro} ORDER BY respawn, minuto_inicio, horario_inicio",
+        params, hunt_de_linha, lote,
+    )
+    # Junta pelo nome, não pela ordem: o ORDER BY segue a collation do banco (no PostgreSQL,
+    # a do locale), que pode não bater com a comparação de strings do Python
+    for nome, hunts in grupos:
+        if nome in recorrentes:
+            hunts = sorted(hunts + recorrentes.pop(nome), key=chave_horario)
+        yield nome, hunts
+    for sozinho in sorted(recorrentes):
+        yield sozinho, recorrentes[sozinho]
+
+
+def iterar_requisicoes_por_respawn(
+    respawn: Optional[str] = None, busca: Optional[str] = None, jogador: Optional[str] = None,
+    janela: Optional[Tuple[int, int]] = None, lote: int = LOTE_STREAMING,
+) -> Iterator[Tuple[str, List[Requisicao]]]:
+    """Mesmo conteúdo de buscar_requisicoes, em grupos (respawn, requisições do respawn)."""
+    filtro, params = _sql_filtros(respawn, busca, jogador, janela)
+    yield from _grupos_por_respawn(
+        f"SELECT {SELECT_REQUISICAO} FROM requisicoes WHERE {filtro} ORDER BY respawn, minuto_inicio",
+        params, requisicao_de_linha, lote,
+    )
+
+
 # ========== REQUISIÇÕES ==========
 
 
+def hash_requisicao(respawn: str, horario_inicio: str, horario_fim: str, integrantes) -> str:
+    """
+    Hash do conteúdo de uma requisição: respawn e integrantes sem diferença de maiúsculas/espaços
+    (integrantes em qualquer ordem) e horários normalizados em minutos.
+    """
+    minuto_inicio, minuto_fim = intervalo_em_minutos(horario_inicio, horario_fim)
+    nomes = sorted({i.strip().lower() for i in integrantes if i and i.strip()})
+    conteudo = "|".join([respawn.strip().lower(), str(minuto_inicio), str(minuto_fim)] + nomes)
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+def _violou_hash_unico(erro: IntegrityError, tabela: str) -> bool:
+    """
+    True se `erro` é a violação do índice único (tenant_id, hash_conteudo) de `tabela`, e não de
+    outra restrição. PostgreSQL informa o nome do índice; SQLite, as colunas na mensagem.
+    """
+    diag = getattr(erro.orig, "diag", None)
+    if getattr(diag, "constraint_name", None):
+        return diag.constraint_name == f"idx_{tabela}_tenant_hash"
+    return f"{tabela}.hash_conteudo" in str(erro.orig)
+
+
 def insert_requisicao(
     respawn: str,
     horario_inicio: str,
@@ -413,120 +1145,1302 @@ def insert_requisicao(
     integrante4: Optional[str] = None,
     integrante5: Optional[str] = None,
 ) -> int:
-    """Insere uma requisição. Retorna o ID inserido."""
+    """
+    Insere uma requisição. Retorna o ID inserido. Uma requisição pendente idêntica (mesmo
+    respawn, horário e integrantes) é recusada pelo índice único: RequisicaoDuplicadaError.
+    """
+    minuto_inicio, minuto_fim = intervalo_em_minutos(horario_inicio, horario_fim)
+    hash_conteudo = hash_requisicao(
+        respawn, horario_inicio, horario_fim,
+        (integrante1, integrante2, integrante3, integrante4, integrante5),
+    )
     engine = get_engine()
     is_pg = engine.dialect.name == "postgresql"
-    with engine.connect() as conn:
-        if is_pg:
-            r = conn.execute(
-                text("""
-                    INSERT INTO requisicoes (respawn, horario_inicio, horario_fim,
-                        integrante1, integrante2, integrante3, integrante4, integrante5)
-                    VALUES (:respawn, :horario_inicio, :horario_fim,
-                        :i1, :i2, :i3, :i4, :i5)
-                    RETURNING id
-                """),
-                {
-                    "respawn": respawn,
-                    "horario_inicio": horario_inicio,
-                    "horario_fim": horario_fim,
-                    "i1": integrante1,
-                    "i2": integrante2,
-                    "i3": integrante3,
-                    "i4": integrante4,
-                    "i5": integrante5,
-                },
-            )
-            last_id = r.scalar()
-        else:
-            r = conn.execute(
-                text("""
-                    INSERT INTO requisicoes (respawn, horario_inicio, horario_fim,
-                        integrante1, integrante2, integrante3, integrante4, integrante5)
-                    VALUES (:respawn, :horario_inicio, :horario_fim,
-                        :i1, :i2, :i3, :i4, :i5)
-                """),
-                {
-                    "respawn": respawn,
-                    "horario_inicio": horario_inicio,
-                    "horario_fim": horario_fim,
-                    "i1": integrante1,
-                    "i2": integrante2,
-                    "i3": integrante3,
-                    "i4": integrante4,
-                    "i5": integrante5,
-                },
-            )
-            last_id = r.lastrowid
-        conn.commit()
+    try:
+        with engine.connect() as conn:
+            if is_pg:
+                r = conn.execute(
+                    text("""
+                        INSERT INTO requisicoes (tenant_id, respawn, horario_inicio, horario_fim,
+                            integrante1, integrante2, integrante3, integrante4, integrante5,
+                            minuto_inicio, minuto_fim, hash_conteudo)
+                        VALUES (:tenant, :respawn, :horario_inicio, :horario_fim,
+                            :i1, :i2, :i3, :i4, :i5, :minuto_inicio, :minuto_fim, :hash_conteudo)
+                        RETURNING id
+                    """),
+                    {
+                        "tenant": get_tenant(),
+                        "respawn": respawn,
+                        "horario_inicio": horario_inicio,
+                        "horario_fim": horario_fim,
+                        "i1": integrante1,
+                        "i2": integrante2,
+                        "i3": integrante3,
+                        "i4": integrante4,
+                        "i5": integrante5,
+                        "minuto_inicio": minuto_inicio,
+                        "minuto_fim": minuto_fim,
+                        "hash_conteudo": hash_conteudo,
+                    },
+                )
+                last_id = r.scalar()
+            else:
+                r = conn.execute(
+                    text("""
+                        INSERT INTO requisicoes (tenant_id, respawn, horario_inicio, horario_fim,
+                            integrante1, integrante2, integrante3, integrante4, integrante5,
+                            minuto_inicio, minuto_fim, hash_conteudo)
+                        VALUES (:tenant, :respawn, :horario_inicio, :horario_fim,
+                            :i1, :i2, :i3, :i4, :i5, :minuto_inicio, :minuto_fim, :hash_conteudo)
+                    """),
+                    {
+                        "tenant": get_tenant(),
+                        "respawn": respawn,
+                        "horario_inicio": horario_inicio,
+                        "horario_fim": horario_fim,
+                        "i1": integrante1,
+                        "i2": integrante2,
+                        "i3": integrante3,
+                        "i4": integrante4,
+                        "i5": integrante5,
+                        "minuto_inicio": minuto_inicio,
+                        "minuto_fim": minuto_fim,
+                        "hash_conteudo": hash_conteudo,
+                    },
+                )
+                last_id = r.lastrowid
+            conn.commit()
+    except IntegrityError as e:
+        # O rollback é feito ao sair do bloco with
+        if not _violou_hash_unico(e, "requisicoes"):
+            raise
+        raise RequisicaoDuplicadaError("Já existe uma requisição pendente idêntica.") from e
+    _atualizar_ocupacao("requisicoes", respawn, minuto_inicio, minuto_fim, +1)
+    _nova_versao()
+    _auditar("requisicao_criada", [(
+        last_id, respawn, minuto_inicio, minuto_fim,
+        (integrante1, integrante2, integrante3, integrante4, integrante5),
+    )])
     return last_id
 
 
-def get_all_requisicoes() -> List[Tuple]:
-    """Retorna todas as requisições pendentes."""
+def get_all_requisicoes() -> List[Requisicao]:
+    """Retorna todas as requisições pendentes (a lista inteira; ver iterar_requisicoes_por_respawn)."""
     engine = get_engine()
     with engine.connect() as conn:
-        r = conn.execute(text("""
-            SELECT id, respawn, horario_inicio, horario_fim,
-                integrante1, integrante2, integrante3, integrante4, integrante5,
-                data_requisicao
-            FROM requisicoes ORDER BY data_requisicao DESC
-        """))
-        rows = r.fetchall()
-    return [_row_to_tuple(row) for row in rows]
+        r = conn.execute(
+            text(f"""
+                SELECT {SELECT_REQUISICAO} FROM requisicoes WHERE tenant_id = :tenant
+                ORDER BY data_requisicao DESC
+            """),
+            {"tenant": get_tenant()},
+        )
+        return [requisicao_de_linha(row) for row in r]
 
 
-def get_requisicao_by_id(requisicao_id: int) -> Optional[Tuple]:
+def buscar_requisicoes(
+    respawn: Optional[str] = None, busca: Optional[str] = None, jogador: Optional[str] = None,
+    janela: Optional[Tuple[int, int]] = None,
+) -> List[Requisicao]:
+    """Retorna as requisições pendentes que passam nos filtros (mesmos de buscar_hunts)."""
+    filtro, params = _sql_filtros(respawn, busca, jogador, janela)
+    engine = get_engine()
+    with engine.connect() as conn:
+        r = conn.execute(
+            text(f"SELECT {SELECT_REQUISICAO} FROM requisicoes WHERE {filtro} ORDER BY respawn, minuto_inicio"),
+            params,
+        )
+        return [requisicao_de_linha(row) for row in r]
+
+
+def get_requisicao_by_id(requisicao_id: int) -> Optional[Requisicao]:
     """Retorna uma requisição pelo ID."""
     engine = get_engine()
     with engine.connect() as conn:
         r = conn.execute(
-            text("""
-                SELECT id, respawn, horario_inicio, horario_fim,
-                    integrante1, integrante2, integrante3, integrante4, integrante5,
-                    data_requisicao
-                FROM requisicoes WHERE id = :id
-            """),
-            {"id": requisicao_id},
+            text(f"SELECT {SELECT_REQUISICAO} FROM requisicoes WHERE id = :id AND tenant_id = :tenant"),
+            {"id": requisicao_id, "tenant": get_tenant()},
         )
         row = r.fetchone()
-    return _row_to_tuple(row) if row else None
+    return requisicao_de_linha(row) if row else None
 
 
-def delete_requisicao(requisicao_id: int) -> bool:
-    """Deleta uma requisição pelo ID."""
+def delete_requisicao(requisicao_id: int, dia: Optional[date] = None) -> bool:
+    """Deleta uma requisição pelo ID (só da guilda atual). `dia` como em delete_hunt."""
+    params = {"id": requisicao_id, "tenant": get_tenant()}
     engine = get_engine()
     with engine.connect() as conn:
-        r = conn.execute(text("DELETE FROM requisicoes WHERE id = :id"), {"id": requisicao_id})
+        alvo = conn.execute(
+            text("""
+                SELECT respawn, minuto_inicio, minuto_fim,
+                    integrante1, integrante2, integrante3, integrante4, integrante5
+                FROM requisicoes WHERE id = :id AND tenant_id = :tenant
+            """),
+            params,
+        ).fetchone()
+        r = conn.execute(text("DELETE FROM requisicoes WHERE id = :id AND tenant_id = :tenant"), params)
+        promovidos = _promover_espera(conn, [alvo[0]], dia) if r.rowcount > 0 and alvo is not None else []
         conn.commit()
         deleted = r.rowcount > 0
+    if deleted and alvo is not None:
+        _atualizar_ocupacao("requisicoes", alvo[0], alvo[1], alvo[2], -1)
+        _auditar("requisicao_removida", [(requisicao_id, alvo[0], alvo[1], alvo[2], alvo[3:8])])
+    _ocupar_promovidos(promovidos)
+    _nova_versao()
     return deleted
 
 
-def count_requisicoes_pendentes() -> int:
-    """Retorna a quantidade de requisições pendentes."""
-    engine = get_engine()
-    with engine.connect() as conn:
-        r = conn.execute(text("SELECT COUNT(*) FROM requisicoes"))
-        count = r.scalar() or 0
-    return count
+def _para_espera(rejeitadas) -> List[dict]:
+    """
+    Parâmetros {id, hash} das rejeitadas que podem entrar na lista de espera. Requisições
+    cadastradas direto no Supabase depois do init_db não têm hash_conteudo: ele é calculado aqui.
+    As sem minutos (horário ilegível) só são rejeitadas.
+    """
+    espera = []
+    for a in rejeitadas:
+        if a[2] is None or a[3] is None:
+            continue
+        h = a[11]
+        if h is None:
+            try:
+                h = hash_requisicao(a[1], a[9], a[10], a[4:9])
+            except (ValueError, AttributeError):
+                continue
+        espera.append({"id": a[0], "hash": h})
+    return espera
 
 
-def get_requisicoes_by_respawn_for_validation(
-    respawn: str, exclude_id: Optional[int] = None
-) -> List[Tuple]:
-    """Retorna requisições de um respawn para validação de overlap."""
+def aprovar_requisicoes(aceitar: List[int], rejeitar: List[int] = (),
+                        rejeitadas_para_espera: bool = False,
+                        dia: Optional[date] = None) -> Tuple[int, int]:
+    """
+    Aceita e rejeita requisições em lote numa única transação: as aceitas viram hunts
+    (INSERT ... SELECT) e todas saem de requisicoes. Não verifica overlap; quem chama garante
+    que as aceitas não conflitam (ver triagem.py). Com rejeitadas_para_espera, as rejeitadas vão
+    para a lista de espera na posição da hora em que foram submetidas (e não são promovidas de
+    volta nesta chamada). `dia` como em delete_hunt. Retorna (aceitas, rejeitadas).
+    """
+    aceitar = list(dict.fromkeys(aceitar))
+    ids_aceitar = set(aceitar)
+    todas = aceitar + [i for i in dict.fromkeys(rejeitar) if i not in ids_aceitar]
+    if not todas:
+        return 0, 0
+    marcadores, params = _parametros_in(todas)
+    params["tenant"] = get_tenant()
+    por_hora: Dict[Tuple[str, int], List[int]] = {}
+    por_jogador: Dict[str, List[int]] = {}
+    engine = get_engine()
+    with engine.connect() as conn:
+        alvos = conn.execute(
+            text(f"""
+                SELECT id, respawn, minuto_inicio, minuto_fim,
+                    integrante1, integrante2, integrante3, integrante4, integrante5,
+                    horario_inicio, horario_fim, hash_conteudo
+                FROM requisicoes WHERE tenant_id = :tenant AND id IN ({marcadores})
+            """),
+            params,
+        ).fetchall()
+        aceitas = [a for a in alvos if a[0] in ids_aceitar]
+        if aceitas:
+            m_aceitas, p_aceitas = _parametros_in([a[0] for a in aceitas], "ac")
+            conn.execute(
+                text(f"""
+                    INSERT INTO hunts (tenant_id, respawn, horario_inicio, horario_fim,
+                        integrante1, integrante2, integrante3, integrante4, integrante5,
+                        minuto_inicio, minuto_fim)
+                    SELECT tenant_id, respawn, horario_inicio, horario_fim,
+                        integrante1, integrante2, integrante3, integrante4, integrante5,
+                        minuto_inicio, minuto_fim
+                    FROM requisicoes WHERE id IN ({m_aceitas}) ORDER BY data_requisicao
+                """),
+                p_aceitas,
+            )
+            for a in aceitas:
+                _acumular_estatisticas(por_hora, por_jogador, a[1], a[2], a[3], a[4:9])
+            _aplicar_estatisticas_acumuladas(conn, por_hora, por_jogador)
+        rejeitadas = [a for a in alvos if a[0] not in ids_aceitar]
+        espera = _para_espera(rejeitadas) if rejeitadas_para_espera else []
+        if espera:
+            conn.execute(
+                text("""
+                    INSERT INTO lista_espera (tenant_id, respawn, horario_inicio, horario_fim,
+                        integrante1, integrante2, integrante3, integrante4, integrante5,
+                        data_entrada, minuto_inicio, minuto_fim, hash_conteudo)
+                    SELECT tenant_id, respawn, horario_inicio, horario_fim,
+                        integrante1, integrante2, integrante3, integrante4, integrante5,
+                        data_requisicao, minuto_inicio, minuto_fim, :hash
+                    FROM requisicoes WHERE id = :id
+                    ON CONFLICT DO NOTHING
+                """),
+                espera,
+            )
+        conn.execute(text(f"DELETE FROM requisicoes WHERE tenant_id = :tenant AND id IN ({marcadores})"), params)
+        promovidos = _promover_espera(conn, [a[1] for a in rejeitadas], dia, [e["hash"] for e in espera])
+        conn.commit()
+    for a in alvos:
+        _atualizar_ocupacao("requisicoes", a[1], a[2], a[3], -1)
+        if a[0] in ids_aceitar:
+            _atualizar_ocupacao("hunts", a[1], a[2], a[3], +1)
+    _ocupar_promovidos(promovidos)
+    _nova_versao()
+    _auditar("requisicao_aprovada", ((a[0], a[1], a[2], a[3], a[4:9]) for a in aceitas))
+    _auditar("requisicao_rejeitada", ((a[0], a[1], a[2], a[3], a[4:9]) for a in rejeitadas),
+             "para a lista de espera" if rejeitadas_para_espera else None)
+    return len(aceitas), len(alvos) - len(aceitas)
+
+
+def count_requisicoes_pendentes() -> int:
+    """Retorna a quantidade de requisições pendentes."""
+    engine = get_engine()
+    with engine.connect() as conn:
+        r = conn.execute(text("SELECT COUNT(*) FROM requisicoes WHERE tenant_id = :tenant"), {"tenant": get_tenant()})
+        count = r.scalar() or 0
+    return count
+
+
+def count_requisicoes_pendentes_por_tenant() -> Dict[str, int]:
+    """Requisições pendentes de todas as guildas: {tenant_id: quantidade} (para monitoramento)."""
+    engine = get_engine()
+    with engine.connect() as conn:
+        r = conn.execute(text("SELECT tenant_id, COUNT(*) FROM requisicoes GROUP BY tenant_id"))
+        return {tenant: count for tenant, count in r.fetchall()}
+
+
+def get_intervalos_jogadores(jogadores: List[str]) -> List[Tuple[int, int]]:
+    """
+    Retorna (minuto_inicio, minuto_fim) de todas as hunts e requisições pendentes da guilda, em
+    qualquer respawn, que têm algum dos `jogadores` como integrante (nome exato, sem diferenciar
+    maiúsculas). Uma consulta só, para as duas tabelas.
+    """
+    nomes = sorted({j.strip().lower() for j in jogadores if j and j.strip()})
+    if not nomes:
+        return []
+    marcadores, params = _parametros_in(nomes, "j")
+    params["tenant"] = get_tenant()
+    condicao = _sql_integrante_em(marcadores)
+    engine = get_engine()
+    with engine.connect() as conn:
+        r = conn.execute(
+            text(f"""
+                SELECT minuto_inicio, minuto_fim FROM hunts
+                WHERE tenant_id = :tenant AND minuto_inicio IS NOT NULL AND ({condicao})
+                UNION ALL
+                SELECT minuto_inicio, minuto_fim FROM requisicoes
+                WHERE tenant_id = :tenant AND minuto_inicio IS NOT NULL AND ({condicao})
+            """),
+            params,
+        )
+        return [(row[0], row[1]) for row in r]
+
+
+def get_requisicoes_by_respawn_for_validation(
+    respawn: str, exclude_id: Optional[int] = None
+) -> List[Tuple]:
+    """Retorna (id, horario_inicio, horario_fim, minuto_inicio, minuto_fim) de um respawn para validação de overlap."""
     engine = get_engine()
     with engine.connect() as conn:
         if exclude_id:
             r = conn.execute(
-                text("SELECT id, horario_inicio, horario_fim FROM requisicoes WHERE respawn = :respawn AND id != :eid"),
-                {"respawn": respawn, "eid": exclude_id},
+                text("SELECT id, horario_inicio, horario_fim, minuto_inicio, minuto_fim FROM requisicoes WHERE tenant_id = :tenant AND respawn = :respawn AND id != :eid"),
+                {"tenant": get_tenant(), "respawn": respawn, "eid": exclude_id},
             )
         else:
             r = conn.execute(
-                text("SELECT id, horario_inicio, horario_fim FROM requisicoes WHERE respawn = :respawn"),
-                {"respawn": respawn},
+                text("SELECT id, horario_inicio, horario_fim, minuto_inicio, minuto_fim FROM requisicoes WHERE tenant_id = :tenant AND respawn = :respawn"),
+                {"tenant": get_tenant(), "respawn": respawn},
             )
         rows = r.fetchall()
     return [_row_to_tuple(row) for row in rows]
+
+
+def buscar_conflito_requisicao(
+    respawn: str, minuto_inicio: int, minuto_fim: int, exclude_id: Optional[int] = None
+) -> Optional[Tuple]:
+    """Retorna a primeira requisição do respawn que sobrepõe o intervalo (em minutos), ou None."""
+    return _buscar_conflito("requisicoes", respawn, minuto_inicio, minuto_fim, exclude_id)
+
+
+# ========== OCUPAÇÃO (BITMAPS POR MINUTO) ==========
+# Para cada (guilda, tabela, respawn) guardamos um array de 1440 contadores: quantas linhas ocupam cada
+# minuto do dia. Contadores (e não bool) permitem decrementar no delete mesmo quando há linhas
+# sobrepostas cadastradas manualmente. Os arrays são reconstruídos de forma preguiçosa a partir da
+# tabela (uma consulta por guilda e tabela) e expiram após OCUPACAO_TTL_SEGUNDOS, para captar
+# escritas feitas fora deste processo. Cada guilda tem seus próprios arrays e validade.
+# Servem às telas (mapa de ocupação, utilização, horários livres), que toleram esse atraso; a
+# checagem de conflito antes de gravar consulta sempre as tabelas (_buscar_conflito).
+
+OCUPACAO_TTL_SEGUNDOS = 60
+
+_ocupacao: Dict[Tuple[str, str], Dict[str, np.ndarray]] = {}  # (guilda, tabela) -> respawn -> contadores
+_ocupacao_carregada_em: Dict[Tuple[str, str], float] = {}  # (guilda, tabela) -> time.monotonic() do último rebuild
+_ocupacao_lock = threading.Lock()
+
+
+def _marcar_intervalo(contadores: np.ndarray, minuto_inicio: int, minuto_fim: int, delta: int) -> None:
+    """Soma `delta` aos minutos do intervalo (dividido na meia-noite se necessário)."""
+    for a, b in dividir_intervalo(minuto_inicio, minuto_fim):
+        contadores[a:b] += delta
+
+
+def _carregar_ocupacao(tabela: str) -> Dict[str, np.ndarray]:
+    """Retorna os bitmaps de `tabela` da guilda atual, reconstruindo se ausentes ou expirados."""
+    chave = (get_tenant(), tabela)
+    carregada_em = _ocupacao_carregada_em.get(chave)
+    if carregada_em is not None and time.monotonic() - carregada_em < OCUPACAO_TTL_SEGUNDOS:
+        metricas.cache("ocupacao", falha=False)
+        return _ocupacao[chave]
+    metricas.cache("ocupacao", falha=True)
+    engine = get_engine()
+    with engine.connect() as conn:
+        r = conn.execute(
+            text(f"""
+                SELECT respawn, minuto_inicio, minuto_fim FROM {tabela}
+                WHERE tenant_id = :tenant AND minuto_inicio IS NOT NULL
+            """),
+            {"tenant": chave[0]},
+        )
+        rows = r.fetchall()
+    por_respawn: Dict[str, np.ndarray] = {}
+    for respawn, m_inicio, m_fim in rows:
+        contadores = por_respawn.get(respawn)
+        if contadores is None:
+            contadores = por_respawn[respawn] = np.zeros(MINUTOS_DIA, dtype=np.uint16)
+        _marcar_intervalo(contadores, m_inicio, m_fim, 1)
+    _ocupacao[chave] = por_respawn
+    _ocupacao_carregada_em[chave] = time.monotonic()
+    return por_respawn
+
+
+def _atualizar_ocupacao(tabela: str, respawn: str, minuto_inicio: Optional[int],
+                        minuto_fim: Optional[int], delta: int) -> None:
+    """Atualização incremental após insert (+1) ou delete (-1). Não carrega bitmaps ainda não usados."""
+    if minuto_inicio is None or minuto_fim is None:
+        return
+    chave = (get_tenant(), tabela)
+    with _ocupacao_lock:
+        if chave not in _ocupacao_carregada_em:
+            return
+        por_respawn = _ocupacao[chave]
+        contadores = por_respawn.get(respawn)
+        if contadores is None:
+            if delta < 0:
+                return
+            contadores = por_respawn[respawn] = np.zeros(MINUTOS_DIA, dtype=np.uint16)
+        if delta < 0:
+            # Nunca descer abaixo de zero (bitmap pode estar defasado por escritas externas)
+            for a, b in dividir_intervalo(minuto_inicio, minuto_fim):
+                fatia = contadores[a:b]
+                fatia -= (fatia > 0).astype(np.uint16)
+        else:
+            _marcar_intervalo(contadores, minuto_inicio, minuto_fim, delta)
+
+
+def invalidar_ocupacao(tabela: Optional[str] = None) -> None:
+    """
+    Descarta os bitmaps (de uma tabela ou de todas) de todas as guildas; serão reconstruídos no
+    próximo uso. Usado após escritas em massa fora do app, como a restauração de backup.
+    """
+    with _ocupacao_lock:
+        for chave in list(_ocupacao_carregada_em):
+            if tabela is None or chave[1] == tabela:
+                _ocupacao.pop(chave, None)
+                _ocupacao_carregada_em.pop(chave, None)
+    _nova_versao(todas=True)
+
+
+def get_ocupacao(respawn: str, incluir_requisicoes: bool = False) -> np.ndarray:
+    """Retorna um array bool de 1440 posições: True nos minutos ocupados do respawn."""
+    with _ocupacao_lock:
+        ocupado = np.zeros(MINUTOS_DIA, dtype=bool)
+        contadores = _carregar_ocupacao("hunts").get(respawn)
+        if contadores is not None:
+            ocupado |= contadores > 0
+        if incluir_requisicoes:
+            contadores = _carregar_ocupacao("requisicoes").get(respawn)
+            if contadores is not None:
+                ocupado |= contadores > 0
+    return ocupado
+
+
+def get_matriz_ocupacao(incluir_requisicoes: bool = False) -> Tuple[List[str], np.ndarray]:
+    """
+    Retorna (respawns em ordem alfabética, matriz bool len(respawns) x 1440) com os minutos
+    ocupados de cada respawn da guilda, montada a partir dos bitmaps.
+    """
+    with _ocupacao_lock:
+        tabelas = [_carregar_ocupacao("hunts")]
+        if incluir_requisicoes:
+            tabelas.append(_carregar_ocupacao("requisicoes"))
+        respawns = sorted(set().union(*tabelas))
+        matriz = np.zeros((len(respawns), MINUTOS_DIA), dtype=bool)
+        for i, respawn in enumerate(respawns):
+            for por_respawn in tabelas:
+                contadores = por_respawn.get(respawn)
+                if contadores is not None:
+                    matriz[i] |= contadores > 0
+    return respawns, matriz
+
+
+def get_utilizacao_respawns(incluir_requisicoes: bool = False) -> Dict[str, Tuple[int, int, float]]:
+    """
+    Retorna {respawn: (minutos_ocupados, minutos_livres, utilizacao)} com somas vetorizadas
+    sobre os bitmaps. utilizacao está em [0, 1].
+    """
+    respawns, matriz = get_matriz_ocupacao(incluir_requisicoes)
+    if not respawns:
+        return {}
+    ocupados = matriz.sum(axis=1)
+    return {
+        respawn: (int(o), MINUTOS_DIA - int(o), float(o) / MINUTOS_DIA)
+        for respawn, o in zip(respawns, ocupados)
+    }
+
+
+# ========== ESTATÍSTICAS (TABELAS DE RESUMO) ==========
+# estatisticas_respawn_hora: hunts e minutos ocupados por guilda, respawn e hora do dia (0-23)
+# estatisticas_jogador: hunts e minutos totais por guilda e integrante
+# Mantidas na mesma transação de insert_hunt/delete_hunt; rebuild_estatisticas recalcula tudo
+# (necessário após cadastros manuais no Supabase, que não passam por aqui).
+
+
+def _criar_tabelas_estatisticas(conn) -> None:
+    """
+    Cria as tabelas de resumo (DDL igual em SQLite e PostgreSQL) e popula se estiverem vazias.
+    Tabelas de antes da multi-guilda (chave sem tenant_id) são recriadas: o conteúdo é derivado.
+    """
+    existentes = set(inspect(conn).get_table_names())
+    for tabela in ("estatisticas_respawn_hora", "estatisticas_jogador"):
+        if tabela in existentes and "tenant_id" not in {c["name"] for c in inspect(conn).get_columns(tabela)}:
+            conn.execute(text(f"DROP TABLE {tabela}"))
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS estatisticas_respawn_hora (
+            {_COLUNA_TENANT},
+            respawn VARCHAR(255) NOT NULL,
+            hora INTEGER NOT NULL,
+            hunts INTEGER NOT NULL DEFAULT 0,
+            minutos INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (tenant_id, respawn, hora)
+        )
+    """))
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS estatisticas_jogador (
+            {_COLUNA_TENANT},
+            jogador VARCHAR(255) NOT NULL,
+            hunts INTEGER NOT NULL DEFAULT 0,
+            minutos INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (tenant_id, jogador)
+        )
+    """))
+    vazia = conn.execute(text("SELECT COUNT(*) FROM estatisticas_respawn_hora")).scalar() == 0
+    if vazia and conn.execute(text("SELECT COUNT(*) FROM hunts")).scalar():
+        _recalcular_estatisticas(conn)
+
+
+def _deltas_estatisticas(
+    respawn: str, minuto_inicio: int, minuto_fim: int, integrantes, sinal: int
+) -> Tuple[List[dict], List[dict]]:
+    """Monta os parâmetros de upsert (por hora e por jogador) de uma hunt."""
+    por_hora = [
+        {"respawn": respawn, "hora": hora, "hunts": sinal, "minutos": sinal * minutos}
+        for hora, minutos in minutos_por_hora(minuto_inicio, minuto_fim).items()
+    ]
+    duracao = minuto_fim - minuto_inicio
+    jogadores = {i.strip() for i in integrantes if i and i.strip()}
+    por_jogador = [
+        {"jogador": j, "hunts": sinal, "minutos": sinal * duracao} for j in sorted(jogadores)
+    ]
+    return por_hora, por_jogador
+
+
+def _aplicar_estatisticas(conn, por_hora: List[dict], por_jogador: List[dict],
+                          tenant: Optional[str] = None) -> None:
+    """Upsert somando os deltas na guilda (ON CONFLICT funciona em SQLite >= 3.24 e PostgreSQL)."""
+    tenant = tenant or get_tenant()
+    por_hora = [dict(d, tenant=tenant) for d in por_hora]
+    por_jogador = [dict(d, tenant=tenant) for d in por_jogador]
+    if por_hora:
+        conn.execute(
+            text("""
+                INSERT INTO estatisticas_respawn_hora (tenant_id, respawn, hora, hunts, minutos)
+                VALUES (:tenant, :respawn, :hora, :hunts, :minutos)
+                ON CONFLICT (tenant_id, respawn, hora) DO UPDATE SET
+                    hunts = estatisticas_respawn_hora.hunts + excluded.hunts,
+                    minutos = estatisticas_respawn_hora.minutos + excluded.minutos
+            """),
+            por_hora,
+        )
+    if por_jogador:
+        conn.execute(
+            text("""
+                INSERT INTO estatisticas_jogador (tenant_id, jogador, hunts, minutos)
+                VALUES (:tenant, :jogador, :hunts, :minutos)
+                ON CONFLICT (tenant_id, jogador) DO UPDATE SET
+                    hunts = estatisticas_jogador.hunts + excluded.hunts,
+                    minutos = estatisticas_jogador.minutos + excluded.minutos
+            """),
+            por_jogador,
+        )
+
+
+def _registrar_estatisticas(
+    conn, respawn: str, minuto_inicio: Optional[int], minuto_fim: Optional[int], integrantes, sinal: int
+) -> None:
+    """Atualiza os resumos para uma hunt inserida (+1) ou removida (-1), na transação de `conn`."""
+    if minuto_inicio is None or minuto_fim is None:
+        return
+    por_hora, por_jogador = _deltas_estatisticas(respawn, minuto_inicio, minuto_fim, integrantes, sinal)
+    _aplicar_estatisticas(conn, por_hora, por_jogador)
+    if sinal < 0:
+        _limpar_estatisticas_zeradas(conn)
+
+
+def _limpar_estatisticas_zeradas(conn) -> None:
+    params = {"tenant": get_tenant()}
+    conn.execute(text("DELETE FROM estatisticas_respawn_hora WHERE tenant_id = :tenant AND hunts <= 0"), params)
+    conn.execute(text("DELETE FROM estatisticas_jogador WHERE tenant_id = :tenant AND hunts <= 0"), params)
+
+
+def _acumular_estatisticas(
+    por_hora: Dict[Tuple[str, int], List[int]], por_jogador: Dict[str, List[int]],
+    respawn: str, minuto_inicio: Optional[int], minuto_fim: Optional[int], integrantes, sinal: int = 1,
+) -> None:
+    """Soma (sinal=1) ou subtrai (sinal=-1) uma hunt nos acumuladores {chave: [hunts, minutos]}."""
+    if minuto_inicio is None or minuto_fim is None:
+        return
+    deltas_hora, deltas_jogador = _deltas_estatisticas(respawn, minuto_inicio, minuto_fim, integrantes, sinal)
+    for d in deltas_hora:
+        acc = por_hora.setdefault((d["respawn"], d["hora"]), [0, 0])
+        acc[0] += sinal
+        acc[1] += d["minutos"]
+    for d in deltas_jogador:
+        acc = por_jogador.setdefault(d["jogador"], [0, 0])
+        acc[0] += sinal
+        acc[1] += d["minutos"]
+
+
+def _aplicar_estatisticas_acumuladas(
+    conn, por_hora: Dict[Tuple[str, int], List[int]], por_jogador: Dict[str, List[int]],
+    tenant: Optional[str] = None,
+) -> None:
+    """Grava os acumuladores de _acumular_estatisticas com um upsert por chave."""
+    _aplicar_estatisticas(
+        conn,
+        [{"respawn": k[0], "hora": k[1], "hunts": v[0], "minutos": v[1]}
+         for k, v in por_hora.items() if v != [0, 0]],
+        [{"jogador": k, "hunts": v[0], "minutos": v[1]} for k, v in por_jogador.items() if v != [0, 0]],
+        tenant,
+    )
+    if any(v[0] < 0 for v in por_hora.values()) or any(v[0] < 0 for v in por_jogador.values()):
+        _limpar_estatisticas_zeradas(conn)
+
+
+def _recalcular_estatisticas(conn) -> None:
+    """
+    Apaga e recalcula os resumos de todas as guildas a partir da tabela hunts (agregando em
+    memória por guilda e chave).
+    """
+    conn.execute(text("DELETE FROM estatisticas_respawn_hora"))
+    conn.execute(text("DELETE FROM estatisticas_jogador"))
+    acumulados: Dict[str, Tuple[Dict[Tuple[str, int], List[int]], Dict[str, List[int]]]] = {}
+    r = conn.execute(text("""
+        SELECT tenant_id, respawn, minuto_inicio, minuto_fim,
+            integrante1, integrante2, integrante3, integrante4, integrante5
+        FROM hunts WHERE minuto_inicio IS NOT NULL
+    """))
+    for row in r:
+        por_hora, por_jogador = acumulados.setdefault(row[0], ({}, {}))
+        _acumular_estatisticas(por_hora, por_jogador, row[1], row[2], row[3], row[4:9])
+    for tenant, (por_hora, por_jogador) in acumulados.items():
+        _aplicar_estatisticas_acumuladas(conn, por_hora, por_jogador, tenant)
+
+
+def rebuild_estatisticas() -> None:
+    """Reconstrói as tabelas de resumo de todas as guildas a partir de hunts, numa única transação (reparo)."""
+    engine = get_engine()
+    with engine.connect() as conn:
+        _recalcular_estatisticas(conn)
+        conn.commit()
+
+
+def get_estatisticas_respawn_hora() -> List[Tuple]:
+    """Retorna (respawn, hora, hunts, minutos) da tabela de resumo da guilda atual."""
+    engine = get_engine()
+    with engine.connect() as conn:
+        r = conn.execute(
+            text("""
+                SELECT respawn, hora, hunts, minutos FROM estatisticas_respawn_hora
+                WHERE tenant_id = :tenant ORDER BY respawn, hora
+            """),
+            {"tenant": get_tenant()},
+        )
+        rows = r.fetchall()
+    return [_row_to_tuple(row) for row in rows]
+
+
+def get_estatisticas_jogadores(limite: int = 20) -> List[Tuple]:
+    """Retorna (jogador, hunts, minutos) dos jogadores que mais caçam."""
+    engine = get_engine()
+    with engine.connect() as conn:
+        r = conn.execute(
+            text("""
+                SELECT jogador, hunts, minutos FROM estatisticas_jogador WHERE tenant_id = :tenant
+                ORDER BY minutos DESC, hunts DESC, jogador LIMIT :limite
+            """),
+            {"tenant": get_tenant(), "limite": limite},
+        )
+        rows = r.fetchall()
+    return [_row_to_tuple(row) for row in rows]
+
+
+# ========== HUNTS RECORRENTES ==========
+# Um modelo (respawn, horário, integrantes, dias_semana) vale para todos os dias marcados na
+# máscara (bit i = date.weekday() == i). As ocorrências não viram linhas: são expandidas sob
+# demanda para a janela de datas pedida. hunts_recorrentes_excecoes guarda datas puladas.
+
+
+def _criar_tabelas_recorrentes(conn, is_postgres: bool) -> None:
+    """Cria as tabelas de modelos recorrentes e de exceções."""
+    if is_postgres:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS hunts_recorrentes (
+                id SERIAL PRIMARY KEY,
+                {_COLUNA_TENANT},
+                respawn VARCHAR(255) NOT NULL,
+                horario_inicio VARCHAR(10) NOT NULL,
+                horario_fim VARCHAR(10) NOT NULL,
+                integrante1 VARCHAR(255),
+                integrante2 VARCHAR(255),
+                integrante3 VARCHAR(255),
+                integrante4 VARCHAR(255),
+                integrante5 VARCHAR(255),
+                dias_semana INTEGER NOT NULL,
+                minuto_inicio INTEGER NOT NULL,
+                minuto_fim INTEGER NOT NULL,
+                data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+    else:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS hunts_recorrentes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                {_COLUNA_TENANT},
+                respawn TEXT NOT NULL,
+                horario_inicio TEXT NOT NULL,
+                horario_fim TEXT NOT NULL,
+                integrante1 TEXT,
+                integrante2 TEXT,
+                integrante3 TEXT,
+                integrante4 TEXT,
+                integrante5 TEXT,
+                dias_semana INTEGER NOT NULL,
+                minuto_inicio INTEGER NOT NULL,
+                minuto_fim INTEGER NOT NULL,
+                data_cadastro TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS hunts_recorrentes_excecoes (
+            recorrente_id INTEGER NOT NULL,
+            data VARCHAR(10) NOT NULL,
+            PRIMARY KEY (recorrente_id, data)
+        )
+    """))
+    _adicionar_coluna_se_faltar(conn, "hunts_recorrentes", "tenant_id", _TIPO_TENANT)
+    conn.execute(text("DROP INDEX IF EXISTS idx_hunts_recorrentes_respawn_minuto"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_hunts_recorrentes_tenant_respawn_minuto "
+        "ON hunts_recorrentes (tenant_id, respawn, minuto_inicio)"
+    ))
+
+
+def insert_hunt_recorrente(
+    respawn: str,
+    horario_inicio: str,
+    horario_fim: str,
+    dias_semana: int,
+    integrante1: Optional[str] = None,
+    integrante2: Optional[str] = None,
+    integrante3: Optional[str] = None,
+    integrante4: Optional[str] = None,
+    integrante5: Optional[str] = None,
+) -> int:
+    """Insere um modelo de hunt recorrente. Retorna o ID inserido."""
+    minuto_inicio, minuto_fim = intervalo_em_minutos(horario_inicio, horario_fim)
+    engine = get_engine()
+    is_pg = engine.dialect.name == "postgresql"
+    params = {
+        "tenant": get_tenant(),
+        "respawn": respawn,
+        "horario_inicio": horario_inicio,
+        "horario_fim": horario_fim,
+        "i1": integrante1,
+        "i2": integrante2,
+        "i3": integrante3,
+        "i4": integrante4,
+        "i5": integrante5,
+        "dias": dias_semana,
+        "minuto_inicio": minuto_inicio,
+        "minuto_fim": minuto_fim,
+    }
+    sql = """
+        INSERT INTO hunts_recorrentes (tenant_id, respawn, horario_inicio, horario_fim,
+            integrante1, integrante2, integrante3, integrante4, integrante5,
+            dias_semana, minuto_inicio, minuto_fim)
+        VALUES (:tenant, :respawn, :horario_inicio, :horario_fim,
+            :i1, :i2, :i3, :i4, :i5, :dias, :minuto_inicio, :minuto_fim)
+    """
+    with engine.connect() as conn:
+        if is_pg:
+            last_id = conn.execute(text(sql + " RETURNING id"), params).scalar()
+        else:
+            last_id = conn.execute(text(sql), params).lastrowid
+        conn.commit()
+    _nova_versao()
+    _auditar("recorrente_criada", [(
+        last_id, respawn, minuto_inicio, minuto_fim,
+        (integrante1, integrante2, integrante3, integrante4, integrante5),
+    )], "dias: " + ", ".join(DIAS_SEMANA[d] for d in dias_da_mascara(dias_semana)))
+    return last_id
+
+
+def get_hunts_recorrentes(respawn: Optional[str] = None) -> List[HuntRecorrente]:
+    """Retorna os modelos recorrentes da guilda (de um respawn ou de todos)."""
+    engine = get_engine()
+    filtro = "AND respawn = :respawn" if respawn else ""
+    with engine.connect() as conn:
+        r = conn.execute(
+            text(f"""
+                SELECT {SELECT_RECORRENTE} FROM hunts_recorrentes WHERE tenant_id = :tenant {filtro}
+                ORDER BY respawn, minuto_inicio
+            """),
+            {"tenant": get_tenant(), "respawn": respawn},
+        )
+        return [recorrente_de_linha(row) for row in r]
+
+
+def delete_hunt_recorrente(recorrente_id: int, dia: Optional[date] = None) -> bool:
+    """Deleta um modelo recorrente da guilda (e suas exceções). `dia` como em delete_hunt."""
+    params = {"id": recorrente_id, "tenant": get_tenant()}
+    engine = get_engine()
+    with engine.connect() as conn:
+        respawn = conn.execute(
+            text("SELECT respawn FROM hunts_recorrentes WHERE id = :id AND tenant_id = :tenant"), params
+        ).scalar()
+        conn.execute(
+            text("""
+                DELETE FROM hunts_recorrentes_excecoes WHERE recorrente_id IN
+                    (SELECT id FROM hunts_recorrentes WHERE id = :id AND tenant_id = :tenant)
+            """),
+            params,
+        )
+        r = conn.execute(text("DELETE FROM hunts_recorrentes WHERE id = :id AND tenant_id = :tenant"), params)
+        promovidos = _promover_espera(conn, [respawn], dia) if r.rowcount > 0 else []
+        conn.commit()
+        deleted = r.rowcount > 0
+    if deleted:
+        _auditar("recorrente_removida", [(recorrente_id, respawn, None, None, ())])
+    _ocupar_promovidos(promovidos)
+    _nova_versao()
+    return deleted
+
+
+def add_excecao_recorrente(recorrente_id: int, data: date) -> None:
+    """Pula uma ocorrência do modelo recorrente (da guilda atual) na data informada."""
+    engine = get_engine()
+    with engine.connect() as conn:
+        conn.execute(
+            text("""
+                INSERT INTO hunts_recorrentes_excecoes (recorrente_id, data)
+                SELECT id, :data FROM hunts_recorrentes WHERE id = :id AND tenant_id = :tenant
+                ON CONFLICT (recorrente_id, data) DO NOTHING
+            """),
+            {"id": recorrente_id, "data": data.isoformat(), "tenant": get_tenant()},
+        )
+        conn.commit()
+    _nova_versao()
+    _auditar("recorrente_pulada", [(recorrente_id, None, None, None, ())], f"data: {data.isoformat()}")
+
+
+def expandir_recorrentes(
+    data_inicio: date, data_fim: date, respawn: Optional[str] = None,
+    busca: Optional[str] = None, jogador: Optional[str] = None,
+    janela: Optional[Tuple[int, int]] = None,
+) -> Iterator[Hunt]:
+    """
+    Gera as ocorrências dos modelos recorrentes entre data_inicio e data_fim (inclusive) como
+    Hunt com id None, data = dia da ocorrência (ISO) e recorrente_id = modelo de origem.
+    busca/jogador/janela filtram como em buscar_hunts.
+    """
+    dias = [data_inicio + timedelta(days=i) for i in range((data_fim - data_inicio).days + 1)]
+    if not dias:
+        return
+    mascara_janela = 0
+    for d in dias:
+        mascara_janela |= 1 << d.weekday()
+
+    engine = get_engine()
+    filtro, params = _sql_filtros(respawn, busca, jogador, janela)
+    params["mascara"] = mascara_janela
+    with engine.connect() as conn:
+        modelos = [
+            recorrente_de_linha(row)
+            for row in conn.execute(
+                text(f"""
+                    SELECT {SELECT_RECORRENTE} FROM hunts_recorrentes
+                    WHERE (dias_semana & :mascara) != 0 AND {filtro}
+                    ORDER BY respawn, minuto_inicio
+                """),
+                params,
+            )
+        ]
+        excecoes = {
+            (row[0], row[1])
+            for row in conn.execute(
+                text("""
+                    SELECT recorrente_id, data FROM hunts_recorrentes_excecoes
+                    WHERE data >= :inicio AND data <= :fim
+                """),
+                {"inicio": data_inicio.isoformat(), "fim": data_fim.isoformat()},
+            )
+        }
+
+    for d in dias:
+        bit = 1 << d.weekday()
+        data_iso = d.isoformat()
+        for m in modelos:
+            if m.dias_semana & bit and (m.id, data_iso) not in excecoes:
+                yield Hunt(None, m.respawn, m.horario_inicio, m.horario_fim, m.integrantes,
+                           data_iso, m.minuto_inicio, m.minuto_fim, m.id)
+
+
+def buscar_conflito_recorrente(
+    respawn: str, minuto_inicio: int, minuto_fim: int, data: date
+) -> Optional[Tuple]:
+    """
+    Retorna (id, horario_inicio, horario_fim) do primeiro modelo recorrente cuja ocorrência
+    sobrepõe o intervalo no dia `data`. Ocorrências do dia anterior que atravessam a meia-noite
+    e do dia seguinte (quando o intervalo atravessa) também contam; exceções são respeitadas.
+    """
+    dia_anterior = data - timedelta(days=1)
+    dia_seguinte = data + timedelta(days=1)
+    engine = get_engine()
+    with engine.connect() as conn:
+        r = conn.execute(
+            text(f"""
+                SELECT id, horario_inicio, horario_fim FROM hunts_recorrentes r
+                WHERE tenant_id = :tenant AND respawn = :respawn AND (
+                    ((dias_semana & :bit) != 0
+                        AND minuto_inicio < :fim AND minuto_fim > :ini
+                        AND NOT EXISTS (SELECT 1 FROM hunts_recorrentes_excecoes e
+                            WHERE e.recorrente_id = r.id AND e.data = :data))
+                    OR ((dias_semana & :bit_anterior) != 0
+                        AND minuto_inicio < :fim + {MINUTOS_DIA} AND minuto_fim > :ini + {MINUTOS_DIA}
+                        AND NOT EXISTS (SELECT 1 FROM hunts_recorrentes_excecoes e
+                            WHERE e.recorrente_id = r.id AND e.data = :data_anterior))
+                    OR ((dias_semana & :bit_seguinte) != 0
+                        AND minuto_inicio < :fim - {MINUTOS_DIA} AND minuto_fim > :ini - {MINUTOS_DIA}
+                        AND NOT EXISTS (SELECT 1 FROM hunts_recorrentes_excecoes e
+                            WHERE e.recorrente_id = r.id AND e.data = :data_seguinte))
+                )
+                ORDER BY minuto_inicio LIMIT 1
+            """),
+            {
+                "tenant": get_tenant(),
+                "respawn": respawn,
+                "ini": minuto_inicio,
+                "fim": minuto_fim,
+                "bit": 1 << data.weekday(),
+                "bit_anterior": 1 << dia_anterior.weekday(),
+                "bit_seguinte": 1 << dia_seguinte.weekday(),
+                "data": data.isoformat(),
+                "data_anterior": dia_anterior.isoformat(),
+                "data_seguinte": dia_seguinte.isoformat(),
+            },
+        )
+        row = r.fetchone()
+    return _row_to_tuple(row) if row else None
+
+
+# ========== LISTA DE ESPERA ==========
+# Pedidos que não couberam ficam numa fila por respawn, em ordem de entrada (índice
+# tenant_id, respawn, data_entrada, id). Quando uma hunt, requisição ou hunt recorrente sai,
+# _promover_espera busca numa consulta o pedido mais antigo do respawn que agora cabe e o move
+# para requisicoes na mesma transação (repetindo enquanto couber algum). O admin aprova como
+# qualquer outra requisição.
+
+
+def _criar_tabela_espera(conn, is_postgres: bool) -> None:
+    """Cria a tabela da lista de espera e seus índices."""
+    if is_postgres:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS lista_espera (
+                id SERIAL PRIMARY KEY,
+                {_COLUNA_TENANT},
+                respawn VARCHAR(255) NOT NULL,
+                horario_inicio VARCHAR(10) NOT NULL,
+                horario_fim VARCHAR(10) NOT NULL,
+                integrante1 VARCHAR(255),
+                integrante2 VARCHAR(255),
+                integrante3 VARCHAR(255),
+                integrante4 VARCHAR(255),
+                integrante5 VARCHAR(255),
+                data_entrada TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                minuto_inicio INTEGER NOT NULL,
+                minuto_fim INTEGER NOT NULL,
+                hash_conteudo VARCHAR(64) NOT NULL
+            )
+        """))
+    else:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS lista_espera (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                {_COLUNA_TENANT},
+                respawn TEXT NOT NULL,
+                horario_inicio TEXT NOT NULL,
+                horario_fim TEXT NOT NULL,
+                integrante1 TEXT,
+                integrante2 TEXT,
+                integrante3 TEXT,
+                integrante4 TEXT,
+                integrante5 TEXT,
+                data_entrada TEXT DEFAULT CURRENT_TIMESTAMP,
+                minuto_inicio INTEGER NOT NULL,
+                minuto_fim INTEGER NOT NULL,
+                hash_conteudo VARCHAR(64) NOT NULL
+            )
+        """))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_lista_espera_tenant_respawn_entrada "
+        "ON lista_espera (tenant_id, respawn, data_entrada, id)"
+    ))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_lista_espera_tenant_hash ON lista_espera (tenant_id, hash_conteudo)"
+    ))
+
+
+def _sql_overlap_linhas(a: str, b: str) -> str:
+    """_SQL_OVERLAP entre duas linhas: `a` contra `b` deslocada de 0, -1 e +1 dia."""
+    return f"""
+        ({a}.minuto_inicio < {b}.minuto_fim AND {a}.minuto_fim > {b}.minuto_inicio)
+        OR ({a}.minuto_inicio < {b}.minuto_fim - {MINUTOS_DIA} AND {a}.minuto_fim > {b}.minuto_inicio - {MINUTOS_DIA})
+        OR ({a}.minuto_inicio < {b}.minuto_fim + {MINUTOS_DIA} AND {a}.minuto_fim > {b}.minuto_inicio + {MINUTOS_DIA})
+    """
+
+
+# Pedido mais antigo do respawn sem overlap com hunts, requisições pendentes e ocorrências do
+# dia (e da véspera/dia seguinte que atravessam a meia-noite) das hunts recorrentes. Exceções das
+# recorrentes não são consideradas: na dúvida o pedido continua esperando. {excluidos} recebe o
+# filtro dos hashes que não podem ser promovidos (ver _promover_espera).
+_SQL_PROXIMO_DA_ESPERA = f"""
+    SELECT id, minuto_inicio, minuto_fim, respawn,
+        integrante1, integrante2, integrante3, integrante4, integrante5
+    FROM lista_espera e
+    WHERE e.tenant_id = :tenant AND e.respawn = :respawn
+        AND NOT EXISTS (SELECT 1 FROM hunts h
+            WHERE h.tenant_id = e.tenant_id AND h.respawn = e.respawn AND ({_sql_overlap_linhas("h", "e")}))
+        AND NOT EXISTS (SELECT 1 FROM requisicoes q
+            WHERE q.tenant_id = e.tenant_id AND q.respawn = e.respawn AND ({_sql_overlap_linhas("q", "e")}))
+        AND NOT EXISTS (SELECT 1 FROM hunts_recorrentes r
+            WHERE r.tenant_id = e.tenant_id AND r.respawn = e.respawn AND (
+                ((r.dias_semana & :bit) != 0
+                    AND r.minuto_inicio < e.minuto_fim AND r.minuto_fim > e.minuto_inicio)
+                OR ((r.dias_semana & :bit_anterior) != 0
+                    AND r.minuto_inicio < e.minuto_fim + {MINUTOS_DIA} AND r.minuto_fim > e.minuto_inicio + {MINUTOS_DIA})
+                OR ((r.dias_semana & :bit_seguinte) != 0
+                    AND r.minuto_inicio < e.minuto_fim - {MINUTOS_DIA} AND r.minuto_fim > e.minuto_inicio - {MINUTOS_DIA})
+            ))
+        {{excluidos}}
+    ORDER BY e.data_entrada, e.id
+    LIMIT 1
+"""
+
+
+def _promover_espera(conn, respawns, dia: Optional[date] = None, excluir_hashes=()) -> List[Tuple]:
+    """
+    Dentro da transação de quem liberou horário: move para requisicoes, em ordem de entrada, os
+    pedidos dos `respawns` que agora cabem, contando as hunts recorrentes de `dia` (o dia do
+    planilhado, como na triagem e no formulário; padrão: hoje). Pedidos com hash em
+    `excluir_hashes` (os que acabaram de ser rejeitados para a fila) ficam esperando. Retorna as
+    linhas promovidas (id na fila, minutos, respawn e integrantes) para os bitmaps e a auditoria
+    depois do commit (_ocupar_promovidos).
+    """
+    dia = dia or date.today()
+    params = {
+        "tenant": get_tenant(),
+        "bit": 1 << dia.weekday(),
+        "bit_anterior": 1 << (dia - timedelta(days=1)).weekday(),
+        "bit_seguinte": 1 << (dia + timedelta(days=1)).weekday(),
+    }
+    excluidos = ""
+    if excluir_hashes:
+        marcadores, p_hashes = _parametros_in(sorted(set(excluir_hashes)), "hx")
+        excluidos = f"AND e.hash_conteudo NOT IN ({marcadores})"
+        params.update(p_hashes)
+    sql = text(_SQL_PROXIMO_DA_ESPERA.format(excluidos=excluidos))
+    promovidos = []
+    for respawn in sorted({r for r in respawns if r}):
+        while True:
+            row = conn.execute(sql, dict(params, respawn=respawn)).fetchone()
+            if row is None:
+                break
+            conn.execute(
+                text("""
+                    INSERT INTO requisicoes (tenant_id, respawn, horario_inicio, horario_fim,
+                        integrante1, integrante2, integrante3, integrante4, integrante5,
+                        data_requisicao, minuto_inicio, minuto_fim, hash_conteudo)
+                    SELECT tenant_id, respawn, horario_inicio, horario_fim,
+                        integrante1, integrante2, integrante3, integrante4, integrante5,
+                        data_entrada, minuto_inicio, minuto_fim, hash_conteudo
+                    FROM lista_espera WHERE id = :id
+                """),
+                {"id": row[0]},
+            )
+            conn.execute(text("DELETE FROM lista_espera WHERE id = :id"), {"id": row[0]})
+            promovidos.append(tuple(row))
+    return promovidos
+
+
+def _ocupar_promovidos(promovidos: List[Tuple]) -> None:
+    for row in promovidos:
+        _atualizar_ocupacao("requisicoes", row[3], row[1], row[2], +1)
+    _auditar("espera_promovida", ((row[0], row[3], row[1], row[2], row[4:9]) for row in promovidos),
+             "da lista de espera para requisição")
+
+
+def insert_espera(
+    respawn: str,
+    horario_inicio: str,
+    horario_fim: str,
+    integrante1: Optional[str] = None,
+    integrante2: Optional[str] = None,
+    integrante3: Optional[str] = None,
+    integrante4: Optional[str] = None,
+    integrante5: Optional[str] = None,
+) -> int:
+    """
+    Coloca um pedido na lista de espera do respawn. Retorna o ID. Um pedido idêntico já na fila
+    é recusado: RequisicaoDuplicadaError.
+    """
+    minuto_inicio, minuto_fim = intervalo_em_minutos(horario_inicio, horario_fim)
+    params = {
+        "tenant": get_tenant(),
+        "respawn": respawn,
+        "horario_inicio": horario_inicio,
+        "horario_fim": horario_fim,
+        "i1": integrante1,
+        "i2": integrante2,
+        "i3": integrante3,
+        "i4": integrante4,
+        "i5": integrante5,
+        "minuto_inicio": minuto_inicio,
+        "minuto_fim": minuto_fim,
+        "hash_conteudo": hash_requisicao(
+            respawn, horario_inicio, horario_fim,
+            (integrante1, integrante2, integrante3, integrante4, integrante5),
+        ),
+    }
+    sql = """
+        INSERT INTO lista_espera (tenant_id, respawn, horario_inicio, horario_fim,
+            integrante1, integrante2, integrante3, integrante4, integrante5,
+            minuto_inicio, minuto_fim, hash_conteudo)
+        VALUES (:tenant, :respawn, :horario_inicio, :horario_fim,
+            :i1, :i2, :i3, :i4, :i5, :minuto_inicio, :minuto_fim, :hash_conteudo)
+    """
+    engine = get_engine()
+    try:
+        with engine.connect() as conn:
+            if engine.dialect.name == "postgresql":
+                last_id = conn.execute(text(sql + " RETURNING id"), params).scalar()
+            else:
+                last_id = conn.execute(text(sql), params).lastrowid
+            conn.commit()
+    except IntegrityError as e:
+        if not _violou_hash_unico(e, "lista_espera"):
+            raise
+        raise RequisicaoDuplicadaError("Esse pedido já está na lista de espera.") from e
+    _nova_versao()
+    _auditar("espera_criada", [(
+        last_id, respawn, minuto_inicio, minuto_fim,
+        (integrante1, integrante2, integrante3, integrante4, integrante5),
+    )])
+    return last_id
+
+
+def get_lista_espera(respawn: Optional[str] = None) -> List[Requisicao]:
+    """Pedidos na lista de espera da guilda (de um respawn ou de todos), na ordem da fila."""
+    filtro = "AND respawn = :respawn" if respawn else ""
+    engine = get_engine()
+    with engine.connect() as conn:
+        r = conn.execute(
+            text(f"""
+                SELECT {SELECT_ESPERA} FROM lista_espera WHERE tenant_id = :tenant {filtro}
+                ORDER BY respawn, data_entrada, id
+            """),
+            {"tenant": get_tenant(), "respawn": respawn},
+        )
+        return [requisicao_de_linha(row) for row in r]
+
+
+def delete_espera(espera_id: int) -> bool:
+    """Remove um pedido da lista de espera (só da guilda atual)."""
+    engine = get_engine()
+    with engine.connect() as conn:
+        r = conn.execute(
+            text("DELETE FROM lista_espera WHERE id = :id AND tenant_id = :tenant"),
+            {"id": espera_id, "tenant": get_tenant()},
+        )
+        conn.commit()
+        deleted = r.rowcount > 0
+    if deleted:
+        _auditar("espera_removida", [(espera_id, None, None, None, ())])
+    _nova_versao()
+    return deleted
+
+
+# ========== AUDITORIA ==========
+# As escritas acima enfileiram eventos (auditoria.registrar) depois do commit; a thread de
+# auditoria.py grava em lote com gravar_auditoria().
+
+
+def _criar_tabela_auditoria(conn, is_postgres: bool) -> None:
+    """Cria o audit_log e seus índices (por guilda e momento; por guilda, respawn e momento)."""
+    if is_postgres:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS audit_log (
+                id SERIAL PRIMARY KEY,
+                {_COLUNA_TENANT},
+                momento TIMESTAMP NOT NULL,
+                acao VARCHAR(32) NOT NULL,
+                autor VARCHAR(64) NOT NULL,
+                registro_id INTEGER,
+                respawn VARCHAR(255),
+                horario_inicio VARCHAR(10),
+                horario_fim VARCHAR(10),
+                integrantes TEXT,
+                detalhe TEXT
+            )
+        """))
+    else:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS audit_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                {_COLUNA_TENANT},
+                momento TEXT NOT NULL,
+                acao TEXT NOT NULL,
+                autor TEXT NOT NULL,
+                registro_id INTEGER,
+                respawn TEXT,
+                horario_inicio TEXT,
+                horario_fim TEXT,
+                integrantes TEXT,
+                detalhe TEXT
+            )
+        """))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_audit_log_tenant_momento ON audit_log (tenant_id, momento)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_audit_log_tenant_respawn_momento ON audit_log (tenant_id, respawn, momento)"
+    ))
+
+
+def _auditar(acao: str, linhas, detalhe: Optional[str] = None) -> None:
+    """
+    Enfileira um evento por linha afetada, (id, respawn, minuto_inicio, minuto_fim, integrantes),
+    na guilda atual. Só memória: a gravação fica com a thread de auditoria.py.
+    """
+    tenant = get_tenant()
+    for registro_id, respawn, minuto_inicio, minuto_fim, integrantes in linhas:
+        auditoria.registrar(
+            acao, tenant, registro_id, respawn,
+            None if minuto_inicio is None else minutos_para_horario(minuto_inicio),
+            None if minuto_fim is None else minutos_para_horario(minuto_fim),
+            integrantes, detalhe,
+        )
+
+
+def gravar_auditoria(eventos: List[auditoria.Evento]) -> int:
+    """Grava eventos de auditoria (de qualquer guilda) num único INSERT de várias linhas."""
+    if not eventos:
+        return 0
+    valores, params = [], {}
+    for i, e in enumerate(eventos):
+        valores.append(
+            f"(:tenant{i}, :momento{i}, :acao{i}, :autor{i}, :registro{i}, :respawn{i}, "
+            f":inicio{i}, :fim{i}, :integrantes{i}, :detalhe{i})"
+        )
+        params.update({
+            f"tenant{i}": e.tenant, f"momento{i}": e.momento, f"acao{i}": e.acao, f"autor{i}": e.autor,
+            f"registro{i}": e.registro_id, f"respawn{i}": e.respawn, f"inicio{i}": e.horario_inicio,
+            f"fim{i}": e.horario_fim, f"integrantes{i}": e.integrantes, f"detalhe{i}": e.detalhe,
+        })
+    engine = get_engine()
+    with engine.connect() as conn:
+        conn.execute(
+            text(f"""
+                INSERT INTO audit_log (tenant_id, momento, acao, autor, registro_id, respawn,
+                    horario_inicio, horario_fim, integrantes, detalhe)
+                VALUES {", ".join(valores)}
+            """),
+            params,
+        )
+        conn.commit()
+    return len(eventos)
+
+
+def get_auditoria(
+    respawn: Optional[str] = None, acao: Optional[str] = None, autor: Optional[str] = None,
+    desde: Optional[str] = None, ate: Optional[str] = None, limite: int = 100,
+) -> List[EventoAuditoria]:
+    """
+    Eventos de auditoria da guilda, do mais recente para o mais antigo, com filtros opcionais
+    (desde/ate: "AAAA-MM-DD[ HH:MM:SS]" em UTC, ate exclusivo). Espera a fila de auditoria
+    gravar o que já foi enfileirado, para a consulta incluir as ações recém-feitas.
+    """
+    auditoria.descarregar()
+    condicoes = ["tenant_id = :tenant"]
+    params: dict = {"tenant": get_tenant(), "limite": limite}
+    if respawn:
+        condicoes.append("respawn = :respawn")
+        params["respawn"] = respawn
+    if acao:
+        condicoes.append("acao = :acao")
+        params["acao"] = acao
+    if autor:
+        condicoes.append("autor = :autor")
+        params["autor"] = autor
+    if desde:
+        condicoes.append("momento >= :desde")
+        params["desde"] = desde
+    if ate:
+        condicoes.append("momento < :ate")
+        params["ate"] = ate
+    engine = get_engine()
+    with engine.connect() as conn:
+        r = conn.execute(
+            text(f"""
+                SELECT {SELECT_AUDITORIA} FROM audit_log WHERE {" AND ".join(condicoes)}
+                ORDER BY momento DESC, id DESC LIMIT :limite
+            """),
+            params,
+        )
+        return [evento_de_linha(row) for row in r]
+
+
+# ========== MÉTRICAS ==========
+# Latência e exceções de cada função pública que vai ao banco (metricas.medir_consulta). Geradores
+# ficam de fora (o tempo medido seria só o da criação), assim como os acessores sem consulta.
+
+_SEM_MEDICAO = {
+    "get_engine", "usar_tenant", "get_tenant", "get_versao_planilhado", "get_connection_status",
+    "postgres_failed", "get_postgres_error_message", "hash_requisicao",
+}
+for _nome, _funcao in list(globals().items()):
+    if (isinstance(_funcao, FunctionType) and _funcao.__module__ == __name__ and not _nome.startswith("_")
+            and _nome not in _SEM_MEDICAO and not isgeneratorfunction(_funcao)):
+        globals()[_nome] = metricas.medir_consulta(_funcao)
+
+metricas.medidor("planilhado_postgres_fallback", "1 quando o PostgreSQL falhou e o app usa SQLite.",
+                 lambda: int(_postgres_failed))
+metricas.medidor("planilhado_requisicoes_pendentes", "Requisições pendentes de aprovação, por guilda.",
+                 count_requisicoes_pendentes_por_tenant, rotulo="guilda")
@@ -0,0 +1,37 @@
+"""
+Linha de comando para as estatísticas de utilização.
+
+    python estatisticas.py rebuild                    # recalcula as tabelas de resumo (todas as guildas)
+    python estatisticas.py mostrar [--guilda minha]   # imprime respawns/horas mais ocupados e top jogadores
+"""
+import argparse
+
+import database
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Estatísticas de utilização do planilhado.")
+    parser.add_argument("comando", choices=["rebuild", "mostrar"])
+    parser.add_argument("--limite", type=int, default=10, help="Quantidade de linhas a mostrar")
+    parser.add_argument("--guilda", default=database.TENANT_PADRAO, help="Guilda (tenant) a mostrar")
+    args = parser.parse_args(argv)
+
+    database.init_db()
+    database.usar_tenant(args.guilda)
+    if args.comando == "rebuild":
+        database.rebuild_estatisticas()
+        print("Estatísticas reconstruídas.")
+        return 0
+
+    linhas = sorted(database.get_estatisticas_respawn_hora(), key=lambda l: l[3], reverse=True)
+    print("Respawn / hora mais ocupados:")
+    for respawn, hora, hunts, minutos in linhas[: args.limite]:
+        print(f"  {respawn:<30} {hora:02d}h  {minutos:>3} min  ({hunts} hunt(s))")
+    print("Jogadores que mais caçam:")
+    for jogador, hunts, minutos in database.get_estatisticas_jogadores(args.limite):
+        print(f"  {jogador:<30} {hunts:>4} hunt(s)  {minutos / 60:.1f} h")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
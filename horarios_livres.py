@@ -0,0 +1,116 @@
+"""
+Busca de horário livre para uma party: em que respawn e a que horas todos os jogadores estão
+livres por `duracao` minutos?
+
+A ocupação dos jogadores (hunts e requisições em qualquer respawn, mais as hunts recorrentes do
+dia) vira um array de 1440 minutos; a dos respawns vem dos bitmaps de ocupação como uma matriz
+respawns x 1440. Os minutos livres para a party em cada respawn são uma operação vetorizada
+sobre a matriz, e as janelas livres saem de uma varredura só (diferenças da matriz dobrada,
+para o dia circular). Cada janela longa o bastante vira um candidato (respawn, início),
+ordenado pela proximidade do horário desejado.
+"""
+from datetime import date
+from typing import Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+import database
+from intervalos import MINUTOS_DIA, dividir_intervalo, minutos_para_horario
+
+MAX_JOGADORES = 5
+
+
+class HorarioLivre(NamedTuple):
+    """Candidato: a party cabe no respawn de minuto_inicio até minuto_inicio + duração."""
+    respawn: str
+    minuto_inicio: int
+    horario_inicio: str
+    horario_fim: str
+    folga: int  # minutos livres que sobram na janela depois da duração pedida
+
+
+def _marcar(ocupado: np.ndarray, minuto_inicio: int, minuto_fim: int) -> None:
+    for a, b in dividir_intervalo(minuto_inicio, minuto_fim):
+        ocupado[a:b] = True
+
+
+def janelas_livres(livre: np.ndarray):
+    """
+    Janelas livres de cada linha de `livre` (matriz bool linhas x 1440) no dia circular.
+    Retorna arrays (linha, inicio, comprimento); uma janela que atravessa a meia-noite começa
+    antes de 1440 e uma linha toda livre vira uma janela de 1440 começando em 0.
+    """
+    linhas = livre.shape[0]
+    borda = np.zeros((linhas, 1), dtype=np.int8)
+    dobrado = np.concatenate([borda, livre, livre, borda], axis=1).astype(np.int8)
+    variacao = np.diff(dobrado, axis=1)
+    linha, inicio = np.nonzero(variacao == 1)
+    _, fim = np.nonzero(variacao == -1)  # mesma ordem (por linha, depois coluna) dos inícios
+    comprimento = np.minimum(fim - inicio, MINUTOS_DIA)
+    toda_livre = livre.all(axis=1)
+    # Fica só uma cópia de cada janela: começando no primeiro dia e, se começa em 0 com o fim do
+    # dia livre, ela é a continuação da janela que atravessa a meia-noite (exceto linha toda livre)
+    manter = (inicio < MINUTOS_DIA) & ~((inicio == 0) & livre[linha, -1] & ~toda_livre[linha])
+    return linha[manter], inicio[manter], comprimento[manter]
+
+
+def ranquear(respawns: List[str], ocupado_respawns: np.ndarray, ocupado_party: np.ndarray,
+             duracao: int, a_partir_de: int = 0, limite: int = 20) -> List[HorarioLivre]:
+    """
+    Candidatos (respawn, início) em que a party cabe por `duracao` minutos, do mais próximo de
+    `a_partir_de` (minuto do dia) para o mais distante; empates preferem a janela com mais folga.
+    """
+    if not respawns or not 0 < duracao <= MINUTOS_DIA:
+        return []
+    livre = ~ocupado_respawns & ~ocupado_party[np.newaxis, :]
+    linha, inicio, comprimento = janelas_livres(livre)
+    cabe = comprimento >= duracao
+    linha, inicio, comprimento = linha[cabe], inicio[cabe], comprimento[cabe]
+
+    # Começa no horário desejado se ele cair dentro da janela com espaço (numa linha toda livre,
+    # sempre); senão, no início dela
+    desloc = (a_partir_de - inicio) % MINUTOS_DIA
+    dentro = (desloc + duracao <= comprimento) | (comprimento >= MINUTOS_DIA)
+    partida = np.where(dentro, (inicio + desloc) % MINUTOS_DIA, inicio)
+    espera = np.where(dentro, 0, (inicio - a_partir_de) % MINUTOS_DIA)
+    folga = np.where(comprimento >= MINUTOS_DIA, MINUTOS_DIA - duracao,
+                     comprimento - duracao - np.where(dentro, desloc, 0))
+
+    ordem = np.lexsort((linha, -folga, espera))[:limite]
+    return [
+        HorarioLivre(
+            respawns[linha[i]], int(partida[i]), minutos_para_horario(int(partida[i])),
+            minutos_para_horario(int(partida[i]) + duracao), int(folga[i]),
+        )
+        for i in ordem
+    ]
+
+
+def buscar_horarios_livres(jogadores: Iterable[str], duracao: int, dia: Optional[date] = None,
+                           a_partir_de: int = 0, limite: int = 20) -> List[HorarioLivre]:
+    """
+    Procura na guilda atual os horários em que todos os `jogadores` (até 5) estão livres por
+    `duracao` minutos e algum respawn também, considerando hunts, requisições pendentes e as
+    hunts recorrentes de `dia` (padrão: hoje).
+    """
+    nomes = [j.strip() for j in jogadores if j and j.strip()][:MAX_JOGADORES]
+    dia = dia or date.today()
+    chaves = {n.lower() for n in nomes}
+
+    ocupado_party = np.zeros(MINUTOS_DIA, dtype=bool)
+    for minuto_inicio, minuto_fim in database.get_intervalos_jogadores(nomes):
+        _marcar(ocupado_party, minuto_inicio, minuto_fim)
+
+    respawns, ocupado_respawns = database.get_matriz_ocupacao(incluir_requisicoes=True)
+    recorrentes = list(database.expandir_recorrentes(dia, dia))
+    novos = sorted({h.respawn for h in recorrentes} - set(respawns))
+    if novos:
+        respawns = respawns + novos
+        ocupado_respawns = np.vstack([ocupado_respawns, np.zeros((len(novos), MINUTOS_DIA), dtype=bool)])
+    indice = {respawn: i for i, respawn in enumerate(respawns)}
+    for h in recorrentes:
+        _marcar(ocupado_respawns[indice[h.respawn]], h.minuto_inicio, h.minuto_fim)
+        if chaves.intersection(n.lower() for n in h.integrantes):
+            _marcar(ocupado_party, h.minuto_inicio, h.minuto_fim)
+
+    return ranquear(respawns, ocupado_respawns, ocupado_party, duracao, a_partir_de, limite)
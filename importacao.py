@@ -0,0 +1,179 @@
+"""
+Importação em lote de hunts a partir de planilha (CSV ou XLSX).
+
+A planilha é lida em colunas (DataFrame), os horários são convertidos de forma vetorizada e a
+validação de overlap faz uma varredura por respawn sobre um array de ocupação de 1440 minutos,
+contra as hunts existentes, as requisições pendentes e as outras linhas da própria planilha; as
+ocorrências das hunts recorrentes no dia do planilhado são checadas à parte, como em
+validators.verificar_overlap. As linhas válidas entram com
+um único executemany (database.insert_hunts_lote); as demais voltam num relatório por linha.
+O pandas só é importado quando uma planilha é lida (fora do caminho de início do app).
+"""
+import unicodedata
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+import database
+import viz
+from intervalos import MINUTOS_DIA, dividir_intervalo, minutos_para_horario
+
+COLUNAS = ["respawn", "horario_inicio", "horario_fim",
+           "integrante1", "integrante2", "integrante3", "integrante4", "integrante5"]
+
+# Cabeçalhos aceitos (já normalizados: minúsculas, sem acento, espaços viram "_")
+ALIASES = {
+    "respawn": "respawn",
+    "resp": "respawn",
+    "horario_inicio": "horario_inicio",
+    "inicio": "horario_inicio",
+    "hora_inicio": "horario_inicio",
+    "horario_fim": "horario_fim",
+    "fim": "horario_fim",
+    "hora_fim": "horario_fim",
+    "integrantes": "integrantes",
+    "party": "integrantes",
+}
+for _i in range(1, 6):
+    ALIASES[f"integrante{_i}"] = f"integrante{_i}"
+    ALIASES[f"integrante_{_i}"] = f"integrante{_i}"
+
+
+def _normalizar_cabecalho(nome) -> str:
+    nome = unicodedata.normalize("NFKD", str(nome)).encode("ascii", "ignore").decode()
+    return "_".join(nome.strip().lower().split())
+
+
+def ler_planilha(arquivo, nome_arquivo: str) -> "pd.DataFrame":
+    """
+    Lê CSV ou XLSX e devolve um DataFrame com as COLUNAS padrão (strings ou None).
+    Aceita uma coluna única "Integrantes" separada por vírgulas no lugar de integrante1..5; a
+    partir do 5º, os nomes ficam juntos em integrante5 e validar_planilha recusa a linha.
+    """
+    import pandas as pd
+    if nome_arquivo.lower().endswith((".xlsx", ".xls")):
+        try:
+            df = pd.read_excel(arquivo, dtype=str)
+        except ImportError:
+            raise ValueError("Para importar .xlsx instale o pacote openpyxl (ou salve a planilha como CSV).")
+    else:
+        df = pd.read_csv(arquivo, dtype=str, sep=None, engine="python")
+
+    df = df.rename(columns=lambda c: ALIASES.get(_normalizar_cabecalho(c), _normalizar_cabecalho(c)))
+    faltando = [c for c in ("respawn", "horario_inicio", "horario_fim") if c not in df.columns]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes na planilha: {', '.join(faltando)}")
+
+    if "integrantes" in df.columns and "integrante1" not in df.columns:
+        partes = df["integrantes"].fillna("").str.split(",", n=4, expand=True)
+        for i in range(5):
+            df[f"integrante{i + 1}"] = partes[i] if i in partes.columns else None
+    for c in COLUNAS:
+        if c not in df.columns:
+            df[c] = None
+    df = df[COLUNAS]
+    df = df.apply(lambda col: col.str.strip()).replace({"": None, np.nan: None})
+    return df
+
+
+def validar_planilha(
+    df: "pd.DataFrame", dia: Optional[date] = None
+) -> Tuple["pd.DataFrame", "pd.DataFrame"]:
+    """
+    Valida todas as linhas de uma vez para o dia do planilhado `dia` (padrão: hoje). Retorna
+    (linhas_validas, relatorio), onde relatorio tem uma linha por linha da planilha com as
+    colunas Linha, Respawn, Horário, Status e Mensagem.
+    """
+    import pandas as pd
+    df = df.reset_index(drop=True)
+    inicio = viz.coluna_em_minutos(df["horario_inicio"])
+    fim = viz.coluna_em_minutos(df["horario_fim"])
+    erro = pd.Series([None] * len(df), dtype=object)
+
+    erro[df["respawn"].isna()] = "Respawn vazio."
+    erro[erro.isna() & (inicio.isna() | fim.isna())] = "Horário inválido (use HH:MM)."
+    erro[erro.isna() & (inicio == fim)] = "O horário final deve ser diferente do horário inicial."
+    # Nomes não vazios separados por vírgula em integrante1..5
+    nomes = sum(df[c].str.count(r"[^,\s][^,]*").fillna(0) for c in COLUNAS[3:])
+    erro[erro.isna() & (nomes > 5)] = "Mais de 5 integrantes."
+
+    # Normalização vetorizada: fim <= início atravessa a meia-noite
+    ini = inicio.fillna(0).astype(int).to_numpy()
+    fi = fim.fillna(0).astype(int).to_numpy()
+    fi = np.where(fi <= ini, fi + MINUTOS_DIA, fi)
+
+    candidatos = df.index[erro.isna()]
+    respawns = sorted(df.loc[candidatos, "respawn"].unique())
+    existentes = {}
+    for row in database.get_intervalos_hunts(respawns):
+        existentes.setdefault(row[1], []).append(
+            row + (f"Conflito com hunt já cadastrada das {row[2]} às {row[3]}.",))
+    for row in database.get_intervalos_requisicoes(respawns):
+        existentes.setdefault(row[1], []).append(
+            row + (f"Conflito com requisição pendente das {row[2]} às {row[3]}.",))
+
+    # Ocorrências recorrentes de ontem, hoje e amanhã em minutos relativos ao dia (ontem < 0): só
+    # as de ontem que atravessam a meia-noite e, para linhas que atravessam, as de amanhã alcançam
+    dia = dia or date.today()
+    recorrentes: Dict[str, List[Tuple[int, int, str]]] = {}
+    alvos = set(respawns)
+    for h in database.expandir_recorrentes(dia - timedelta(days=1), dia + timedelta(days=1)):
+        if h.respawn in alvos:
+            deslocamento = (date.fromisoformat(h.data) - dia).days * MINUTOS_DIA
+            recorrentes.setdefault(h.respawn, []).append((
+                h.minuto_inicio + deslocamento, h.minuto_fim + deslocamento,
+                f"Conflito com hunt recorrente das {h.horario_inicio} às {h.horario_fim}.",
+            ))
+
+    # Uma varredura por respawn: array de donos de cada minuto (-1 livre); rótulos descrevem o dono
+    for respawn, grupo in df.loc[candidatos].groupby("respawn", sort=False):
+        dono = np.full(MINUTOS_DIA, -1, dtype=np.int32)
+        rotulos: List[str] = []
+        for _, _, _, _, m_inicio, m_fim, rotulo in existentes.get(respawn, []):
+            rotulos.append(rotulo)
+            for a, b in dividir_intervalo(m_inicio, m_fim):
+                dono[a:b] = len(rotulos) - 1
+        for idx in grupo.index:
+            segmentos = dividir_intervalo(int(ini[idx]), int(fi[idx]))
+            ocupado = [dono[a:b][dono[a:b] >= 0] for a, b in segmentos]
+            ocupado = [o for o in ocupado if o.size]
+            if ocupado:
+                erro[idx] = rotulos[ocupado[0][0]]
+                continue
+            rotulo = next(
+                (r for a, b, r in recorrentes.get(respawn, []) if a < fi[idx] and b > ini[idx]), None
+            )
+            if rotulo:
+                erro[idx] = rotulo
+                continue
+            rotulos.append(f"Conflito com a linha {idx + 2} da planilha.")
+            for a, b in segmentos:
+                dono[a:b] = len(rotulos) - 1
+
+    validas = df[erro.isna()].copy()
+    validas["horario_inicio"] = [minutos_para_horario(m) for m in ini[validas.index]]
+    validas["horario_fim"] = [minutos_para_horario(m) for m in fi[validas.index]]
+    validas["minuto_inicio"] = ini[validas.index]
+    validas["minuto_fim"] = fi[validas.index]
+
+    relatorio = pd.DataFrame({
+        "Linha": df.index + 2,  # +1 do cabeçalho, +1 porque planilhas começam em 1
+        "Respawn": df["respawn"],
+        "Horário": df["horario_inicio"].fillna("?") + " - " + df["horario_fim"].fillna("?"),
+        "Status": np.where(erro.isna(), "✅ OK", "❌ Erro"),
+        "Mensagem": erro.fillna(""),
+    })
+    return validas, relatorio
+
+
+def importar(validas: "pd.DataFrame") -> int:
+    """Grava as linhas validadas numa única transação. Retorna a quantidade inserida."""
+    linhas = [
+        {k: (int(v) if isinstance(v, np.integer) else v) for k, v in linha.items()}
+        for linha in validas.to_dict("records")
+    ]
+    return database.insert_hunts_lote(linhas)
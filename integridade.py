@@ -0,0 +1,296 @@
+"""
+Verificação de integridade das hunts e requisições de uma guilda, com correções em lote.
+
+    python integridade.py verificar [--guilda minha]
+    python integridade.py corrigir [--guilda minha] [--remover-overlaps] [--lote 500]
+
+Linhas cadastradas direto no Supabase não passam pela verificação de overlap do app. Aqui as duas
+tabelas são lidas juntas em streaming (cursor do lado do servidor), ordenadas por respawn e
+início, e cada respawn passa por uma varredura só (heap dos intervalos ativos, O(n log n) mais o
+número de pares encontrados). A memória acompanha o maior respawn, não o tamanho das tabelas.
+
+Problemas encontrados:
+  - overlap:             dois intervalos do mesmo respawn se sobrepõem (incluindo a meia-noite)
+  - duplicata:           mesma tabela, respawn, horários e integrantes de outra linha (mais antiga)
+  - horario_malformado:  horário fora do formato HH:MM mas legível (ex: "9:00"); corrigível
+  - horario_invalido:    horário ilegível ou intervalo vazio; só à mão
+  - minutos_divergentes: minuto_inicio/minuto_fim não batem com o texto do horário; corrigível
+
+As correções rodam em lotes, cada lote numa transação: horários normalizados, duplicatas
+removidas e, com --remover-overlaps, a hunt mais nova de cada par de hunts sobrepostas sai e a
+requisição que conflita com uma hunt vai para a lista de espera. Overlap entre duas requisições
+é só informado (a triagem resolve). Rode verificar de novo depois de corrigir.
+"""
+import argparse
+import heapq
+import re
+from collections import Counter
+from itertools import groupby
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import text
+
+import database
+from intervalos import MINUTOS_DIA, intervalo_em_minutos
+
+LOTE_PADRAO = 500
+
+OVERLAP = "overlap"
+DUPLICATA = "duplicata"
+HORARIO_MALFORMADO = "horario_malformado"
+HORARIO_INVALIDO = "horario_invalido"
+MINUTOS_DIVERGENTES = "minutos_divergentes"
+TIPOS = (OVERLAP, DUPLICATA, HORARIO_MALFORMADO, HORARIO_INVALIDO, MINUTOS_DIVERGENTES)
+
+# Hunts vêm antes das requisições nos pares: num overlap hunt x requisição, a requisição é a "outra"
+_ORDEM_TABELA = {"hunts": 0, "requisicoes": 1}
+
+_HORARIO_ESTRITO = re.compile(r"^(?:[01]\d|2[0-3]):[0-5]\d$")
+_HORARIO_LEGIVEL = re.compile(r"^\s*(\d{1,2})\s*[:hH.]\s*(\d{2})(?::\d{2})?\s*$")
+
+_SQL_LINHAS = """
+    SELECT '{tabela}' AS tabela, id, respawn, horario_inicio, horario_fim,
+        integrante1, integrante2, integrante3, integrante4, integrante5, minuto_inicio, minuto_fim
+    FROM {tabela} WHERE tenant_id = :tenant
+"""
+
+
+class Problema(NamedTuple):
+    """Um problema numa linha; em overlap e duplicata, `outro_id` é a linha com que ela colide."""
+    tipo: str
+    tabela: str
+    id: int
+    respawn: str
+    detalhe: str
+    outra_tabela: Optional[str] = None
+    outro_id: Optional[int] = None
+    correcao: Optional[Tuple[str, str, int, int]] = None  # horario_inicio, horario_fim, minutos
+
+
+class _Linha(NamedTuple):
+    tabela: str
+    id: int
+    respawn: str
+    horario_inicio: Optional[str]
+    horario_fim: Optional[str]
+    integrantes: Tuple
+    minuto_inicio: Optional[int]
+    minuto_fim: Optional[int]
+
+
+def _normalizar_horario(horario) -> Optional[str]:
+    """'9:00', ' 09h00', '09:00:00' -> '09:00'; None se não der para ler."""
+    m = _HORARIO_LEGIVEL.match(horario) if isinstance(horario, str) else None
+    if not m or int(m.group(1)) > 23 or int(m.group(2)) > 59:
+        return None
+    return f"{int(m.group(1)):02d}:{m.group(2)}"
+
+
+def verificar_horarios(linha: _Linha) -> Optional[Problema]:
+    """Confere o texto dos horários e as colunas de minutos de uma linha."""
+    inicio, fim = _normalizar_horario(linha.horario_inicio), _normalizar_horario(linha.horario_fim)
+    texto = f"{linha.horario_inicio!r} às {linha.horario_fim!r}"
+    if inicio is None or fim is None or inicio == fim:
+        return Problema(HORARIO_INVALIDO, linha.tabela, linha.id, linha.respawn, f"horário ilegível ou vazio: {texto}")
+    minuto_inicio, minuto_fim = intervalo_em_minutos(inicio, fim)
+    correcao = (inicio, fim, minuto_inicio, minuto_fim)
+    if not (_HORARIO_ESTRITO.match(linha.horario_inicio) and _HORARIO_ESTRITO.match(linha.horario_fim)):
+        return Problema(HORARIO_MALFORMADO, linha.tabela, linha.id, linha.respawn,
+                        f"{texto} -> {inicio} às {fim}", correcao=correcao)
+    if (linha.minuto_inicio, linha.minuto_fim) != (minuto_inicio, minuto_fim):
+        return Problema(MINUTOS_DIVERGENTES, linha.tabela, linha.id, linha.respawn,
+                        f"{inicio} às {fim} gravado como minutos {linha.minuto_inicio}-{linha.minuto_fim}",
+                        correcao=correcao)
+    return None
+
+
+def pares_sobrepostos(intervalos: List[Tuple[int, int, Tuple]]) -> Iterator[Tuple[Tuple, Tuple]]:
+    """
+    Todos os pares de um respawn que se sobrepõem no dia circular. `intervalos` são
+    (minuto_inicio, minuto_fim, chave) em ordem de início; cada par sai uma vez, (menor, maior).
+
+    Varredura com heap dos ativos por fim: quem começa depois que um ativo terminou o retira, e
+    os que sobram no heap se sobrepõem ao novo. Uma segunda passada com tudo deslocado +1 dia
+    (a lista continua ordenada) encontra os pares que só colidem através da meia-noite.
+    """
+    ativos: List[Tuple[int, int, Tuple]] = []
+    vistos = set()
+    sequencia = 0
+    for deslocamento in (0, MINUTOS_DIA):
+        for minuto_inicio, minuto_fim, chave in intervalos:
+            minuto_inicio += deslocamento
+            while ativos and ativos[0][0] <= minuto_inicio:
+                heapq.heappop(ativos)
+            for _, _, outra in ativos:
+                par = (outra, chave) if outra < chave else (chave, outra)
+                if outra != chave and par not in vistos:
+                    vistos.add(par)
+                    yield par
+            sequencia += 1
+            heapq.heappush(ativos, (minuto_fim + deslocamento, sequencia, chave))
+
+
+def _linhas_ordenadas(conn, lote: int) -> Iterator[_Linha]:
+    """Hunts e requisições da guilda atual numa só leitura em streaming, por respawn e início."""
+    sql = (
+        _SQL_LINHAS.format(tabela="hunts") + " UNION ALL " + _SQL_LINHAS.format(tabela="requisicoes")
+        + " ORDER BY respawn, minuto_inicio, tabela, id"
+    )
+    resultado = conn.execution_options(stream_results=True, yield_per=lote).execute(
+        text(sql), {"tenant": database.get_tenant()}
+    )
+    for row in resultado:
+        yield _Linha(row[0], row[1], row[2], row[3], row[4], tuple(row[5:10]), row[10], row[11])
+
+
+def _verificar_respawn(linhas: Iterable[_Linha]) -> Iterator[Problema]:
+    """Horários, duplicatas e overlaps das linhas (já ordenadas por início) de um respawn."""
+    intervalos: List[Tuple[int, int, Tuple]] = []
+    horarios: Dict[Tuple, str] = {}
+    assinaturas: Dict[Tuple, int] = {}
+    respawn = None
+    for linha in linhas:
+        respawn = linha.respawn
+        problema = verificar_horarios(linha)
+        if problema is not None:
+            yield problema
+        minutos = (linha.minuto_inicio, linha.minuto_fim)
+        minutos_ok = problema is None or (problema.correcao is not None and problema.correcao[2:] == minutos)
+        if None in minutos or not minutos_ok:
+            continue  # minutos ausentes ou errados: entra na varredura depois de corrigido
+        integrantes = tuple(sorted({i.strip().lower() for i in linha.integrantes if i and i.strip()}))
+        assinatura = (linha.tabela, linha.minuto_inicio, linha.minuto_fim, integrantes)
+        original = assinaturas.get(assinatura)
+        if original is not None:
+            yield Problema(DUPLICATA, linha.tabela, linha.id, linha.respawn,
+                           f"{linha.horario_inicio} às {linha.horario_fim} repete a linha {original}",
+                           linha.tabela, original)
+            continue  # a duplicata não entra na varredura: seria um overlap com a original
+        assinaturas[assinatura] = linha.id
+        chave = (_ORDEM_TABELA[linha.tabela], linha.id)
+        horarios[chave] = f"{linha.horario_inicio} às {linha.horario_fim}"
+        intervalos.append((linha.minuto_inicio, linha.minuto_fim, chave))
+
+    tabelas = {ordem: tabela for tabela, ordem in _ORDEM_TABELA.items()}
+    for a, b in pares_sobrepostos(intervalos):
+        yield Problema(OVERLAP, tabelas[b[0]], b[1], respawn,
+                       f"{horarios[b]} sobrepõe {tabelas[a[0]]} {a[1]} ({horarios[a]})",
+                       tabelas[a[0]], a[1])
+
+
+def verificar(lote: int = LOTE_PADRAO) -> Iterator[Problema]:
+    """
+    Gera os problemas de hunts e requisições da guilda atual, respawn por respawn, sem carregar as
+    tabelas na memória. Em overlap, a linha do problema é a mais nova (ou a requisição) do par.
+    """
+    engine = database.get_engine()
+    with engine.connect() as conn:
+        for _, linhas in groupby(_linhas_ordenadas(conn, lote), key=lambda l: l.respawn):
+            yield from _verificar_respawn(linhas)
+
+
+def resumir(problemas: Iterable[Problema]) -> Dict[str, int]:
+    """Quantidade de problemas por tipo, na ordem de TIPOS."""
+    contagem = Counter(p.tipo for p in problemas)
+    return {tipo: contagem[tipo] for tipo in TIPOS}
+
+
+def _lotes(itens: List, lote: int) -> Iterator[List]:
+    for i in range(0, len(itens), lote):
+        yield itens[i:i + lote]
+
+
+def _corrigir_horarios(problemas: List[Problema], lote: int) -> int:
+    """Grava horários normalizados e minutos recalculados, um lote por transação."""
+    engine = database.get_engine()
+    total = 0
+    for tabela in _ORDEM_TABELA:
+        updates = [
+            {"id": p.id, "tenant": database.get_tenant(), "hi": p.correcao[0], "hf": p.correcao[1],
+             "ini": p.correcao[2], "fim": p.correcao[3]}
+            for p in problemas if p.tabela == tabela
+        ]
+        for parte in _lotes(updates, lote):
+            with engine.connect() as conn:
+                conn.execute(
+                    text(f"""
+                        UPDATE {tabela} SET horario_inicio = :hi, horario_fim = :hf,
+                            minuto_inicio = :ini, minuto_fim = :fim
+                        WHERE tenant_id = :tenant AND id = :id
+                    """),
+                    parte,
+                )
+                conn.commit()
+            total += len(parte)
+    return total
+
+
+def corrigir(problemas: Iterable[Problema], remover_overlaps: bool = False,
+             lote: int = LOTE_PADRAO) -> Dict[str, int]:
+    """
+    Aplica as correções automáticas aos `problemas` (de verificar(), na guilda atual), em lotes
+    transacionais. Horários e duplicatas sempre; overlaps só com remover_overlaps: sai a hunt mais
+    nova de cada par de hunts e a requisição que conflita com uma hunt vai para a lista de espera.
+    Retorna quantas linhas cada correção afetou.
+    """
+    problemas = list(problemas)
+    horarios = [p for p in problemas if p.correcao is not None]
+    hunts_removidas = {p.id for p in problemas if p.tipo == DUPLICATA and p.tabela == "hunts"}
+    requisicoes_removidas = {p.id for p in problemas if p.tipo == DUPLICATA and p.tabela == "requisicoes"}
+    para_espera = set()
+    if remover_overlaps:
+        overlaps = [p for p in problemas if p.tipo == OVERLAP and p.outra_tabela == "hunts"]
+        # Primeiro os pares de hunts: uma requisição só vai para a espera se a hunt com que
+        # conflita continuar
+        for p in sorted(overlaps, key=lambda p: _ORDEM_TABELA[p.tabela]):
+            if p.outro_id in hunts_removidas:
+                continue
+            if p.tabela == "hunts":
+                hunts_removidas.add(p.id)
+            elif p.id not in requisicoes_removidas:
+                para_espera.add(p.id)
+
+    resultado = {"horarios": 0, "hunts_removidas": 0, "requisicoes_removidas": 0, "para_espera": 0}
+    if horarios:
+        resultado["horarios"] = _corrigir_horarios(horarios, lote)
+        # Escrita direta: estatísticas e bitmaps são recalculados a partir das tabelas
+        database.rebuild_estatisticas()
+        database.invalidar_ocupacao()
+    for parte in _lotes(sorted(hunts_removidas), lote):
+        resultado["hunts_removidas"] += database.delete_hunts(parte)
+    # Rejeitar em lote = remover da tabela de requisições (com lista de espera, se pedido)
+    for parte in _lotes(sorted(requisicoes_removidas), lote):
+        resultado["requisicoes_removidas"] += database.aprovar_requisicoes([], parte)[1]
+    for parte in _lotes(sorted(para_espera), lote):
+        resultado["para_espera"] += database.aprovar_requisicoes([], parte, rejeitadas_para_espera=True)[1]
+    return resultado
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Integridade das hunts e requisições do planilhado.")
+    parser.add_argument("comando", choices=["verificar", "corrigir"])
+    parser.add_argument("--guilda", default=database.TENANT_PADRAO, help="Guilda (tenant) a verificar")
+    parser.add_argument("--lote", type=int, default=LOTE_PADRAO, help="Linhas por leitura/transação")
+    parser.add_argument("--remover-overlaps", action="store_true",
+                        help="Remove a hunt mais nova de cada overlap e manda requisições em conflito para a espera")
+    parser.add_argument("--limite", type=int, default=50, help="Problemas a listar (0 = todos)")
+    args = parser.parse_args(argv)
+
+    database.init_db()
+    database.usar_tenant(args.guilda)
+    problemas = []
+    for problema in verificar(args.lote):
+        if not args.limite or len(problemas) < args.limite:
+            print(f"  [{problema.tipo}] {problema.tabela} {problema.id} · {problema.respawn}: {problema.detalhe}")
+        problemas.append(problema)
+    resumo = resumir(problemas)
+    print("Resumo: " + ", ".join(f"{tipo} {n}" for tipo, n in resumo.items()))
+
+    if args.comando == "corrigir" and problemas:
+        resultado = corrigir(problemas, args.remover_overlaps, args.lote)
+        print("Corrigido: " + ", ".join(f"{k} {n}" for k, n in resultado.items()))
+    return 1 if problemas and args.comando == "verificar" else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
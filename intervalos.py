@@ -0,0 +1,98 @@
+"""
+Aritmética de intervalos de horário em minutos.
+
+Um intervalo é guardado como (minuto_inicio, minuto_fim), com minuto_inicio em [0, 1440)
+e minuto_fim em (minuto_inicio, minuto_inicio + 1440]. Hunts que atravessam a meia-noite
+(ex: 23:00 às 02:00) ficam com minuto_fim > 1440, então nenhuma comparação precisa de
+casos especiais: basta testar o intervalo deslocado de -1 dia, 0 e +1 dia.
+"""
+from typing import Dict, Iterable, List, Tuple
+
+MINUTOS_DIA = 24 * 60
+MINUTOS_SEMANA = 7 * MINUTOS_DIA
+
+# Dias da semana na ordem de date.weekday(); o bit i da máscara corresponde a DIAS_SEMANA[i]
+DIAS_SEMANA = ("Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom")
+TODOS_OS_DIAS = (1 << 7) - 1
+
+
+def horario_para_minutos(horario: str) -> int:
+    """Converte horário no formato HH:MM para minutos desde meia-noite."""
+    horas, minutos = map(int, horario.split(':'))
+    return horas * 60 + minutos
+
+
+def minutos_para_horario(minutos: int) -> str:
+    """Converte minutos (qualquer valor) para HH:MM dentro do dia."""
+    minutos %= MINUTOS_DIA
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+
+def normalizar_intervalo(inicio: int, fim: int) -> Tuple[int, int]:
+    """
+    Normaliza um par de minutos do dia. Se fim <= inicio, o intervalo atravessa a
+    meia-noite e fim recebe +1440. Intervalos vazios (inicio == fim) viram ValueError.
+    """
+    inicio %= MINUTOS_DIA
+    fim %= MINUTOS_DIA
+    if fim == inicio:
+        raise ValueError("Intervalo vazio: horário inicial igual ao final.")
+    if fim < inicio:
+        fim += MINUTOS_DIA
+    return inicio, fim
+
+
+def intervalo_em_minutos(horario_inicio: str, horario_fim: str) -> Tuple[int, int]:
+    """Converte um par HH:MM em (minuto_inicio, minuto_fim) normalizado."""
+    return normalizar_intervalo(
+        horario_para_minutos(horario_inicio), horario_para_minutos(horario_fim)
+    )
+
+
+def sobrepoem(a_inicio: int, a_fim: int, b_inicio: int, b_fim: int, periodo: int = MINUTOS_DIA) -> bool:
+    """
+    Dois intervalos normalizados se sobrepõem se A1 < B2 AND A2 > B1 para algum
+    deslocamento de B em -1 período, 0 ou +1 período (dia, ou semana para minutos-da-semana).
+    """
+    for d in (0, -periodo, periodo):
+        if a_inicio < b_fim + d and a_fim > b_inicio + d:
+            return True
+    return False
+
+
+def dividir_intervalo(inicio: int, fim: int) -> List[Tuple[int, int]]:
+    """Divide um intervalo normalizado em segmentos que não atravessam a meia-noite."""
+    if fim <= MINUTOS_DIA:
+        return [(inicio, fim)]
+    return [(inicio, MINUTOS_DIA), (0, fim - MINUTOS_DIA)]
+
+
+def minutos_por_hora(inicio: int, fim: int) -> Dict[int, int]:
+    """Retorna {hora: minutos ocupados naquela hora do dia} para um intervalo normalizado."""
+    buckets: Dict[int, int] = {}
+    for a, b in dividir_intervalo(inicio, fim):
+        m = a
+        while m < b:
+            hora = m // 60
+            proxima = min(b, (hora + 1) * 60)
+            buckets[hora] = buckets.get(hora, 0) + proxima - m
+            m = proxima
+    return buckets
+
+
+def mascara_dias(dias: Iterable[int]) -> int:
+    """Converte índices de date.weekday() (0 = segunda) em máscara de bits."""
+    mascara = 0
+    for d in dias:
+        mascara |= 1 << d
+    return mascara
+
+
+def dias_da_mascara(mascara: int) -> List[int]:
+    """Inverso de mascara_dias."""
+    return [d for d in range(7) if mascara & (1 << d)]
+
+
+def intervalos_da_semana(mascara: int, inicio: int, fim: int) -> List[Tuple[int, int]]:
+    """Ocorrências de um intervalo diário nos dias da máscara, em minutos-da-semana."""
+    return [(d * MINUTOS_DIA + inicio, d * MINUTOS_DIA + fim) for d in dias_da_mascara(mascara)]
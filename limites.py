@@ -0,0 +1,39 @@
+"""
+Limite de taxa por sessão (token bucket) para ações abertas ao público, como submeter requisição.
+"""
+import time
+
+
+class BaldeDeTokens:
+    """
+    Token bucket: começa cheio com `capacidade` tokens e recupera `recarga_por_segundo` tokens
+    por segundo até a capacidade. Cada ação consome um token; sem token, a ação é recusada.
+    """
+
+    __slots__ = ("capacidade", "recarga_por_segundo", "tokens", "atualizado_em")
+
+    def __init__(self, capacidade: int, recarga_por_segundo: float):
+        self.capacidade = capacidade
+        self.recarga_por_segundo = recarga_por_segundo
+        self.tokens = float(capacidade)
+        self.atualizado_em = time.monotonic()
+
+    def _recarregar(self) -> None:
+        agora = time.monotonic()
+        self.tokens = min(self.capacidade, self.tokens + (agora - self.atualizado_em) * self.recarga_por_segundo)
+        self.atualizado_em = agora
+
+    def consumir(self) -> bool:
+        """Consome um token se houver. Retorna False quando o limite foi atingido."""
+        self._recarregar()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def segundos_para_proximo(self) -> float:
+        """Quanto falta para haver um token disponível (0 se já houver)."""
+        self._recarregar()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.recarga_por_segundo
@@ -0,0 +1,331 @@
+"""
+Métricas da camada de dados no formato texto do Prometheus (text exposition format 0.0.4).
+
+Contadores, histogramas e medidores (gauges lidos na hora da coleta) ficam num registro em
+memória do processo. texto() gera a exposição sem rede; servir() a publica em /metrics num
+servidor HTTP local numa thread daemon:
+
+    import metricas
+    metricas.servir(9108)        # curl http://127.0.0.1:9108/metrics
+
+No app, basta definir METRICAS_PORTA (variável de ambiente ou secrets). Só a biblioteca padrão.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+# Segundos; mesmos limites padrão dos clientes oficiais do Prometheus
+BALDES_PADRAO = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_Rotulos = Tuple[Tuple[str, str], ...]
+
+_lock = threading.Lock()
+_registro: Dict[str, "_Metrica"] = {}  # nome -> métrica, na ordem de registro
+
+
+def _chave(rotulos: dict) -> _Rotulos:
+    return tuple(sorted((k, str(v)) for k, v in rotulos.items()))
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatar_rotulos(chave: _Rotulos, extra: _Rotulos = ()) -> str:
+    pares = chave + extra
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in pares) + "}"
+
+
+def _numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if valor != int(valor) else str(int(valor))
+
+
+class _Metrica:
+    tipo = "untyped"
+
+    def __init__(self, nome: str, ajuda: str):
+        self.nome = nome
+        self.ajuda = ajuda
+
+    def _amostras(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def exposicao(self) -> List[str]:
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} {self.tipo}"]
+        linhas.extend(self._amostras())
+        return linhas
+
+
+class Contador(_Metrica):
+    """Contador monotônico, com rótulos opcionais: contador.inc(funcao="get_respawns")."""
+    tipo = "counter"
+
+    def __init__(self, nome: str, ajuda: str):
+        super().__init__(nome, ajuda)
+        self._valores: Dict[_Rotulos, float] = {}
+
+    def inc(self, valor: float = 1.0, **rotulos) -> None:
+        chave = _chave(rotulos)
+        with _lock:
+            self._valores[chave] = self._valores.get(chave, 0.0) + valor
+
+    def valor(self, **rotulos) -> float:
+        return self._valores.get(_chave(rotulos), 0.0)
+
+    def _amostras(self) -> Iterator[str]:
+        with _lock:
+            itens = sorted(self._valores.items())
+        for chave, valor in itens:
+            yield f"{self.nome}{_formatar_rotulos(chave)} {_numero(valor)}"
+
+
+class Histograma(_Metrica):
+    """Histograma de durações (segundos) com baldes fixos, _sum e _count por combinação de rótulos."""
+    tipo = "histogram"
+
+    def __init__(self, nome: str, ajuda: str, baldes: Tuple[float, ...] = BALDES_PADRAO):
+        super().__init__(nome, ajuda)
+        self.baldes = tuple(sorted(baldes))
+        # chave -> [contagem por balde (não acumulada) ..., acima do último, soma]
+        self._series: Dict[_Rotulos, List[float]] = {}
+
+    def observar(self, valor: float, **rotulos) -> None:
+        chave = _chave(rotulos)
+        with _lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [0] * (len(self.baldes) + 1) + [0.0]
+            serie[bisect_left(self.baldes, valor)] += 1
+            serie[-1] += valor
+
+    @contextmanager
+    def cronometrar(self, **rotulos):
+        """with histograma.cronometrar(funcao=...): observa a duração do bloco, mesmo com exceção."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, **rotulos)
+
+    def contagem(self, **rotulos) -> int:
+        serie = self._series.get(_chave(rotulos))
+        return int(sum(serie[:-1])) if serie else 0
+
+    def _amostras(self) -> Iterator[str]:
+        with _lock:
+            itens = sorted((chave, list(serie)) for chave, serie in self._series.items())
+        for chave, serie in itens:
+            acumulado = 0
+            for limite, n in zip(self.baldes + (float("inf"),), serie[:-1]):
+                acumulado += n
+                yield f"{self.nome}_bucket{_formatar_rotulos(chave, (('le', _numero(limite)),))} {acumulado}"
+            yield f"{self.nome}_sum{_formatar_rotulos(chave)} {_numero(serie[-1])}"
+            yield f"{self.nome}_count{_formatar_rotulos(chave)} {acumulado}"
+
+
+class Medidor(_Metrica):
+    """
+    Gauge calculado na coleta: `funcao()` retorna um número, ou {valor_do_rotulo: número} quando
+    `rotulo` é informado. Se a função falhar, a métrica é omitida dessa coleta.
+    """
+    tipo = "gauge"
+
+    def __init__(self, nome: str, ajuda: str, funcao: Callable[[], Union[float, Dict[str, float]]],
+                 rotulo: Optional[str] = None):
+        super().__init__(nome, ajuda)
+        self.funcao = funcao
+        self.rotulo = rotulo
+
+    def exposicao(self) -> List[str]:
+        try:
+            return super().exposicao()
+        except Exception:
+            return []
+
+    def _amostras(self) -> Iterator[str]:
+        valor = self.funcao()
+        if self.rotulo is None:
+            return iter([f"{self.nome} {_numero(valor)}"])
+        return iter([
+            f"{self.nome}{_formatar_rotulos(((self.rotulo, str(k)),))} {_numero(v)}"
+            for k, v in sorted(valor.items())
+        ])
+
+
+def _registrar(metrica: _Metrica) -> _Metrica:
+    with _lock:
+        existente = _registro.get(metrica.nome)
+        if existente is not None and type(existente) is type(metrica) and not isinstance(metrica, Medidor):
+            return existente
+        _registro[metrica.nome] = metrica  # Medidor: o mais recente substitui (ex: engine recriado)
+        return metrica
+
+
+def contador(nome: str, ajuda: str) -> Contador:
+    return _registrar(Contador(nome, ajuda))
+
+
+def histograma(nome: str, ajuda: str, baldes: Tuple[float, ...] = BALDES_PADRAO) -> Histograma:
+    return _registrar(Histograma(nome, ajuda, baldes))
+
+
+def medidor(nome: str, ajuda: str, funcao: Callable[[], Union[float, Dict[str, float]]],
+            rotulo: Optional[str] = None) -> Medidor:
+    return _registrar(Medidor(nome, ajuda, funcao, rotulo))
+
+
+def texto() -> str:
+    """Exposição de todas as métricas registradas, no formato texto do Prometheus."""
+    with _lock:
+        metricas = list(_registro.values())
+    linhas = []
+    for metrica in metricas:
+        linhas.extend(metrica.exposicao())
+    return "\n".join(linhas) + "\n"
+
+
+# ========== MÉTRICAS DA CAMADA DE DADOS ==========
+
+LATENCIA_CONSULTA = histograma(
+    "planilhado_db_consulta_segundos",
+    "Duração das funções públicas de database.py chamadas de fora; chamadas aninhadas contam só na externa.",
+)
+ERROS_CONSULTA = contador("planilhado_db_erros_total", "Exceções levantadas pelas funções de database.py, por tipo.")
+CHECKOUTS_POOL = contador("planilhado_pool_checkouts_total", "Conexões retiradas do pool do engine.")
+ESPERA_POOL = histograma("planilhado_pool_espera_segundos", "Tempo dentro de engine.connect() esperando uma conexão.")
+TIMEOUTS_POOL = contador("planilhado_pool_timeouts_total", "engine.connect() que estouraram o timeout do pool.")
+CONSULTAS_CACHE = contador("planilhado_cache_consultas_total", "Leituras de cache (bitmaps de ocupação, linha do tempo).")
+FALHAS_CACHE = contador("planilhado_cache_falhas_total", "Leituras de cache que precisaram recalcular (misses).")
+LATENCIA_OVERLAP = histograma("planilhado_overlap_segundos", "Duração das verificações de overlap de validators.py.")
+
+
+# True enquanto uma função medida por medir_consulta roda neste contexto (thread)
+_em_consulta: ContextVar[bool] = ContextVar("planilhado_em_consulta", default=False)
+
+
+def medir_consulta(funcao: Callable) -> Callable:
+    """
+    Decorator: latência em LATENCIA_CONSULTA e exceções em ERROS_CONSULTA, rotuladas pela função.
+    Só a chamada mais externa é medida (get_utilizacao_respawns chama get_matriz_ocupacao, por
+    exemplo), para que o mesmo tempo não seja contado duas vezes.
+    """
+    nome = funcao.__name__
+
+    @wraps(funcao)
+    def medida(*args, **kwargs):
+        if _em_consulta.get():
+            return funcao(*args, **kwargs)
+        token = _em_consulta.set(True)
+        try:
+            with LATENCIA_CONSULTA.cronometrar(funcao=nome):
+                return funcao(*args, **kwargs)
+        except Exception as e:
+            ERROS_CONSULTA.inc(funcao=nome, erro=type(e).__name__)
+            raise
+        finally:
+            _em_consulta.reset(token)
+
+    return medida
+
+
+def medir_overlap(funcao: Callable) -> Callable:
+    """Decorator: latência da verificação de overlap em LATENCIA_OVERLAP."""
+    nome = funcao.__name__
+
+    @wraps(funcao)
+    def medida(*args, **kwargs):
+        with LATENCIA_OVERLAP.cronometrar(funcao=nome):
+            return funcao(*args, **kwargs)
+
+    return medida
+
+
+def cache(nome: str, falha: bool) -> None:
+    """Registra uma leitura do cache `nome` (falha=True quando precisou recalcular)."""
+    CONSULTAS_CACHE.inc(cache=nome)
+    if falha:
+        FALHAS_CACHE.inc(cache=nome)
+
+
+def instrumentar_engine(engine) -> None:
+    """
+    Mede o pool do engine: checkouts (evento do pool), espera e timeouts em engine.connect(), e
+    medidores de conexões em uso e em overflow lidos do pool na coleta.
+    """
+    from sqlalchemy import event
+    from sqlalchemy.exc import TimeoutError as TimeoutPool
+
+    event.listen(engine.pool, "checkout", lambda *_: CHECKOUTS_POOL.inc())
+    connect_original = engine.connect
+
+    def connect_medido():
+        inicio = time.perf_counter()
+        try:
+            return connect_original()
+        except TimeoutPool:
+            TIMEOUTS_POOL.inc()
+            raise
+        finally:
+            ESPERA_POOL.observar(time.perf_counter() - inicio)
+
+    engine.connect = connect_medido
+    pool = engine.pool
+    if hasattr(pool, "checkedout"):
+        medidor("planilhado_pool_conexoes_em_uso", "Conexões do pool em uso agora.", pool.checkedout)
+    if hasattr(pool, "overflow"):
+        medidor("planilhado_pool_overflow", "Conexões além de pool_size abertas agora (negativo: pool não cheio).",
+                pool.overflow)
+
+
+# ========== SERVIDOR HTTP ==========
+
+_servidor: Optional[ThreadingHTTPServer] = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        corpo = texto().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def servir(porta: int = 9108, endereco: str = "127.0.0.1") -> int:
+    """
+    Sobe (uma vez por processo) o servidor de /metrics numa thread daemon. Retorna a porta em uso
+    (porta=0 escolhe uma livre). Chamadas seguintes reaproveitam o servidor já aberto.
+    """
+    global _servidor
+    with _lock:
+        if _servidor is None:
+            _servidor = ThreadingHTTPServer((endereco, porta), _Handler)
+            _servidor.daemon_threads = True
+            threading.Thread(target=_servidor.serve_forever, name="metricas-http", daemon=True).start()
+        return _servidor.server_address[1]
+
+
+def parar() -> None:
+    """Encerra o servidor de /metrics, se aberto."""
+    global _servidor
+    with _lock:
+        if _servidor is not None:
+            _servidor.shutdown()
+            _servidor.server_close()
+            _servidor = None
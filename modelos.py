@@ -0,0 +1,149 @@
+"""
+Registros tipados devolvidos pela camada de banco.
+
+Hunt, Requisicao e HuntRecorrente são NamedTuples (sem __dict__ por instância) com os minutos
+já normalizados vindos do banco e os integrantes como tupla só com os nomes preenchidos. As
+funções *_de_linha montam o registro direto da Row do SQLAlchemy, na ordem das colunas
+SELECT_* abaixo. Para resultados grandes, Colunas guarda o mesmo conteúdo por coluna.
+EventoAuditoria é uma linha do log de auditoria (ver auditoria.py).
+"""
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+MAX_INTEGRANTES = 5
+
+_COLUNAS_INTEGRANTES = "integrante1, integrante2, integrante3, integrante4, integrante5"
+
+# Ordem das colunas esperada pelas funções *_de_linha
+SELECT_HUNT = f"id, respawn, horario_inicio, horario_fim, {_COLUNAS_INTEGRANTES}, data_cadastro, minuto_inicio, minuto_fim"
+SELECT_REQUISICAO = f"id, respawn, horario_inicio, horario_fim, {_COLUNAS_INTEGRANTES}, data_requisicao, minuto_inicio, minuto_fim"
+SELECT_RECORRENTE = f"id, respawn, horario_inicio, horario_fim, {_COLUNAS_INTEGRANTES}, dias_semana, minuto_inicio, minuto_fim"
+# Pedidos da lista de espera usam o registro Requisicao (data_requisicao = entrada na fila)
+SELECT_ESPERA = f"id, respawn, horario_inicio, horario_fim, {_COLUNAS_INTEGRANTES}, data_entrada, minuto_inicio, minuto_fim"
+SELECT_AUDITORIA = "id, momento, acao, autor, registro_id, respawn, horario_inicio, horario_fim, integrantes, detalhe"
+
+
+class Hunt(NamedTuple):
+    """
+    Hunt cadastrada, ou ocorrência de hunt recorrente (id None, data = dia da ocorrência e
+    recorrente_id = modelo de origem).
+    """
+    id: Optional[int]
+    respawn: str
+    horario_inicio: str
+    horario_fim: str
+    integrantes: Tuple[str, ...]
+    data: Optional[str]
+    minuto_inicio: int
+    minuto_fim: int
+    recorrente_id: Optional[int] = None
+
+
+class Requisicao(NamedTuple):
+    """Requisição pendente de aprovação."""
+    id: int
+    respawn: str
+    horario_inicio: str
+    horario_fim: str
+    integrantes: Tuple[str, ...]
+    data_requisicao: Optional[str]
+    minuto_inicio: int
+    minuto_fim: int
+
+
+class HuntRecorrente(NamedTuple):
+    """Modelo de hunt recorrente; dias_semana é a máscara de intervalos.mascara_dias."""
+    id: int
+    respawn: str
+    horario_inicio: str
+    horario_fim: str
+    integrantes: Tuple[str, ...]
+    dias_semana: int
+    minuto_inicio: int
+    minuto_fim: int
+
+
+class EventoAuditoria(NamedTuple):
+    """Linha do audit_log: uma mudança feita por `autor` (momento em UTC)."""
+    id: int
+    momento: str
+    acao: str
+    autor: str
+    registro_id: Optional[int]
+    respawn: Optional[str]
+    horario_inicio: Optional[str]
+    horario_fim: Optional[str]
+    integrantes: Optional[str]
+    detalhe: Optional[str]
+
+
+def _integrantes(a, b, c, d, e) -> Tuple[str, ...]:
+    return tuple(n.strip() for n in (a, b, c, d, e) if n and n.strip())
+
+
+def hunt_de_linha(row) -> Hunt:
+    """Monta uma Hunt de uma linha na ordem de SELECT_HUNT."""
+    return Hunt(row[0], row[1], row[2], row[3], _integrantes(*row[4:9]),
+                None if row[9] is None else str(row[9]), row[10], row[11])
+
+
+def requisicao_de_linha(row) -> Requisicao:
+    """Monta uma Requisicao de uma linha na ordem de SELECT_REQUISICAO."""
+    return Requisicao(row[0], row[1], row[2], row[3], _integrantes(*row[4:9]),
+                      None if row[9] is None else str(row[9]), row[10], row[11])
+
+
+def recorrente_de_linha(row) -> HuntRecorrente:
+    """Monta um HuntRecorrente de uma linha na ordem de SELECT_RECORRENTE."""
+    return HuntRecorrente(row[0], row[1], row[2], row[3], _integrantes(*row[4:9]), row[9], row[10], row[11])
+
+
+def evento_de_linha(row) -> EventoAuditoria:
+    """Monta um EventoAuditoria de uma linha na ordem de SELECT_AUDITORIA."""
+    return EventoAuditoria(row[0], str(row[1]), *row[2:10])
+
+
+def colunas_integrantes(integrantes: Iterable[str]) -> Dict[str, Optional[str]]:
+    """{"integrante1": ..., ..., "integrante5": ...} para as funções de escrita do banco."""
+    nomes = list(integrantes)[:MAX_INTEGRANTES]
+    nomes += [None] * (MAX_INTEGRANTES - len(nomes))
+    return {f"integrante{i + 1}": nome for i, nome in enumerate(nomes)}
+
+
+def texto_integrantes(integrantes: Tuple[str, ...], vazio: str = "-") -> str:
+    return ", ".join(integrantes) if integrantes else vazio
+
+
+def chave_horario(registro) -> Tuple:
+    """
+    Chave de ordenação por horário de Hunt/Requisicao. Linhas sem minutos (horário fora do
+    padrão, cadastrado direto no Supabase) vão para o fim, pelo texto do horário.
+    """
+    return (registro.minuto_inicio is None, registro.minuto_inicio or 0, registro.horario_inicio)
+
+
+class Colunas(NamedTuple):
+    """
+    Forma colunar de uma lista de Hunt/Requisicao: uma lista (ou array de minutos) por campo,
+    pronta para virar DataFrame sem percorrer os registros de novo.
+    """
+    id: List[Optional[int]]
+    respawn: List[str]
+    horario_inicio: List[str]
+    horario_fim: List[str]
+    integrantes: List[Tuple[str, ...]]
+    minuto_inicio: np.ndarray
+    minuto_fim: np.ndarray
+
+
+def em_colunas(registros) -> Colunas:
+    """Transpõe registros Hunt/Requisicao para Colunas."""
+    if not registros:
+        vazio = np.zeros(0, dtype=np.int32)
+        return Colunas([], [], [], [], [], vazio, vazio.copy())
+    ids, respawns, inicios, fins, integrantes, _, m_ini, m_fim = list(zip(*registros))[:8]
+    return Colunas(
+        list(ids), list(respawns), list(inicios), list(fins), list(integrantes),
+        np.asarray(m_ini, dtype=np.int32), np.asarray(m_fim, dtype=np.int32),
+    )
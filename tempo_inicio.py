@@ -0,0 +1,88 @@
+"""
+Benchmark do início a frio do app: cada repetição roda num interpretador novo, como um app que
+acabou de acordar no Streamlit Cloud.
+
+    python tempo_inicio.py                 # 5 repetições contra o banco configurado
+    python tempo_inicio.py --repeticoes 10 --database-url postgresql://...
+
+Fases medidas (mediana e máximo, em ms):
+  - import_app:        importar app.py e seus módulos (sem executar a página)
+  - aquecimento:       engine + teste de conexão + init_db() (database.Aquecimento)
+  - primeira_execucao: primeira execução completa da página (Streamlit AppTest)
+  - rerun:             segunda execução, com engine, caches e módulos quentes
+Também informa se o pandas foi carregado só pelo import (não deveria).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+FASES = ("import_app", "aquecimento", "primeira_execucao", "rerun")
+
+
+def _medir() -> dict:
+    """Roda no processo filho: mede as fases e devolve os tempos em segundos."""
+    inicio = time.perf_counter()
+    import app  # noqa: F401
+    tempos = {"import_app": time.perf_counter() - inicio, "pandas_no_import": "pandas" in sys.modules}
+
+    import database
+    aquecimento = database.Aquecimento()
+    aquecimento.pronto.wait()
+    if aquecimento.erro is not None:
+        raise aquecimento.erro
+    tempos["aquecimento"] = aquecimento.segundos
+
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(APP, default_timeout=120)
+    for fase in ("primeira_execucao", "rerun"):
+        inicio = time.perf_counter()
+        at.run()
+        tempos[fase] = time.perf_counter() - inicio
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return tempos
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark do início a frio do planilhado.")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--database-url", help="Banco a usar (sobrepõe DATABASE_URL)")
+    parser.add_argument("--filho", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.filho:
+        print(json.dumps(_medir()))
+        return 0
+
+    env = dict(os.environ)
+    if args.database_url:
+        env["DATABASE_URL"] = args.database_url
+    resultados = []
+    for i in range(args.repeticoes):
+        saida = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--filho"],
+            env=env, capture_output=True, text=True,
+        )
+        if saida.returncode != 0:
+            print(saida.stderr.strip().splitlines()[-1] if saida.stderr.strip() else "falhou", file=sys.stderr)
+            return 1
+        resultados.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+        print(f"  repetição {i + 1}/{args.repeticoes}: "
+              + ", ".join(f"{f} {resultados[-1][f] * 1000:.0f}ms" for f in FASES))
+
+    print(f"\n  {'fase':<20}{'mediana':>10}{'máx':>10}   (ms, {args.repeticoes} processos novos)")
+    for fase in FASES:
+        valores = [r[fase] * 1000 for r in resultados]
+        print(f"  {fase:<20}{statistics.median(valores):>10.0f}{max(valores):>10.0f}")
+    carregou = sum(r["pandas_no_import"] for r in resultados)
+    print(f"\n  pandas carregado no import: {'sim' if carregou else 'não'}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
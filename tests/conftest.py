@@ -0,0 +1,48 @@
+"""
+Fixtures dos testes: cada teste que usa `banco` roda num SQLite novo em tmp_path (o app grava
+em data/planilhado.db relativo ao diretório atual), com init_db() já aplicado.
+"""
+import pytest
+from sqlalchemy import text
+
+import auditoria
+import database
+
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    monkeypatch.setattr(database, "_get_database_url", lambda: None)
+    database._engine = None
+    database.usar_tenant(database.TENANT_PADRAO)
+    database.invalidar_ocupacao()
+    database.init_db()
+    yield database
+    # O gravador da auditoria usa o engine; esvazia a fila antes de trocar de banco
+    auditoria.descarregar()
+    database.get_engine().dispose()
+    database._engine = None
+    database.invalidar_ocupacao()
+
+
+def inserir_linha(tabela: str, respawn: str, horario_inicio: str, horario_fim: str,
+                  minuto_inicio, minuto_fim, integrante1: str = "Fulano") -> int:
+    """
+    Insere direto por SQL, sem as validações de database.insert_*: é assim que chegam as linhas
+    cadastradas à mão no Supabase (horário fora do padrão, minutos nulos ou divergentes).
+    """
+    coluna_data = "data_cadastro" if tabela == "hunts" else "data_requisicao"
+    with database.get_engine().connect() as conn:
+        conn.execute(
+            text(f"""
+                INSERT INTO {tabela} (tenant_id, respawn, horario_inicio, horario_fim, integrante1,
+                    minuto_inicio, minuto_fim, {coluna_data})
+                VALUES (:tenant, :respawn, :hi, :hf, :i1, :mi, :mf, CURRENT_TIMESTAMP)
+            """),
+            {"tenant": database.get_tenant(), "respawn": respawn, "hi": horario_inicio,
+             "hf": horario_fim, "i1": integrante1, "mi": minuto_inicio, "mf": minuto_fim},
+        )
+        novo_id = conn.execute(text(f"SELECT MAX(id) FROM {tabela}")).scalar()
+        conn.commit()
+    return novo_id
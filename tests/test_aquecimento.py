@@ -0,0 +1,45 @@
+import os
+import threading
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import database
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+@pytest.fixture
+def banco_travado(banco, monkeypatch):
+    """init_db que só termina quando o teste libera (banco que não responde)."""
+    liberar = threading.Event()
+    monkeypatch.setattr(database, "init_db", lambda: liberar.wait(10))
+    st.cache_resource.clear()
+    yield liberar
+    liberar.set()
+    st.cache_resource.clear()
+
+
+def test_esperar_respeita_o_timeout(banco_travado):
+    aquecimento = database.Aquecimento()
+    assert not aquecimento.esperar(0.05)
+    banco_travado.set()
+    assert aquecimento.esperar(5)
+    assert aquecimento.erro is None
+
+
+def test_app_mostra_erro_quando_o_banco_nao_responde(banco_travado, monkeypatch):
+    monkeypatch.setattr(database, "TIMEOUT_POOL_SEGUNDOS", 0.2)
+
+    at = AppTest.from_file(APP, default_timeout=30).run()
+
+    assert not at.exception
+    assert len(at.error) == 1
+    assert at.error[0].value.endswith("Erro ao conectar no banco de dados: sem resposta em 0.2 s")
+
+    # Quando o banco responde, o próximo rerun usa o mesmo aquecimento
+    banco_travado.set()
+    at.run()
+    assert not at.exception
+    assert not at.error
@@ -0,0 +1,104 @@
+from queue import Queue
+
+import pytest
+
+import auditoria
+from conftest import inserir_linha
+
+
+def _evento(n: int) -> auditoria.Evento:
+    return auditoria.Evento(f"2026-01-01 00:00:{n:02d}", "padrao", "hunt_criada", "admin",
+                            n, "Asura", "10:00", "11:00", None, None)
+
+
+def test_gravar_em_lotes_e_repete_so_o_lote_que_falhou(monkeypatch):
+    import database
+
+    gravados, falhas = [], [1]  # o segundo lote falha uma vez
+
+    def gravar(lote):
+        if len(gravados) == 1 and falhas:
+            falhas.pop()
+            raise RuntimeError("banco caiu")
+        gravados.append([e.registro_id for e in lote])
+        return len(lote)
+
+    monkeypatch.setattr(database, "gravar_auditoria", gravar)
+    monkeypatch.setattr(auditoria, "LOTE", 2)
+    monkeypatch.setattr(auditoria, "INTERVALO_SEGUNDOS", 0)
+    antes = auditoria.EVENTOS_GRAVADOS.valor()
+
+    auditoria._gravar([_evento(n) for n in range(5)])
+
+    assert gravados == [[0, 1], [2, 3], [4]]
+    assert auditoria.EVENTOS_GRAVADOS.valor() - antes == 5
+
+
+def test_lote_descartado_depois_das_tentativas(monkeypatch):
+    import database
+
+    def gravar(lote):
+        raise RuntimeError("banco caiu")
+
+    monkeypatch.setattr(database, "gravar_auditoria", gravar)
+    monkeypatch.setattr(auditoria, "INTERVALO_SEGUNDOS", 0)
+    antes = auditoria.EVENTOS_DESCARTADOS.valor(motivo="erro_banco")
+
+    auditoria._gravar([_evento(n) for n in range(3)])
+
+    assert auditoria.EVENTOS_DESCARTADOS.valor(motivo="erro_banco") - antes == 3
+
+
+def test_fila_cheia_descarta_sem_bloquear(monkeypatch):
+    monkeypatch.setattr(auditoria, "_fila", Queue(maxsize=1))
+    monkeypatch.setattr(auditoria, "_gravador", object())  # sem thread: a fila não esvazia
+    antes = auditoria.EVENTOS_DESCARTADOS.valor(motivo="fila_cheia")
+
+    auditoria.registrar("hunt_criada", "padrao", 1)
+    auditoria.registrar("hunt_criada", "padrao", 2)
+
+    assert auditoria._fila.qsize() == 1
+    assert auditoria.EVENTOS_DESCARTADOS.valor(motivo="fila_cheia") - antes == 1
+
+
+def test_registrar_descarregar_e_consultar(banco):
+    auditoria.usar_autor("admin")
+    try:
+        h1 = banco.insert_hunt("Asura", "10:00", "11:00", "A", " ", "B")
+        banco.insert_hunt("Zao", "23:00", "01:00", "C")
+        banco.delete_hunt(h1)
+        banco.usar_tenant("outra")
+        banco.insert_hunt("Asura", "10:00", "11:00", "D")
+        banco.usar_tenant(banco.TENANT_PADRAO)
+    finally:
+        auditoria.usar_autor(auditoria.AUTOR_PADRAO)
+
+    assert auditoria.descarregar()
+    eventos = banco.get_auditoria()
+
+    assert [(e.acao, e.respawn, e.horario_inicio, e.horario_fim) for e in eventos] == [
+        ("hunt_removida", "Asura", "10:00", "11:00"),
+        ("hunt_criada", "Zao", "23:00", "01:00"),
+        ("hunt_criada", "Asura", "10:00", "11:00"),
+    ]
+    assert {e.autor for e in eventos} == {"admin"}
+    assert eventos[-1].integrantes == "A, B"
+    assert [e.registro_id for e in banco.get_auditoria(acao="hunt_removida")] == [h1]
+    assert [e.respawn for e in banco.get_auditoria(respawn="Zao")] == ["Zao"]
+    assert banco.get_auditoria(autor="outro") == []
+    assert len(banco.get_auditoria(limite=1)) == 1
+    assert banco.get_auditoria(desde="2999-01-01") == []
+    assert len(banco.get_auditoria(ate="2999-01-01")) == 3
+
+
+def test_editar_hunt_sem_minutos_audita_o_texto_antigo(banco):
+    hunt_id = inserir_linha("hunts", "Asura", "9h", "10h", None, None)
+    outra = banco.insert_hunt("Zao", "12:00", "13:00", "B")
+
+    assert banco.update_hunts([
+        {"id": hunt_id, "respawn": "Asura", "horario_inicio": "09:00", "horario_fim": "10:00", "integrante1": "A"},
+        {"id": outra, "respawn": "Zao", "horario_inicio": "14:00", "horario_fim": "15:00", "integrante1": "B"},
+    ]) == 2
+
+    editadas = {e.registro_id: e.detalhe for e in banco.get_auditoria(acao="hunt_editada")}
+    assert editadas == {hunt_id: "antes: Asura 9h às 10h", outra: "antes: Zao 12:00 às 13:00"}
@@ -0,0 +1,56 @@
+import csv
+import gzip
+from datetime import date
+
+from sqlalchemy import text
+
+import backup
+
+
+def _respawns(db):
+    return sorted(h.respawn for h in db.get_all_hunts())
+
+
+def test_restaurar_substituindo_uma_guilda_preserva_as_outras(banco, tmp_path):
+    banco.usar_tenant("alfa")
+    banco.insert_hunt("Asura", "10:00", "12:00", "Fulano")
+    recorrente = banco.insert_hunt_recorrente("Asura", "20:00", "22:00", 1, "Fulano")
+    banco.add_excecao_recorrente(recorrente, date(2026, 10, 19))
+    banco.usar_tenant("beta")
+    banco.insert_hunt("Cobra", "10:00", "12:00", "Beltrano")
+    banco.insert_hunt_recorrente("Cobra", "20:00", "22:00", 1, "Beltrano")
+    outra = banco.get_hunts_recorrentes()[0].id
+    banco.add_excecao_recorrente(outra, date(2026, 10, 19))
+
+    banco.usar_tenant("alfa")
+    totais = backup.exportar(str(tmp_path / "bkp"))
+    assert totais["hunts"] == 1
+    assert totais["hunts_recorrentes_excecoes"] == 1
+
+    banco.insert_hunt("Asura", "14:00", "15:00", "Ciclano")
+    backup.restaurar(str(tmp_path / "bkp"), substituir=True)
+
+    assert _respawns(banco) == ["Asura"]
+    banco.usar_tenant("beta")
+    assert _respawns(banco) == ["Cobra"]
+    assert len(banco.get_hunts_recorrentes()) == 1
+    with banco.get_engine().connect() as conn:
+        excecoes = conn.execute(text("SELECT recorrente_id FROM hunts_recorrentes_excecoes")).fetchall()
+    assert sorted(r[0] for r in excecoes) == sorted([recorrente, outra])
+
+
+def test_restaurar_ignora_linhas_de_outras_guildas_no_arquivo(banco, tmp_path):
+    # Backup de antes do --guilda: o arquivo traz as linhas de todas as guildas
+    caminho = backup._caminho(str(tmp_path), "hunts", "csv")
+    with gzip.open(caminho, "wt", encoding="utf-8", newline="") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(["id", "tenant_id", "respawn", "horario_inicio", "horario_fim",
+                           "integrante1", "minuto_inicio", "minuto_fim"])
+        escritor.writerow([1, "alfa", "Asura", "10:00", "12:00", "Fulano", 600, 720])
+        escritor.writerow([2, "beta", "Cobra", "10:00", "12:00", "Beltrano", 600, 720])
+
+    banco.usar_tenant("alfa")
+    assert backup.restaurar(str(tmp_path))["hunts"] == 1
+    assert _respawns(banco) == ["Asura"]
+    banco.usar_tenant("beta")
+    assert _respawns(banco) == []
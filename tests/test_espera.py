@@ -0,0 +1,76 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from conftest import inserir_linha
+
+
+def test_rejeitar_para_espera_requisicao_sem_hash(banco):
+    # Cadastradas direto no banco depois do init_db: hash_conteudo NULL
+    r1 = inserir_linha("requisicoes", "Asura", "10:00", "11:00", 600, 660, "A")
+    r2 = inserir_linha("requisicoes", "Asura", "9h", "10h", None, None, "B")
+    r3 = banco.insert_requisicao("Zao", "12:00", "13:00", "C")
+
+    assert banco.aprovar_requisicoes([], [r1, r2, r3], rejeitadas_para_espera=True) == (0, 3)
+
+    assert banco.get_all_requisicoes() == []
+    espera = banco.get_lista_espera()
+    assert sorted((e.respawn, e.horario_inicio, e.integrantes) for e in espera) == [
+        ("Asura", "10:00", ("A",)), ("Zao", "12:00", ("C",)),
+    ]
+    # O hash calculado impede que o mesmo pedido entre duas vezes na espera
+    r4 = inserir_linha("requisicoes", "Asura", "10:00", "11:00", 600, 660, " a ")
+    banco.aprovar_requisicoes([], [r4], rejeitadas_para_espera=True)
+    assert len(banco.get_lista_espera()) == 2
+
+
+def test_rejeitadas_para_espera_nao_voltam_na_mesma_chamada(banco):
+    antiga = banco.insert_espera("Asura", "14:00", "15:00", "Velho")
+    hunt = banco.insert_hunt("Asura", "14:00", "15:00", "X")
+    r1 = banco.insert_requisicao("Asura", "10:00", "11:00", "A")
+
+    banco.aprovar_requisicoes([], [r1], rejeitadas_para_espera=True)
+    assert banco.get_all_requisicoes() == []
+    assert [e.integrantes for e in banco.get_lista_espera()] == [("Velho",), ("A",)]
+
+    # Numa liberação posterior, os dois cabem e são promovidos
+    banco.delete_hunt(hunt)
+    assert sorted(r.integrantes for r in banco.get_all_requisicoes()) == [("A",), ("Velho",)]
+    assert antiga not in {e.id for e in banco.get_lista_espera()}
+
+
+def test_promocao_usa_as_recorrentes_do_dia_do_planilhado(banco):
+    segunda = date(2026, 10, 19) - timedelta(days=date(2026, 10, 19).weekday())
+    banco.insert_hunt_recorrente("Asura", "10:00", "11:00", 1 << 0, "R")
+    banco.insert_espera("Asura", "10:00", "11:00", "A")
+    h1 = banco.insert_hunt("Asura", "10:00", "11:00", "X")
+    banco.delete_hunt(h1, dia=segunda)
+    assert banco.get_all_requisicoes() == []
+
+    h2 = banco.insert_hunt("Asura", "12:00", "13:00", "Y")
+    banco.delete_hunt(h2, dia=segunda + timedelta(days=1))
+    assert [r.integrantes for r in banco.get_all_requisicoes()] == [("A",)]
+
+
+def test_so_o_indice_de_hash_vira_duplicada(banco):
+    banco.insert_requisicao("Asura", "10:00", "11:00", "A")
+    banco.insert_espera("Asura", "12:00", "13:00", "A")
+    with pytest.raises(banco.RequisicaoDuplicadaError):
+        banco.insert_requisicao("Asura", "10:00", "11:00", "A")
+    with pytest.raises(banco.RequisicaoDuplicadaError):
+        banco.insert_espera("Asura", "12:00", "13:00", "A")
+
+    # Outra restrição (aqui, uma trigger) não pode virar "requisição idêntica"
+    with banco.get_engine().connect() as conn:
+        for tabela in ("requisicoes", "lista_espera"):
+            conn.execute(text(f"""
+                CREATE TRIGGER bloqueia_{tabela} BEFORE INSERT ON {tabela}
+                BEGIN SELECT RAISE(ABORT, 'bloqueado'); END
+            """))
+        conn.commit()
+    with pytest.raises(IntegrityError, match="bloqueado"):
+        banco.insert_requisicao("Zao", "10:00", "11:00", "B")
+    with pytest.raises(IntegrityError, match="bloqueado"):
+        banco.insert_espera("Zao", "12:00", "13:00", "B")
@@ -0,0 +1,126 @@
+import random
+
+import numpy as np
+from sqlalchemy import text
+
+from horarios_livres import buscar_horarios_livres, janelas_livres, ranquear
+from intervalos import MINUTOS_DIA
+
+SEMENTE = 43
+
+
+def _linha_aleatoria(rng: random.Random) -> np.ndarray:
+    """Linha de 1440 minutos com alguns blocos ocupados (às vezes nenhum, às vezes atravessando)."""
+    ocupado = np.zeros(MINUTOS_DIA, dtype=bool)
+    for _ in range(rng.choice([0, 1, 2, 3, 6])):
+        inicio = rng.randrange(MINUTOS_DIA)
+        for m in range(inicio, inicio + rng.randint(1, 300)):
+            ocupado[m % MINUTOS_DIA] = True
+    if rng.random() < 0.05:
+        ocupado[:] = True
+    return ocupado
+
+
+def _janelas_forca_bruta(livre: np.ndarray):
+    """Janelas livres maximais no dia circular: {(inicio, comprimento)}."""
+    if livre.all():
+        return {(0, MINUTOS_DIA)}
+    janelas = set()
+    for inicio in range(MINUTOS_DIA):
+        if livre[inicio] and not livre[inicio - 1]:
+            comprimento = 0
+            while livre[(inicio + comprimento) % MINUTOS_DIA]:
+                comprimento += 1
+            janelas.add((inicio, comprimento))
+    return janelas
+
+
+def _cabe(livre: np.ndarray, inicio: int, duracao: int) -> bool:
+    return all(livre[(inicio + d) % MINUTOS_DIA] for d in range(duracao))
+
+
+def test_janelas_livres_contra_forca_bruta():
+    rng = random.Random(SEMENTE)
+    livre = ~np.array([_linha_aleatoria(rng) for _ in range(200)])
+    linha, inicio, comprimento = janelas_livres(livre)
+    obtidas = {}
+    for l, i, c in zip(linha, inicio, comprimento):
+        obtidas.setdefault(int(l), set()).add((int(i), int(c)))
+    for l in range(livre.shape[0]):
+        assert obtidas.get(l, set()) == _janelas_forca_bruta(livre[l]), l
+
+
+def test_ranquear_contra_forca_bruta():
+    rng = random.Random(SEMENTE)
+    for _ in range(40):
+        n = rng.randint(1, 6)
+        ocupado_respawns = np.array([_linha_aleatoria(rng) for _ in range(n)])
+        ocupado_party = _linha_aleatoria(rng)
+        duracao = rng.choice([1, 30, 60, 120, 600, MINUTOS_DIA])
+        a_partir_de = rng.randrange(MINUTOS_DIA)
+        respawns = [f"R{i}" for i in range(n)]
+
+        candidatos = ranquear(respawns, ocupado_respawns, ocupado_party, duracao, a_partir_de, limite=10_000)
+
+        livre = ~ocupado_respawns & ~ocupado_party
+        esperado = sum(
+            1 for l in range(n) for _, c in _janelas_forca_bruta(livre[l]) if c >= duracao
+        )
+        assert len(candidatos) == esperado
+        esperas = []
+        for c in candidatos:
+            l = respawns.index(c.respawn)
+            assert _cabe(livre[l], c.minuto_inicio, duracao)
+            esperas.append((c.minuto_inicio - a_partir_de) % MINUTOS_DIA)
+        assert esperas == sorted(esperas)
+        # O melhor de cada respawn é a partida viável mais próxima do horário desejado
+        for l, respawn in enumerate(respawns):
+            viaveis = [(s - a_partir_de) % MINUTOS_DIA for s in range(MINUTOS_DIA) if _cabe(livre[l], s, duracao)]
+            primeiro = next((c for c in candidatos if c.respawn == respawn), None)
+            if not viaveis:
+                assert primeiro is None
+            else:
+                assert (primeiro.minuto_inicio - a_partir_de) % MINUTOS_DIA == min(viaveis)
+
+
+def test_buscar_horarios_livres_no_banco(banco):
+    banco.insert_hunt("Asura", "00:00", "12:00", "Outro")
+    banco.insert_hunt("Zao", "23:00", "02:00", "FULANO")  # o jogador ocupa 23:00-02:00 em qualquer respawn
+    banco.insert_requisicao("Zao", "12:00", "20:00", "Ciclano")
+    banco.insert_hunt_recorrente("Asura", "15:00", "16:00", 0b1111111, "Beltrano")
+
+    candidatos = buscar_horarios_livres(["fulano", "beltrano"], 60, a_partir_de=22 * 60)
+
+    # Livres para a party: Asura 12:00-15:00 e 16:00-23:00; Zao 02:00-12:00 e 20:00-23:00
+    assert [(c.respawn, c.horario_inicio, c.horario_fim, c.folga) for c in candidatos] == [
+        ("Asura", "22:00", "23:00", 0),
+        ("Zao", "22:00", "23:00", 0),
+        ("Zao", "02:00", "03:00", 540),
+        ("Asura", "12:00", "13:00", 120),
+    ]
+
+
+def test_busca_por_jogador_usa_indices(banco):
+    with banco.get_engine().connect() as conn:
+        conn.execute(
+            text("""
+                INSERT INTO hunts (tenant_id, respawn, horario_inicio, horario_fim, integrante1,
+                    integrante2, minuto_inicio, minuto_fim)
+                VALUES (:tenant, 'Asura', '10:00', '11:00', :i1, :i2, 600, 660)
+            """),
+            [{"tenant": f"guilda{n % 3}", "i1": f"Jogador{n}", "i2": f"Outro{n}"} for n in range(2000)],
+        )
+        conn.execute(text("ANALYZE"))
+        conn.commit()
+        indices = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+        plano = [str(row[3]) for row in conn.execute(
+            text(f"""
+                EXPLAIN QUERY PLAN SELECT minuto_inicio FROM hunts
+                WHERE tenant_id = :tenant AND minuto_inicio IS NOT NULL AND ({banco._sql_integrante_em(":j0")})
+            """),
+            {"tenant": "guilda1", "j0": "jogador1"},
+        )]
+    for tabela in ("hunts", "requisicoes"):
+        assert {f"idx_{tabela}_tenant_integrante{i}_lower" for i in range(1, 6)} <= indices
+    assert "MULTI-INDEX OR" in plano
+    assert sum("_lower (tenant_id=? AND <expr>=?)" in p for p in plano) == 5
@@ -0,0 +1,66 @@
+import io
+from datetime import date
+
+import pandas as pd
+
+import importacao
+
+SEGUNDA = date(2026, 10, 19)
+SEG, TER, DOM = 1 << 0, 1 << 1, 1 << 6
+
+
+def _planilha(*linhas):
+    return pd.DataFrame(
+        [list(linha) + [None] * (len(importacao.COLUNAS) - len(linha)) for linha in linhas],
+        columns=importacao.COLUNAS,
+    )
+
+
+def test_validar_planilha_contra_hunts_requisicoes_e_recorrentes(banco):
+    banco.insert_hunt("Asura", "10:00", "11:00", "A")
+    banco.insert_requisicao("Asura", "12:00", "13:00", "B")
+    banco.insert_hunt_recorrente("Asura", "14:00", "15:00", SEG, "C")
+    banco.insert_hunt_recorrente("Asura", "16:00", "17:00", TER, "D")  # não ocorre na segunda
+    banco.insert_hunt_recorrente("Zao", "23:00", "02:00", DOM, "E")  # domingo até 02:00 de segunda
+    banco.insert_hunt_recorrente("Zao", "00:30", "01:00", TER, "F")  # alcançada por linha que atravessa
+
+    df = _planilha(
+        ("Asura", "10:30", "11:30", "G"),
+        ("Asura", "12:30", "12:45", "H"),
+        ("Asura", "14:30", "14:45", "I"),
+        ("Asura", "16:00", "17:00", "J"),
+        ("Zao", "01:00", "03:00", "K"),
+        ("Zao", "23:30", "00:45", "L"),
+        ("Zao", "12:00", "13:00", "M"),
+        ("Zao", "12:30", "13:30", "N"),
+    )
+    validas, relatorio = importacao.validar_planilha(df, SEGUNDA)
+
+    assert list(relatorio["Mensagem"]) == [
+        "Conflito com hunt já cadastrada das 10:00 às 11:00.",
+        "Conflito com requisição pendente das 12:00 às 13:00.",
+        "Conflito com hunt recorrente das 14:00 às 15:00.",
+        "",
+        "Conflito com hunt recorrente das 23:00 às 02:00.",
+        "Conflito com hunt recorrente das 00:30 às 01:00.",
+        "",
+        "Conflito com a linha 8 da planilha.",
+    ]
+    assert list(validas["horario_inicio"]) == ["16:00", "12:00"]
+    assert importacao.importar(validas) == 2
+    assert banco.get_intervalos_hunts(["Zao"])[0][2:] == ("12:00", "13:00", 720, 780)
+
+
+def test_ler_planilha_recusa_mais_de_5_integrantes(banco):
+    csv = io.StringIO(
+        "Respawn,Início,Fim,Integrantes\n"
+        'Asura,10:00,11:00,"A, B, C, D, E"\n'
+        'Zao,10:00,11:00,"A, B, C, D, E, F"\n'
+        'Cobra,10:00,11:00,"A, B,"\n'
+    )
+    df = importacao.ler_planilha(csv, "planilha.csv")
+    validas, relatorio = importacao.validar_planilha(df, SEGUNDA)
+
+    assert list(relatorio["Mensagem"]) == ["", "Mais de 5 integrantes.", ""]
+    assert list(validas["respawn"]) == ["Asura", "Cobra"]
+    assert list(validas.iloc[0][importacao.COLUNAS[3:]]) == ["A", "B", "C", "D", "E"]
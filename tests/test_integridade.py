@@ -0,0 +1,74 @@
+import itertools
+import random
+
+import database
+import integridade
+from conftest import inserir_linha
+from intervalos import MINUTOS_DIA, sobrepoem
+
+
+def _chaves(problemas):
+    return {(p.tipo, p.tabela, p.id, p.outra_tabela, p.outro_id) for p in problemas}
+
+
+def test_pares_sobrepostos_contra_forca_bruta():
+    rng = random.Random(44)
+    for _ in range(300):
+        intervalos = []
+        for i in range(rng.randint(0, 12)):
+            inicio = rng.randrange(MINUTOS_DIA)
+            intervalos.append((inicio, inicio + rng.randint(1, MINUTOS_DIA), (0, i)))
+        intervalos.sort()
+        pares = list(integridade.pares_sobrepostos(intervalos))
+        esperados = {
+            (min(a[2], b[2]), max(a[2], b[2]))
+            for a, b in itertools.combinations(intervalos, 2) if sobrepoem(a[0], a[1], b[0], b[1])
+        }
+        assert len(pares) == len(set(pares))
+        assert set(pares) == esperados
+
+
+def test_verificar_e_corrigir(banco):
+    h1 = banco.insert_hunt("Asura", "10:00", "12:00", "A")
+    h2 = inserir_linha("hunts", "Asura", "11:00", "13:00", 660, 780, "B")
+    h3 = inserir_linha("hunts", "Asura", "11:00", "13:00", 660, 780, " b ")  # duplicata de h2
+    h4 = inserir_linha("hunts", "Zao", "9:00", "10:00", 540, 600)  # malformado
+    h5 = inserir_linha("hunts", "Zao", "xx", "10:00", None, None)  # inválido
+    h6 = inserir_linha("hunts", "Zao", "23:00", "02:00", 1380, 1560)
+    h7 = inserir_linha("hunts", "Zao", "01:00", "03:00", 60, 180)  # sobrepõe h6 pela meia-noite
+    h8 = inserir_linha("hunts", "Zao", "05:00", "06:00", 1, 2)  # minutos divergentes
+    r1 = inserir_linha("requisicoes", "Asura", "11:30", "11:45", 690, 705)
+    r2 = inserir_linha("requisicoes", "Zao", "00:30", "00:45", 30, 45)
+    banco.usar_tenant("outra")
+    inserir_linha("hunts", "Asura", "10:00", "12:00", 600, 720)  # outra guilda: não conta
+    banco.usar_tenant(banco.TENANT_PADRAO)
+
+    problemas = list(integridade.verificar(lote=2))
+
+    assert _chaves(problemas) == {
+        ("overlap", "hunts", h2, "hunts", h1),
+        ("duplicata", "hunts", h3, "hunts", h2),
+        ("overlap", "requisicoes", r1, "hunts", h1),
+        ("overlap", "requisicoes", r1, "hunts", h2),
+        ("horario_malformado", "hunts", h4, None, None),
+        ("horario_invalido", "hunts", h5, None, None),
+        ("overlap", "hunts", h7, "hunts", h6),
+        ("overlap", "requisicoes", r2, "hunts", h6),
+        ("minutos_divergentes", "hunts", h8, None, None),
+    }
+    assert integridade.resumir(problemas) == {
+        "overlap": 5, "duplicata": 1, "horario_malformado": 1, "horario_invalido": 1, "minutos_divergentes": 1,
+    }
+
+    resultado = integridade.corrigir(problemas, remover_overlaps=True, lote=2)
+
+    assert resultado == {"horarios": 2, "hunts_removidas": 3, "requisicoes_removidas": 0, "para_espera": 2}
+    restantes = {h.id: h for h in database.get_all_hunts()}
+    assert sorted(restantes) == [h1, h4, h5, h6, h8]
+    assert restantes[h4][2:4] == ("09:00", "10:00")
+    assert (restantes[h8].minuto_inicio, restantes[h8].minuto_fim) == (300, 360)
+    assert database.get_all_requisicoes() == []
+    assert sorted((r.respawn, r.horario_inicio) for r in database.get_lista_espera()) == [
+        ("Asura", "11:30"), ("Zao", "00:30"),
+    ]
+    assert _chaves(integridade.verificar()) == {("horario_invalido", "hunts", h5, None, None)}
@@ -0,0 +1,68 @@
+"""
+_SQL_OVERLAP (no SQLite) contra sobrepoem/encontrar_conflito e contra a definição direta
+(algum minuto do dia em comum), com intervalos aleatórios que atravessam a meia-noite.
+"""
+import random
+
+import pytest
+from sqlalchemy import text
+
+from conftest import inserir_linha
+from database import _SQL_OVERLAP, _sql_overlap_linhas
+from intervalos import MINUTOS_DIA, intervalo_em_minutos, minutos_para_horario, sobrepoem
+from validators import encontrar_conflito
+
+SEMENTE = 20261019
+BORDAS = [0, 1, 59, 60, 719, 720, 1380, 1438, 1439]
+
+
+def _intervalo_aleatorio(rng: random.Random):
+    inicio = rng.choice(BORDAS) if rng.random() < 0.3 else rng.randrange(MINUTOS_DIA)
+    duracao = rng.choice([1, 2, 60, MINUTOS_DIA - 1, MINUTOS_DIA]) if rng.random() < 0.3 else rng.randint(1, MINUTOS_DIA)
+    return inicio, inicio + duracao
+
+
+def _minutos_do_dia(inicio: int, fim: int) -> set:
+    return {m % MINUTOS_DIA for m in range(inicio, fim)}
+
+
+def test_horarios_que_atravessam_a_meia_noite():
+    assert intervalo_em_minutos("23:00", "01:00") == (1380, 1500)
+    with pytest.raises(ValueError):
+        intervalo_em_minutos("10:00", "10:00")
+    assert sobrepoem(1380, 1500, 30, 90)
+    assert not sobrepoem(1380, 1500, 60, 120)
+    assert not sobrepoem(600, 660, 660, 720)
+
+
+def test_sql_overlap_concorda_com_sobrepoem(banco):
+    rng = random.Random(SEMENTE)
+    existentes = []
+    for _ in range(60):
+        inicio, fim = _intervalo_aleatorio(rng)
+        hi, hf = minutos_para_horario(inicio), minutos_para_horario(fim)
+        existentes.append((inserir_linha("hunts", "Asura", hi, hf, inicio, fim), hi, hf, inicio, fim))
+
+    with banco.get_engine().connect() as conn:
+        for _ in range(300):
+            ini, fim = _intervalo_aleatorio(rng)
+            no_banco = {row[0] for row in conn.execute(
+                text(f"SELECT id FROM hunts WHERE respawn = 'Asura' AND ({_SQL_OVERLAP})"),
+                {"ini": ini, "fim": fim},
+            )}
+            minutos = _minutos_do_dia(ini, fim)
+            esperado = {e[0] for e in existentes if minutos & _minutos_do_dia(e[3], e[4])}
+            assert no_banco == esperado, (ini, fim)
+            assert no_banco == {e[0] for e in existentes if sobrepoem(ini, fim, e[3], e[4])}
+            assert (encontrar_conflito(ini, fim, existentes) is not None) == bool(esperado)
+            assert (banco.buscar_conflito_hunt("Asura", ini, fim) is not None) == bool(esperado)
+
+        pares = {tuple(row) for row in conn.execute(text(f"""
+            SELECT a.id, b.id FROM hunts a JOIN hunts b ON a.id < b.id
+            WHERE {_sql_overlap_linhas("a", "b")}
+        """))}
+    esperados = {
+        (a[0], b[0]) for a in existentes for b in existentes
+        if a[0] < b[0] and sobrepoem(a[3], a[4], b[3], b[4])
+    }
+    assert pares == esperados
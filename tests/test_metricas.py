@@ -0,0 +1,68 @@
+import pytest
+
+import metricas
+
+
+@pytest.fixture
+def registro(monkeypatch):
+    """Métricas registradas pelo teste somem do registro global ao final."""
+    monkeypatch.setattr(metricas, "_registro", dict(metricas._registro))
+
+
+def _linhas(prefixo):
+    return [linha for linha in metricas.texto().splitlines() if linha.startswith(prefixo)]
+
+
+def test_histograma_baldes_acumulados_e_count(registro):
+    h = metricas.histograma("teste_duracao_segundos", "Duração.", baldes=(0.1, 1.0))
+    for valor in (0.05, 0.5, 0.7, 3.0):
+        h.observar(valor, funcao="f")
+
+    assert _linhas("teste_duracao_segundos") == [
+        'teste_duracao_segundos_bucket{funcao="f",le="0.1"} 1',
+        'teste_duracao_segundos_bucket{funcao="f",le="1"} 3',
+        'teste_duracao_segundos_bucket{funcao="f",le="+Inf"} 4',
+        'teste_duracao_segundos_sum{funcao="f"} 4.25',
+        'teste_duracao_segundos_count{funcao="f"} 4',
+    ]
+    assert "# TYPE teste_duracao_segundos histogram" in metricas.texto()
+
+
+def test_rotulos_escapados(registro):
+    c = metricas.contador("teste_eventos_total", "Eventos.")
+    c.inc(respawn='Asura "norte"\\sul\nleste')
+    assert _linhas("teste_eventos_total") == [
+        'teste_eventos_total{respawn="Asura \\"norte\\"\\\\sul\\nleste"} 1',
+    ]
+
+
+def test_medidor_que_falha_fica_de_fora(registro):
+    metricas.medidor("teste_ok", "Funciona.", lambda: {"a": 2}, rotulo="guilda")
+    metricas.medidor("teste_quebrado", "Falha.", lambda: 1 / 0)
+
+    assert _linhas("teste_ok") == ['teste_ok{guilda="a"} 2']
+    assert "teste_quebrado" not in metricas.texto()
+
+
+def test_medir_consulta_conta_excecoes():
+    @metricas.medir_consulta
+    def teste_consulta_falha():
+        raise ValueError("sem banco")
+
+    erros = metricas.ERROS_CONSULTA.valor(funcao="teste_consulta_falha", erro="ValueError")
+    with pytest.raises(ValueError):
+        teste_consulta_falha()
+    assert metricas.ERROS_CONSULTA.valor(funcao="teste_consulta_falha", erro="ValueError") == erros + 1
+    assert metricas.LATENCIA_CONSULTA.contagem(funcao="teste_consulta_falha") == 1
+
+
+def test_medir_consulta_nao_mede_chamadas_aninhadas(banco):
+    antes_externa = metricas.LATENCIA_CONSULTA.contagem(funcao="get_utilizacao_respawns")
+    antes_interna = metricas.LATENCIA_CONSULTA.contagem(funcao="get_matriz_ocupacao")
+
+    banco.get_utilizacao_respawns()
+    assert metricas.LATENCIA_CONSULTA.contagem(funcao="get_utilizacao_respawns") == antes_externa + 1
+    assert metricas.LATENCIA_CONSULTA.contagem(funcao="get_matriz_ocupacao") == antes_interna
+
+    banco.get_matriz_ocupacao()
+    assert metricas.LATENCIA_CONSULTA.contagem(funcao="get_matriz_ocupacao") == antes_interna + 1
@@ -0,0 +1,96 @@
+import itertools
+import random
+from datetime import datetime
+
+from intervalos import MINUTOS_DIA, sobrepoem
+from modelos import Requisicao
+from triagem import PesosTriagem, escalonar, escalonar_circular, triar
+
+SEMENTE = 37
+
+
+def _compativeis(itens, indices, periodo=None):
+    for a, b in itertools.combinations(indices, 2):
+        (a1, a2, _), (b1, b2, _) = itens[a], itens[b]
+        if periodo is None:
+            if a1 < b2 and a2 > b1:
+                return False
+        elif sobrepoem(a1, a2, b1, b2, periodo):
+            return False
+    return True
+
+
+def _melhor_por_forca_bruta(itens, periodo=None):
+    melhor = 0.0
+    for n in range(1, len(itens) + 1):
+        for indices in itertools.combinations(range(len(itens)), n):
+            if _compativeis(itens, indices, periodo):
+                melhor = max(melhor, sum(itens[i][2] for i in indices))
+    return melhor
+
+
+def test_escalonar_exemplo():
+    itens = [(0, 60, 1.0), (30, 90, 5.0), (60, 120, 1.0), (90, 150, 1.0)]
+    assert escalonar(itens) == (6.0, [1, 3])
+    assert escalonar([]) == (0.0, [])
+    # Encostar não é sobrepor
+    assert escalonar([(0, 60, 1.0), (60, 120, 1.0)]) == (2.0, [0, 1])
+
+
+def test_escalonar_contra_forca_bruta():
+    rng = random.Random(SEMENTE)
+    for _ in range(200):
+        itens = []
+        for _ in range(rng.randint(0, 8)):
+            inicio = rng.randrange(0, 600, 15)
+            itens.append((inicio, inicio + rng.randrange(15, 240, 15), float(rng.randint(1, 9))))
+        total, escolhidos = escalonar(itens)
+        assert _compativeis(itens, escolhidos)
+        assert total == sum(itens[i][2] for i in escolhidos)
+        assert total == _melhor_por_forca_bruta(itens)
+
+
+def test_escalonar_circular_contra_forca_bruta():
+    rng = random.Random(SEMENTE)
+    for _ in range(200):
+        itens = []
+        for _ in range(rng.randint(0, 7)):
+            inicio = rng.randrange(0, MINUTOS_DIA, 30)
+            itens.append((inicio, inicio + rng.randrange(30, 600, 30), float(rng.randint(1, 9))))
+        escolhidos = escalonar_circular(itens)
+        assert _compativeis(itens, escolhidos, MINUTOS_DIA)
+        assert sum(itens[i][2] for i in escolhidos) == _melhor_por_forca_bruta(itens, MINUTOS_DIA)
+
+
+def test_triar_motivos():
+    def req(id_, inicio, fim, m_ini, m_fim, integrantes=("A",)):
+        return Requisicao(id_, "Asura", inicio, fim, integrantes, None, m_ini, m_fim)
+
+    requisicoes = [
+        req(1, "10:00", "11:00", 600, 660),
+        req(2, "12:00", "14:00", 720, 840, ("A", "B", "C")),
+        req(3, "13:00", "15:00", 780, 900),
+        req(4, "9h", "10h", None, None),
+    ]
+    existentes = {"Asura": [("10:30", "11:30", 630, 690)]}
+    decisoes = triar(requisicoes, existentes, PesosTriagem(por_hora_espera=0), datetime(2026, 1, 1))
+
+    assert [(d.requisicao.id, d.aceitar, d.motivo) for d in decisoes] == [
+        (1, False, "Conflita com hunt cadastrada das 10:30 às 11:30."),
+        (2, True, ""),
+        (3, False, "Conflita com a requisição aceita das 12:00 às 14:00."),
+        (4, False, "Horário inválido (use HH:MM)."),
+    ]
+
+
+def test_triar_recusa_sem_vencedora_nao_quebra(monkeypatch):
+    import triagem
+
+    # Escalonamento que deixa de fora uma requisição sem conflito com nenhuma aceita
+    monkeypatch.setattr(triagem, "escalonar_circular", lambda itens: [0])
+    requisicoes = [
+        Requisicao(1, "Asura", "10:00", "11:00", ("A",), None, 600, 660),
+        Requisicao(2, "Asura", "12:00", "13:00", ("B",), None, 720, 780),
+    ]
+    decisoes = triar(requisicoes, {})
+    assert [(d.aceitar, d.motivo) for d in decisoes] == [(True, ""), (False, "Não selecionada pelo escalonamento.")]
@@ -0,0 +1,58 @@
+from sqlalchemy import create_engine
+
+from conftest import inserir_linha
+from validators import validar_edicoes, verificar_overlap, verificar_overlap_recorrente
+
+
+def test_overlap_ve_escrita_de_outro_processo_dentro_do_ttl(banco):
+    banco.insert_hunt("Asura", "08:00", "09:00", "A")
+    # Bitmaps carregados e válidos (TTL de 60 s) antes da escrita externa
+    assert not banco.get_ocupacao("Asura", incluir_requisicoes=True)[600:660].any()
+
+    # Outra instância do app grava pelo seu próprio engine
+    deste_processo, banco._engine = banco._engine, create_engine(banco.SQLITE_URL)
+    try:
+        inserir_linha("hunts", "Asura", "10:00", "11:00", 600, 660)
+        inserir_linha("requisicoes", "Zao", "23:00", "01:00", 1380, 1500)
+    finally:
+        banco._engine.dispose()
+        banco._engine = deste_processo
+
+    tem_overlap, mensagem = verificar_overlap("Asura", "10:30", "12:00")
+    assert tem_overlap and "10:00" in mensagem
+    tem_overlap, mensagem = verificar_overlap("Zao", "00:30", "02:00")
+    assert tem_overlap and "requisição pendente" in mensagem
+    assert verificar_overlap("Asura", "11:00", "12:00") == (False, None)
+
+
+def test_recorrente_conflita_com_hunts_e_requisicoes_em_qualquer_dia(banco):
+    banco.insert_hunt("Asura", "10:00", "11:00", "A")
+    banco.insert_requisicao("Zao", "23:00", "01:00", "B")
+    terca = 1 << 1
+
+    tem_overlap, mensagem = verificar_overlap_recorrente("Asura", "10:30", "11:30", terca)
+    assert tem_overlap and "hunt cadastrada das 10:00 às 11:00" in mensagem
+    tem_overlap, mensagem = verificar_overlap_recorrente("Zao", "00:30", "02:00", terca)
+    assert tem_overlap and "requisição pendente das 23:00 às 01:00" in mensagem
+    assert verificar_overlap_recorrente("Asura", "11:00", "12:00", terca) == (False, None)
+
+
+def test_recorrente_conflita_com_outro_modelo_so_em_dias_em_comum(banco):
+    segunda, terca = 1 << 0, 1 << 1
+    banco.insert_hunt_recorrente("Asura", "23:00", "01:00", segunda, "A")
+
+    assert verificar_overlap_recorrente("Asura", "12:00", "13:00", segunda) == (False, None)
+    # Segunda 23:00-01:00 entra na madrugada de terça
+    assert verificar_overlap_recorrente("Asura", "00:30", "02:00", terca)[0]
+    assert verificar_overlap_recorrente("Asura", "00:30", "02:00", segunda | (1 << 6)) == (False, None)
+
+
+def test_validar_edicoes_conflita_com_requisicao_pendente(banco):
+    hunt = banco.insert_hunt("Asura", "14:00", "15:00", "A")
+    banco.insert_requisicao("Asura", "10:00", "11:00", "B")
+
+    erros = validar_edicoes([{"id": hunt, "respawn": "Asura", "horario_inicio": "10:30", "horario_fim": "11:30"}])
+    assert erros[hunt].endswith("requisição pendente das 10:00 às 11:00.")
+    assert validar_edicoes(
+        [{"id": hunt, "respawn": "Asura", "horario_inicio": "11:00", "horario_fim": "12:00"}]
+    ) == {}
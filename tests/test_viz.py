@@ -0,0 +1,62 @@
+from datetime import date
+
+from conftest import inserir_linha
+from modelos import Hunt, Requisicao
+from viz import gerar_grafico_linha_do_tempo, gerar_linha_do_tempo, gerar_quadro_respawn
+
+TODOS_OS_DIAS = 0b1111111
+
+
+def test_quadro_respawn_com_horario_fora_do_padrao():
+    hunts = [
+        Hunt(1, "Asura", "9h", "10h", ("A",), None, None, None),
+        Hunt(2, "Asura", "20:00", "22:00", ("B",), None, 1200, 1320),
+        Hunt(3, "Asura", "08:00", "09:00", ("C",), None, 480, 540),
+    ]
+    quadro = gerar_quadro_respawn("Asura", hunts)
+    assert list(quadro["Horário Início"]) == ["08:00", "20:00", "9h"]
+
+
+def test_iterar_hunts_com_minutos_nulos_e_recorrente(banco):
+    banco.insert_hunt("Asura", "20:00", "22:00", "B")
+    inserir_linha("hunts", "Asura", "9h", "10h", None, None)
+    banco.insert_hunt_recorrente("Asura", "08:00", "09:00", TODOS_OS_DIAS, "C")
+
+    grupos = list(banco.iterar_hunts_por_respawn(date(2026, 1, 5)))
+
+    assert [nome for nome, _ in grupos] == ["Asura"]
+    assert [h.horario_inicio for h in grupos[0][1]] == ["08:00", "20:00", "9h"]
+
+
+def test_iterar_hunts_um_grupo_por_respawn(banco):
+    banco.insert_hunt("asura", "10:00", "11:00", "A")
+    banco.insert_hunt("Zao", "10:00", "11:00", "B")
+    banco.insert_hunt("Ébano", "10:00", "11:00", "C")
+    banco.insert_hunt_recorrente("Zao", "12:00", "13:00", TODOS_OS_DIAS, "D")
+    banco.insert_hunt_recorrente("Bela", "12:00", "13:00", TODOS_OS_DIAS, "E")
+    banco.insert_hunt_recorrente("Ébano", "12:00", "13:00", TODOS_OS_DIAS, "F")
+
+    grupos = dict(banco.iterar_hunts_por_respawn(date(2026, 1, 5), lote=1))
+
+    assert sorted(grupos) == sorted(["asura", "Zao", "Ébano", "Bela"])
+    assert [h.horario_inicio for h in grupos["Zao"]] == ["10:00", "12:00"]
+    assert [h.horario_inicio for h in grupos["Ébano"]] == ["10:00", "12:00"]
+    assert [h.horario_inicio for h in grupos["Bela"]] == ["12:00"]
+
+
+def test_linha_do_tempo_meia_noite_e_minutos_nulos():
+    hunts = [("Asura", [
+        Hunt(1, "Asura", "9h", "10h", ("A",), None, None, None),
+        Hunt(2, "Asura", "23:00", "01:30", ("B",), None, 1380, 1530),
+    ])]
+    requisicoes = [("Zao", [Requisicao(7, "Zao", "10:00", "11:00", ("C",), None, 600, 660)])]
+
+    barras = gerar_linha_do_tempo(hunts, requisicoes)
+
+    assert [(b["respawn"], b["inicio"], b["fim"], b["tipo"]) for b in barras] == [
+        ("Asura", 1380, 1440, "Hunt"),
+        ("Asura", 0, 90, "Hunt"),
+        ("Zao", 600, 660, "Requisição pendente"),
+    ]
+    spec = gerar_grafico_linha_do_tempo(barras)
+    assert spec["encoding"]["y"]["sort"] == ["Asura", "Zao"]
@@ -0,0 +1,168 @@
+"""
+Triagem automática de requisições pendentes.
+
+Por respawn, escolhe o conjunto de requisições sem overlap entre si (e sem overlap com as hunts
+já cadastradas) de maior peso total: weighted interval scheduling, com programação dinâmica
+sobre os intervalos ordenados pelo fim e busca binária do último compatível, O(n log n).
+
+O dia é circular: requisições que atravessam a meia-noite se sobrepõem todas entre si, então no
+máximo uma delas entra. Resolve-se o caso sem nenhuma e um caso por requisição que atravessa
+(removendo as que conflitam com ela), e fica o melhor. Cada caso refaz a programação dinâmica,
+então com k requisições atravessando a meia-noite o respawn custa O((k + 1) · n log n); k costuma
+ser pequeno (poucos pedidos de madrugada por respawn).
+"""
+from bisect import bisect_right
+from datetime import date, datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import database
+from intervalos import MINUTOS_DIA, sobrepoem
+from modelos import Requisicao, chave_horario
+
+# Peso mínimo: com pesos positivos, toda requisição recusada conflita com alguma aceita
+_PESO_MINIMO = 1e-6
+
+
+class PesosTriagem(NamedTuple):
+    """peso = base + por_integrante * integrantes + por_hora_espera * horas desde a requisição."""
+    base: float = 1.0
+    por_integrante: float = 1.0
+    por_hora_espera: float = 0.1
+
+
+class Decisao(NamedTuple):
+    requisicao: Requisicao
+    aceitar: bool
+    peso: float
+    motivo: str
+
+
+def _data_requisicao(valor: Optional[str]) -> Optional[datetime]:
+    if not valor:
+        return None
+    try:
+        data = datetime.fromisoformat(str(valor))
+    except ValueError:
+        return None
+    return data.replace(tzinfo=None)
+
+
+def peso_requisicao(req: Requisicao, pesos: PesosTriagem, agora: datetime) -> float:
+    """Peso de uma requisição para a triagem (tamanho da party e tempo de espera)."""
+    peso = pesos.base + pesos.por_integrante * len(req.integrantes)
+    data = _data_requisicao(req.data_requisicao)
+    if data is not None:
+        peso += pesos.por_hora_espera * max(0.0, (agora - data).total_seconds() / 3600)
+    return max(peso, _PESO_MINIMO)
+
+
+def escalonar(itens: Sequence[Tuple[int, int, float]]) -> Tuple[float, List[int]]:
+    """
+    Weighted interval scheduling numa reta: itens (inicio, fim, peso) com fim > inicio.
+    Intervalos que só se encostam (fim de um == início do outro) são compatíveis.
+    Retorna (peso_total, índices escolhidos em `itens`).
+    """
+    ordem = sorted(range(len(itens)), key=lambda i: (itens[i][1], itens[i][0]))
+    fins = [itens[i][1] for i in ordem]
+    # anterior[j]: quantos itens (na ordem por fim) terminam até o início do j-ésimo
+    anterior = [bisect_right(fins, itens[i][0]) for i in ordem]
+    melhor = [0.0] * (len(ordem) + 1)
+    for j, i in enumerate(ordem):
+        melhor[j + 1] = max(melhor[j], itens[i][2] + melhor[anterior[j]])
+
+    escolhidos = []
+    j = len(ordem)
+    while j > 0:
+        i = ordem[j - 1]
+        if itens[i][2] + melhor[anterior[j - 1]] >= melhor[j - 1]:
+            escolhidos.append(i)
+            j = anterior[j - 1]
+        else:
+            j -= 1
+    return melhor[-1], escolhidos[::-1]
+
+
+def escalonar_circular(itens: Sequence[Tuple[int, int, float]]) -> List[int]:
+    """
+    escalonar() no dia circular: itens (minuto_inicio, minuto_fim, peso) normalizados, em que
+    minuto_fim > 1440 atravessa a meia-noite. Retorna os índices escolhidos. Roda escalonar()
+    uma vez sem as que atravessam e uma vez por cada uma delas: O((k + 1) · n log n).
+    """
+    retos = [i for i, (_, fim, _) in enumerate(itens) if fim <= MINUTOS_DIA]
+    peso, escolhidos = escalonar([itens[i] for i in retos])
+    melhor_peso, melhor = peso, [retos[k] for k in escolhidos]
+
+    for c, (c_ini, c_fim, c_peso) in enumerate(itens):
+        if c_fim <= MINUTOS_DIA:
+            continue
+        livres = [i for i in retos if not sobrepoem(itens[i][0], itens[i][1], c_ini, c_fim)]
+        peso, escolhidos = escalonar([itens[i] for i in livres])
+        if peso + c_peso > melhor_peso:
+            melhor_peso, melhor = peso + c_peso, [c] + [livres[k] for k in escolhidos]
+    return melhor
+
+
+def triar(
+    requisicoes: Iterable[Requisicao],
+    existentes: Dict[str, List[Tuple[str, str, int, int]]],
+    pesos: PesosTriagem = PesosTriagem(),
+    agora: Optional[datetime] = None,
+) -> List[Decisao]:
+    """
+    Propõe aceitar/recusar cada requisição. `existentes` mapeia respawn para os intervalos já
+    ocupados (horario_inicio, horario_fim, minuto_inicio, minuto_fim). Requisições que conflitam
+    com uma hunt são recusadas; as demais passam pelo escalonamento de maior peso do respawn.
+    """
+    agora = agora or datetime.now()
+    por_respawn: Dict[str, List[Requisicao]] = {}
+    for req in requisicoes:
+        por_respawn.setdefault(req.respawn, []).append(req)
+
+    decisoes: List[Decisao] = []
+    for respawn in sorted(por_respawn):
+        candidatas = []
+        for req in por_respawn[respawn]:
+            peso = peso_requisicao(req, pesos, agora)
+            if req.minuto_inicio is None or req.minuto_fim is None:
+                decisoes.append(Decisao(req, False, peso, "Horário inválido (use HH:MM)."))
+                continue
+            hunt = next(
+                (h for h in existentes.get(respawn, [])
+                 if sobrepoem(req.minuto_inicio, req.minuto_fim, h[2], h[3])),
+                None,
+            )
+            if hunt:
+                decisoes.append(Decisao(req, False, peso, f"Conflita com hunt cadastrada das {hunt[0]} às {hunt[1]}."))
+            else:
+                candidatas.append((req, peso))
+
+        escolhidos = set(escalonar_circular([(r.minuto_inicio, r.minuto_fim, p) for r, p in candidatas]))
+        aceitas = [candidatas[i][0] for i in escolhidos]
+        for i, (req, peso) in enumerate(candidatas):
+            if i in escolhidos:
+                decisoes.append(Decisao(req, True, peso, ""))
+                continue
+            vencedora = next(
+                (a for a in aceitas if sobrepoem(req.minuto_inicio, req.minuto_fim, a.minuto_inicio, a.minuto_fim)),
+                None,
+            )
+            if vencedora:
+                motivo = f"Conflita com a requisição aceita das {vencedora.horario_inicio} às {vencedora.horario_fim}."
+            else:
+                motivo = "Não selecionada pelo escalonamento."
+            decisoes.append(Decisao(req, False, peso, motivo))
+    decisoes.sort(key=lambda d: (d.requisicao.respawn, chave_horario(d.requisicao)))
+    return decisoes
+
+
+def propor_triagem(requisicoes: List[Requisicao], dia: date,
+                   pesos: PesosTriagem = PesosTriagem()) -> List[Decisao]:
+    """triar() contra as hunts cadastradas e as ocorrências recorrentes do dia, lidas do banco."""
+    respawns = sorted({r.respawn for r in requisicoes})
+    existentes: Dict[str, List[Tuple[str, str, int, int]]] = {}
+    for _, respawn, h_inicio, h_fim, m_inicio, m_fim in database.get_intervalos_hunts(respawns):
+        existentes.setdefault(respawn, []).append((h_inicio, h_fim, m_inicio, m_fim))
+    for h in database.expandir_recorrentes(dia, dia):
+        if h.respawn in respawns:
+            existentes.setdefault(h.respawn, []).append((h.horario_inicio, h.horario_fim, h.minuto_inicio, h.minuto_fim))
+    return triar(requisicoes, existentes, pesos)
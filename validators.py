@@ -1,10 +1,28 @@
-from typing import Optional, Tuple
-from database import get_hunts_by_respawn_for_validation, get_requisicoes_by_respawn_for_validation
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+from database import (
+    buscar_conflito_hunt,
+    buscar_conflito_recorrente,
+    buscar_conflito_requisicao,
+    get_hunts_recorrentes,
+    get_intervalos_hunts,
+    get_intervalos_requisicoes,
+)
+from metricas import medir_overlap
+from intervalos import (
+    MINUTOS_SEMANA,
+    horario_para_minutos,
+    intervalo_em_minutos,
+    intervalos_da_semana,
+    sobrepoem,
+)
 
 
+@medir_overlap
 def verificar_overlap(respawn: str, horario_inicio: str, horario_fim: str, 
                      exclude_id: Optional[int] = None, 
-                     verificar_requisicoes: bool = True) -> Tuple[bool, Optional[str]]:
+                     verificar_requisicoes: bool = True,
+                     data: Optional[date] = None) -> Tuple[bool, Optional[str]]:
     """
     Verifica se há overlap de horário para um respawn específico.
     
@@ -14,52 +32,150 @@ def verificar_overlap(respawn: str, horario_inicio: str, horario_fim: str,
         horario_fim: Horário de fim no formato HH:MM
         exclude_id: ID de uma hunt/requisição a ser excluída da verificação (útil para edição)
         verificar_requisicoes: Se True, também verifica overlaps com requisições pendentes
+        data: Dia do planilhado, usado para expandir as hunts recorrentes (padrão: hoje)
     
     Returns:
         Tupla (tem_overlap, mensagem_erro)
         Se tem_overlap é True, mensagem_erro contém detalhes do conflito
     """
-    # Buscar todas as hunts do mesmo respawn
-    hunts_existentes = get_hunts_by_respawn_for_validation(respawn, exclude_id)
+    # Converter horários para minutos; fim > 1440 quando a hunt atravessa a meia-noite
+    inicio_minutos, fim_minutos = intervalo_em_minutos(horario_inicio, horario_fim)
     
-    # Converter horários para minutos para facilitar comparação
-    inicio_minutos = _horario_para_minutos(horario_inicio)
-    fim_minutos = _horario_para_minutos(horario_fim)
-    
-    # Verificar overlap com cada hunt existente
-    for hunt_id, h_inicio, h_fim in hunts_existentes:
-        h_inicio_min = _horario_para_minutos(h_inicio)
-        h_fim_min = _horario_para_minutos(h_fim)
-        
-        # Dois intervalos [A1, A2] e [B1, B2] se sobrepõem se: A1 < B2 AND A2 > B1
-        if inicio_minutos < h_fim_min and fim_minutos > h_inicio_min:
-            mensagem = f"Conflito de horário! Já existe uma hunt cadastrada das {h_inicio} às {h_fim}."
-            return True, mensagem
+    # Sempre no banco: os bitmaps de ocupação são por processo e só expiram após o TTL, então não
+    # enxergam o que outra instância do app acabou de gravar
+    conflito = buscar_conflito_hunt(respawn, inicio_minutos, fim_minutos, exclude_id)
+    if not conflito:
+        # Ocorrências de hunts recorrentes contam exatamente como hunts cadastradas
+        conflito = buscar_conflito_recorrente(respawn, inicio_minutos, fim_minutos, data or date.today())
+    if conflito:
+        _, h_inicio, h_fim = conflito
+        mensagem = f"Conflito de horário! Já existe uma hunt cadastrada das {h_inicio} às {h_fim}."
+        return True, mensagem
     
     # Verificar overlap com requisições pendentes (se solicitado)
     if verificar_requisicoes:
-        requisicoes_existentes = get_requisicoes_by_respawn_for_validation(respawn, exclude_id)
-        
-        for req_id, h_inicio, h_fim in requisicoes_existentes:
-            h_inicio_min = _horario_para_minutos(h_inicio)
-            h_fim_min = _horario_para_minutos(h_fim)
-            
-            if inicio_minutos < h_fim_min and fim_minutos > h_inicio_min:
-                mensagem = f"Conflito de horário! Já existe uma requisição pendente das {h_inicio} às {h_fim}."
-                return True, mensagem
+        conflito = buscar_conflito_requisicao(respawn, inicio_minutos, fim_minutos, exclude_id)
+        if conflito:
+            _, h_inicio, h_fim = conflito
+            mensagem = f"Conflito de horário! Já existe uma requisição pendente das {h_inicio} às {h_fim}."
+            return True, mensagem
     
     return False, None
 
 
+@medir_overlap
+def verificar_overlap_recorrente(respawn: str, horario_inicio: str, horario_fim: str,
+                                 dias_semana: int) -> Tuple[bool, Optional[str]]:
+    """
+    Verifica se um novo modelo recorrente conflita com outros modelos do respawn (em
+    minutos-da-semana, só nos dias em comum) e com as hunts e requisições pendentes, que não
+    têm data e valem para todos os dias.
+    
+    Returns:
+        Tupla (tem_overlap, mensagem_erro)
+    """
+    inicio_minutos, fim_minutos = intervalo_em_minutos(horario_inicio, horario_fim)
+    novas = intervalos_da_semana(dias_semana, inicio_minutos, fim_minutos)
+    
+    for modelo in get_hunts_recorrentes(respawn):
+        existentes = intervalos_da_semana(modelo.dias_semana, modelo.minuto_inicio, modelo.minuto_fim)
+        if any(sobrepoem(a1, a2, b1, b2, MINUTOS_SEMANA) for a1, a2 in novas for b1, b2 in existentes):
+            mensagem = (f"Conflito de horário! Já existe uma hunt recorrente das "
+                        f"{modelo.horario_inicio} às {modelo.horario_fim}.")
+            return True, mensagem
+    
+    if dias_semana:
+        conflito = buscar_conflito_hunt(respawn, inicio_minutos, fim_minutos)
+        if conflito:
+            mensagem = f"Conflito de horário! Já existe uma hunt cadastrada das {conflito[1]} às {conflito[2]}."
+            return True, mensagem
+        conflito = buscar_conflito_requisicao(respawn, inicio_minutos, fim_minutos)
+        if conflito:
+            mensagem = f"Conflito de horário! Já existe uma requisição pendente das {conflito[1]} às {conflito[2]}."
+            return True, mensagem
+    
+    return False, None
+
+
+@medir_overlap
+def validar_edicoes(alteracoes: List[dict], data: Optional[date] = None) -> Dict[int, str]:
+    """
+    Valida um lote de edições de hunts (dicts com id, respawn, horario_inicio, horario_fim)
+    contra o estado final: hunts não editadas, as outras edições do lote, as hunts recorrentes e
+    as requisições pendentes (como verificar_overlap com verificar_requisicoes=True).
+    
+    Returns:
+        {id: mensagem_erro} apenas para as edições inválidas
+    """
+    erros: Dict[int, str] = {}
+    respawns = sorted({a["respawn"] for a in alteracoes if a.get("respawn")})
+    editadas = {a["id"] for a in alteracoes}
+    # (id, horario_inicio, horario_fim, minuto_inicio, minuto_fim) por respawn, sem as linhas editadas
+    ocupadas: Dict[str, List[Tuple]] = {}
+    for row in get_intervalos_hunts(respawns):
+        if row[0] not in editadas:
+            ocupadas.setdefault(row[1], []).append((row[0], row[2], row[3], row[4], row[5]))
+    pendentes: Dict[str, List[Tuple]] = {}
+    for row in get_intervalos_requisicoes(respawns):
+        pendentes.setdefault(row[1], []).append((row[0], row[2], row[3], row[4], row[5]))
+    
+    for a in alteracoes:
+        if not a.get("respawn"):
+            erros[a["id"]] = "Respawn vazio."
+            continue
+        try:
+            valido, mensagem = validar_horarios(a["horario_inicio"], a["horario_fim"])
+            if not valido:
+                erros[a["id"]] = mensagem
+                continue
+            inicio_minutos, fim_minutos = intervalo_em_minutos(a["horario_inicio"], a["horario_fim"])
+        except (ValueError, AttributeError):
+            erros[a["id"]] = "Horário inválido (use HH:MM)."
+            continue
+        
+        conflito = encontrar_conflito(inicio_minutos, fim_minutos, ocupadas.get(a["respawn"], []))
+        if not conflito:
+            conflito = buscar_conflito_recorrente(
+                a["respawn"], inicio_minutos, fim_minutos, data or date.today()
+            )
+        if conflito:
+            erros[a["id"]] = f"Conflito de horário! Já existe uma hunt cadastrada das {conflito[1]} às {conflito[2]}."
+            continue
+        conflito = encontrar_conflito(inicio_minutos, fim_minutos, pendentes.get(a["respawn"], []))
+        if conflito:
+            erros[a["id"]] = f"Conflito de horário! Já existe uma requisição pendente das {conflito[1]} às {conflito[2]}."
+            continue
+        ocupadas.setdefault(a["respawn"], []).append(
+            (a["id"], a["horario_inicio"], a["horario_fim"], inicio_minutos, fim_minutos)
+        )
+    return erros
+
+
+def encontrar_conflito(inicio_minutos: int, fim_minutos: int,
+                       existentes: Iterable[Tuple]) -> Optional[Tuple]:
+    """
+    Versão em memória do filtro de overlap do banco. `existentes` são tuplas
+    (id, horario_inicio, horario_fim, minuto_inicio, minuto_fim); retorna a primeira
+    que sobrepõe o intervalo, ou None. Deve concordar com buscar_conflito_hunt.
+    """
+    for item in existentes:
+        m_inicio, m_fim = item[3], item[4]
+        if m_inicio is None or m_fim is None:
+            continue
+        if sobrepoem(inicio_minutos, fim_minutos, m_inicio, m_fim):
+            return item
+    return None
+
+
 def _horario_para_minutos(horario: str) -> int:
     """Converte horário no formato HH:MM para minutos desde meia-noite."""
-    horas, minutos = map(int, horario.split(':'))
-    return horas * 60 + minutos
+    return horario_para_minutos(horario)
 
 
 def validar_horarios(horario_inicio: str, horario_fim: str) -> Tuple[bool, Optional[str]]:
     """
-    Valida se o horário final é maior que o inicial.
+    Valida se o horário final é diferente do inicial. Horário final menor que o inicial
+    é uma hunt que atravessa a meia-noite (ex: 23:00 às 02:00).
     
     Returns:
         Tupla (valido, mensagem_erro)
@@ -67,7 +183,7 @@ def validar_horarios(horario_inicio: str, horario_fim: str) -> Tuple[bool, Optio
     inicio_minutos = _horario_para_minutos(horario_inicio)
     fim_minutos = _horario_para_minutos(horario_fim)
     
-    if fim_minutos <= inicio_minutos:
-        return False, "O horário final deve ser maior que o horário inicial."
+    if fim_minutos == inicio_minutos:
+        return False, "O horário final deve ser diferente do horário inicial."
     
     return True, None
@@ -1,40 +1,167 @@
-import pandas as pd
-from typing import List, Tuple
+"""
+Funções que montam os quadros e gráficos da visualização. O pandas é importado dentro de cada
+função, só quando uma tabela é de fato desenhada, para não pesar no início a frio do app.
+"""
+from typing import TYPE_CHECKING, Iterable, List, Tuple
 
+from modelos import MAX_INTEGRANTES, Hunt, Requisicao, chave_horario, em_colunas, texto_integrantes
 
-def gerar_quadro_respawn(respawn: str, hunts: List[Tuple]) -> pd.DataFrame:
+if TYPE_CHECKING:
+    import pandas as pd
+
+MINUTOS_DIA = 24 * 60
+_REGEX_HORARIO = r"^\s*(\d{1,2}):(\d{2})(?::\d{2})?\s*$"
+
+
+def gerar_quadro_respawn(respawn: str, hunts: List[Hunt]) -> "pd.DataFrame":
     """
     Gera um DataFrame formatado com as hunts de um respawn específico.
     """
+    import pandas as pd
     if not hunts:
         return pd.DataFrame(columns=["Horário Início", "Horário Fim", "Integrantes"])
 
     dados = []
-    for hunt in hunts:
-        horario_inicio = hunt[2]
-        horario_fim = hunt[3]
-        integrantes = []
-        for i in range(4, 9):
-            if hunt[i] and hunt[i].strip():
-                integrantes.append(hunt[i].strip())
-        integrantes_str = ", ".join(integrantes) if integrantes else "-"
+    for hunt in sorted(hunts, key=chave_horario):
         dados.append({
-            "Horário Início": horario_inicio,
-            "Horário Fim": horario_fim,
-            "Integrantes": integrantes_str
+            "Horário Início": hunt.horario_inicio,
+            "Horário Fim": hunt.horario_fim,
+            "Integrantes": texto_integrantes(hunt.integrantes)
         })
-
-    df = pd.DataFrame(dados)
-    df = df.sort_values("Horário Início").reset_index(drop=True)
-    return df
+    return pd.DataFrame(dados)
 
 
-def agrupar_hunts_por_respawn(hunts: List[Tuple]) -> dict:
+def agrupar_hunts_por_respawn(hunts: List[Hunt]) -> dict:
     """Agrupa hunts por respawn."""
     agrupadas = {}
     for hunt in hunts:
-        respawn = hunt[1]
-        if respawn not in agrupadas:
-            agrupadas[respawn] = []
-        agrupadas[respawn].append(hunt)
+        agrupadas.setdefault(hunt.respawn, []).append(hunt)
     return agrupadas
+
+
+def gerar_quadro_saturacao(linhas: List[Tuple]) -> "pd.DataFrame":
+    """
+    Gera um DataFrame respawn x hora com a % de ocupação de cada hora, a partir das linhas
+    (respawn, hora, hunts, minutos) da tabela de resumo.
+    """
+    import pandas as pd
+    horas = [f"{h:02d}h" for h in range(24)]
+    if not linhas:
+        return pd.DataFrame(columns=["Respawn"] + horas)
+
+    df = pd.DataFrame(linhas, columns=["respawn", "hora", "hunts", "minutos"])
+    quadro = (
+        df.pivot_table(index="respawn", columns="hora", values="minutos", aggfunc="sum", fill_value=0)
+        .reindex(columns=range(24), fill_value=0)
+        .clip(upper=60)
+        .mul(100 / 60)
+        .round()
+        .astype(int)
+    )
+    quadro.columns = horas
+    quadro.index.name = "Respawn"
+    return quadro.reset_index()
+
+
+def gerar_quadro_jogadores(linhas: List[Tuple]) -> "pd.DataFrame":
+    """Gera um DataFrame com os jogadores que mais caçam, a partir de (jogador, hunts, minutos)."""
+    import pandas as pd
+    df = pd.DataFrame(linhas, columns=["Jogador", "Hunts", "minutos"])
+    df["Horas"] = (df.pop("minutos") / 60).round(1)
+    return df
+
+
+COLUNAS_EDICAO = ["Deletar", "ID", "Respawn", "Início", "Fim",
+                  "Integrante 1", "Integrante 2", "Integrante 3", "Integrante 4", "Integrante 5"]
+
+
+def gerar_tabela_edicao(hunts: List[Hunt]) -> "pd.DataFrame":
+    """
+    Gera o DataFrame do editor de admin (uma linha por hunt cadastrada), montado em colunas
+    a partir dos registros. Ocorrências de hunts recorrentes (id None) ficam de fora.
+    """
+    import pandas as pd
+    c = em_colunas([h for h in hunts if h.id is not None])
+    integrantes = [list(nomes) + [None] * (MAX_INTEGRANTES - len(nomes)) for nomes in c.integrantes]
+    df = pd.DataFrame({"ID": c.id, "Respawn": c.respawn, "Início": c.horario_inicio, "Fim": c.horario_fim})
+    df[COLUNAS_EDICAO[5:]] = pd.DataFrame(integrantes, columns=COLUNAS_EDICAO[5:], dtype=object)
+    df.insert(0, "Deletar", False)
+    return df
+
+
+def coluna_em_minutos(coluna: "pd.Series") -> "pd.Series":
+    """Converte uma coluna HH:MM (ou HH:MM:SS) em minutos desde meia-noite; inválidos viram NaN."""
+    import pandas as pd
+    partes = coluna.fillna("").astype(str).str.extract(_REGEX_HORARIO)
+    horas = pd.to_numeric(partes[0], errors="coerce")
+    minutos = pd.to_numeric(partes[1], errors="coerce")
+    return (horas * 60 + minutos).where((horas < 24) & (minutos < 60))
+
+
+def gerar_linha_do_tempo(
+    hunts: Iterable[Tuple[str, List[Hunt]]], requisicoes: Iterable[Tuple[str, List[Requisicao]]]
+) -> List[dict]:
+    """
+    Barras (respawn, inicio, fim, tipo, horario, integrantes) de hunts e requisições pendentes,
+    a partir dos grupos (respawn, registros) de database.iterar_*_por_respawn. Cada grupo vira
+    barras assim que chega, sem montar as listas completas de registros nem DataFrames
+    intermediários; as barras em si são os dados do gráfico e cobrem o planilhado inteiro.
+    Intervalos que atravessam a meia-noite viram duas barras ([inicio, 1440) e [0, fim)).
+    Linhas sem minutos (horário fora do padrão) ficam de fora, como em encontrar_conflito.
+    """
+    barras = []
+    for grupos, tipo in ((hunts, "Hunt"), (requisicoes, "Requisição pendente")):
+        for respawn, registros in grupos:
+            for r in registros:
+                if r.minuto_inicio is None or r.minuto_fim is None:
+                    continue
+                barra = {
+                    "respawn": respawn,
+                    "inicio": int(r.minuto_inicio),
+                    "fim": int(min(r.minuto_fim, MINUTOS_DIA)),
+                    "tipo": tipo,
+                    "horario": f"{r.horario_inicio} - {r.horario_fim}",
+                    "integrantes": texto_integrantes(r.integrantes),
+                }
+                barras.append(barra)
+                if r.minuto_fim > MINUTOS_DIA:
+                    barras.append(dict(barra, inicio=0, fim=int(r.minuto_fim - MINUTOS_DIA)))
+    return barras
+
+
+def gerar_grafico_linha_do_tempo(barras: List[dict]) -> dict:
+    """Spec Vega-Lite (Gantt) com uma linha por respawn e uma barra por hunt/requisição."""
+    respawns = sorted({b["respawn"] for b in barras})
+    return {
+        "$schema": "https://vega.github.io/schema/vega-lite/v5.json",
+        "data": {"values": barras},
+        "height": max(120, 24 * len(respawns)),
+        "mark": {"type": "bar", "cornerRadius": 3},
+        "encoding": {
+            "y": {"field": "respawn", "type": "nominal", "title": None, "sort": respawns},
+            "x": {
+                "field": "inicio",
+                "type": "quantitative",
+                "title": None,
+                "scale": {"domain": [0, MINUTOS_DIA]},
+                "axis": {
+                    "values": list(range(0, MINUTOS_DIA + 1, 120)),
+                    "labelExpr": "format(floor(datum.value / 60), '02d') + 'h'",
+                },
+            },
+            "x2": {"field": "fim"},
+            "color": {
+                "field": "tipo",
+                "type": "nominal",
+                "title": None,
+                "scale": {"domain": ["Hunt", "Requisição pendente"], "range": ["#FF4B4B", "#FFA94D"]},
+                "legend": {"orient": "top"},
+            },
+            "tooltip": [
+                {"field": "respawn", "title": "Respawn"},
+                {"field": "horario", "title": "Horário"},
+                {"field": "integrantes", "title": "Integrantes"},
+                {"field": "tipo", "title": "Tipo"},
+            ],
+        },
+    }